@@ -1,25 +1,81 @@
 from __future__ import annotations
 
-import json
+import asyncio
+import logging
 import re
+import time
+from collections.abc import Callable
+from datetime import timedelta
 from typing import Any
 
+from homeassistant.components import mqtt
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers import config_validation as cv
 from homeassistant.helpers import entity_registry as er
-from homeassistant.helpers.dispatcher import async_dispatcher_send
-from homeassistant.components import mqtt
 from homeassistant.helpers import device_registry as dr
-
-from .const import DOMAIN, PLATFORMS, CONF_NAME, CONF_TOPIC_PREFIX, CONF_PORTAL_ID, MANUFACTURER, HUB_NAME, HUB_MODEL
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.start import async_at_started
+from homeassistant.helpers.typing import ConfigType
+
+from .const import (
+    DOMAIN,
+    PLATFORMS,
+    CONF_NAME,
+    CONF_TOPIC_PREFIX,
+    CONF_PORTAL_ID,
+    CONF_BROKER_HOST,
+    CONF_BROKER_PORT,
+    CONF_BROKER_USERNAME,
+    CONF_BROKER_PASSWORD,
+    CONF_BROKER_TLS,
+    CONF_BROKER_VERIFY_SSL,
+    DEFAULT_BROKER_PORT,
+    CONF_BATCH_INTERVAL,
+    DEFAULT_BATCH_INTERVAL,
+    CONF_TRACE_LATENCY,
+    CONF_LIMIT_CONTROL,
+    CONF_SETTINGS_WRITE_BUDGET,
+    DEFAULT_SETTINGS_WRITE_BUDGET,
+    DIRECT_CONNECT_TIMEOUT,
+    DIRECT_SUBSCRIPTIONS,
+    DIRECT_GROUP_SUBSCRIPTIONS,
+    CONF_METRIC_GROUPS,
+    CONF_HIDDEN_GROUPS,
+    METRIC_GROUPS,
+    DIRECT_VICTRON_KEEPALIVE_INTERVAL,
+    MANUFACTURER,
+    HUB_NAME,
+    HUB_MODEL,
+)
+from .alarms import AlarmEvents
+from .controller import CurrentLimitController, LimitControlSettings
+from .datastore import EntryDataStore
+from .direct import DirectMqttClient
+from .ingest import VictronIngest
+from .loadshed import LoopLagMonitor
+from .router import async_get_router
+from .routes import MetricGroup, resolve
+from .services import async_setup_services
+from .snapshot import ValueSnapshot
+from .startup import StartupTimings
+from .topology import Topology
+from .tracing import LatencyTracer
+from .websocket import async_end_subscriptions, async_setup_websocket
+from .watchdog import StalenessWatchdog
+from .writes import FlashWriteGuard, PendingWriteTracker
+
+_LOGGER = logging.getLogger(__name__)
 
 SIGNAL_MQTT_MESSAGE = f"{DOMAIN}_mqtt_message"
 
-# Topic pattern examples:
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+# Topic pattern examples (routed per portal by router.PortalRouter):
 #   <prefix>/N/<portal_id>/vebus/276/State
 #   <prefix>/N/<portal_id>/vebus/276/Mode
 #   <prefix>/N/<portal_id>/vebus/276/CustomName
-_TOPIC_RE = re.compile(r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/(?P<rest>.+)$")
 
 
 def _slug(text: str) -> str:
@@ -39,6 +95,30 @@ def _slug(text: str) -> str:
     return s or "home"
 
 
+# Metric group of an entity by its unique_id (<id>_vebus_<n>_<key> / <id>_settings_<n>_<key>).
+_UNIQUE_ID_KEY = re.compile(r"_(?:vebus|settings)_\d+_(?P<key>.+)$")
+_KEY_GROUPS: tuple[tuple[str, MetricGroup], ...] = (
+    ("ac_in_", MetricGroup.AC_IN),  # incl. ac_in_current_limit
+    ("ac_out_", MetricGroup.AC_OUT),
+    ("battery_", MetricGroup.BATTERY),
+    ("dvcc_", MetricGroup.DVCC),
+    ("mode", MetricGroup.MODE),
+    ("emergency_shutdown", MetricGroup.MODE),
+    ("grid_active", MetricGroup.MODE),
+)
+
+
+def _unique_id_group(unique_id: str) -> MetricGroup | None:
+    m = _UNIQUE_ID_KEY.search(unique_id)
+    if m is None:
+        return None
+    key = m.group("key")
+    for prefix, group in _KEY_GROUPS:
+        if key.startswith(prefix):
+            return group
+    return None
+
+
 
 async def _async_migrate_entity_ids(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Best-effort migration to the **global** entity_id scheme.
@@ -110,8 +190,10 @@ async def _async_migrate_entity_ids(hass: HomeAssistant, entry: ConfigEntry) ->
         ent_reg.async_update_entity(e.entity_id, new_entity_id=new_entity_id)
 
 
-async def async_setup(hass: HomeAssistant, config: dict) -> bool:
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
     hass.data.setdefault(DOMAIN, {})
+    async_setup_services(hass)
+    async_setup_websocket(hass)
     return True
 
 
@@ -119,67 +201,240 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN].setdefault(entry.entry_id, {})
 
+    # Per-phase setup durations (diagnostics); platforms record their own setup.
+    timings = StartupTimings()
+    hass.data[DOMAIN][entry.entry_id]["startup"] = timings
+
     prefix: str = entry.data[CONF_TOPIC_PREFIX]
     portal: str = entry.data[CONF_PORTAL_ID]
 
     # Create a single HA device representing the Victron GX (Cerbo GX / Venus OS).
     # All VE-Bus entities are attached to this device (no separate VE-Bus device).
-    dev_reg = dr.async_get(hass)
-    hub_ident = f"{portal}_cerbo_gx"
-    dev_reg.async_get_or_create(
-        config_entry_id=entry.entry_id,
-        identifiers={(DOMAIN, hub_ident)},
-        manufacturer=MANUFACTURER,
-        model=HUB_MODEL,
-        name=HUB_NAME,
+    with timings.phase("device"):
+        dev_reg = dr.async_get(hass)
+        hub_ident = f"{portal}_cerbo_gx"
+        dev_reg.async_get_or_create(
+            config_entry_id=entry.entry_id,
+            identifiers={(DOMAIN, hub_ident)},
+            manufacturer=MANUFACTURER,
+            model=HUB_MODEL,
+            name=HUB_NAME,
+        )
+
+    # Best-effort entity_id migration (enforces ve_bus_* naming). Not needed for
+    # data to flow, so it runs once HA has started instead of during boot.
+    async def _async_deferred_migration(hass: HomeAssistant) -> None:
+        with timings.phase("entity_id_migration", deferred=True):
+            await _async_migrate_entity_ids(hass, entry)
+
+    entry.async_on_unload(async_at_started(hass, _async_deferred_migration))
+
+    # Known entity paths (platforms pre-create their entities from it in one batch)
+    # and the last known value per path (replayed after platform setup so entities
+    # start with values); both stores are loaded concurrently.
+    topology = Topology(hass, entry.entry_id)
+    snapshot = ValueSnapshot(hass, entry.entry_id)
+    with timings.phase("storage"):
+        await asyncio.gather(topology.async_load(), snapshot.async_load())
+    hass.data[DOMAIN][entry.entry_id]["topology"] = topology
+    hass.data[DOMAIN][entry.entry_id]["snapshot"] = snapshot
+
+    # Metric groups (options): disabled groups are neither routed nor subscribed,
+    # and their known paths are forgotten so no entities are pre-created for them.
+    enabled = set(entry.options.get(CONF_METRIC_GROUPS, METRIC_GROUPS))
+    disabled = frozenset(MetricGroup(g) for g in METRIC_GROUPS if g not in enabled)
+    hidden = frozenset(MetricGroup(g) for g in entry.options.get(CONF_HIDDEN_GROUPS, ()))
+    hass.data[DOMAIN][entry.entry_id]["disabled_groups"] = disabled
+    hass.data[DOMAIN][entry.entry_id]["hidden_groups"] = hidden
+    if disabled:
+        for path in [p for p in topology.paths if (r := resolve(p)) is not None and r.group in disabled]:
+            topology.discard(path)
+        # Entities of disabled groups would otherwise stay in the registry as unavailable.
+        ent_reg = er.async_get(hass)
+        for reg_entry in er.async_entries_for_config_entry(ent_reg, entry.entry_id):
+            if _unique_id_group(reg_entry.unique_id) in disabled:
+                ent_reg.async_remove(reg_entry.entity_id)
+
+    # Connection mode: direct to the GX broker, or via HA MQTT + Mosquitto bridge.
+    host: str = (entry.data.get(CONF_BROKER_HOST) or "").strip()
+    port: int = int(entry.data.get(CONF_BROKER_PORT) or DEFAULT_BROKER_PORT)
+    direct: DirectMqttClient | None = None
+
+    if host:
+
+        async def _publish(path: str, payload: str) -> None:
+            await direct.async_publish(f"W/{portal}/{path}", payload)
+
+    else:
+        if not await mqtt.async_wait_for_mqtt_client(hass):
+            raise ConfigEntryNotReady("MQTT integration is not available")
+
+        async def _publish(path: str, payload: str) -> None:
+            await mqtt.async_publish(hass, f"{prefix}/W/{portal}/{path}", payload, qos=0, retain=False)
+
+    # Latest parsed value per path; entities subscribe to their path in it.
+    store = EntryDataStore()
+    hass.data[DOMAIN][entry.entry_id]["store"] = store
+
+    # Pending W/ writes are resolved by the next N/ echo on the same path
+    # (not by a republish of the value stored before the write).
+    writes = PendingWriteTracker(hass, _publish, current=store.value)
+    hass.data[DOMAIN][entry.entry_id]["writes"] = writes
+    hass.data[DOMAIN][entry.entry_id]["wear_guard"] = FlashWriteGuard(
+        entry.options.get(CONF_SETTINGS_WRITE_BUDGET, DEFAULT_SETTINGS_WRITE_BUDGET)
     )
 
-    subscribe_topic = f"{prefix}/N/{portal}/#"
-
-    # Best-effort entity_id migration (enforces ve_bus_* naming)
-    await _async_migrate_entity_ids(hass, entry)
+    # One staleness sweep per entry (not one timer per entity).
+    watchdog = StalenessWatchdog(hass)
+    hass.data[DOMAIN][entry.entry_id]["watchdog"] = watchdog
 
-    @callback
-    def _message_received(msg: mqtt.ReceiveMessage) -> None:
-        topic = msg.topic
-        payload_raw = msg.payload
+    # Per-entry signals: platforms only ever see messages of their own GX.
+    signal = f"{SIGNAL_MQTT_MESSAGE}_{entry.entry_id}"
+    signal_batch = f"{signal}_batch"
 
-        m = _TOPIC_RE.match(topic)
-        if not m:
-            return
-        if m.group("prefix") != prefix or m.group("portal") != portal:
-            return
+    batch_interval = entry.options.get(CONF_BATCH_INTERVAL, DEFAULT_BATCH_INTERVAL) / 1000.0
+    tracer = LatencyTracer() if entry.options.get(CONF_TRACE_LATENCY) else None
 
-        payload_dict: dict[str, Any] | None = None
-        try:
-            if isinstance(payload_raw, (bytes, bytearray)):
-                payload_raw = payload_raw.decode("utf-8", errors="ignore")
-            if isinstance(payload_raw, str) and payload_raw.strip():
-                payload_dict = json.loads(payload_raw)
-        except Exception:
-            payload_dict = None
+    # VE.Bus alarm transitions go straight to the HA bus (EVENT_ALARM).
+    alarms = AlarmEvents(hass, entry.entry_id)
+    alarms.seed(snapshot.values)
+    hass.data[DOMAIN][entry.entry_id]["alarms"] = alarms
+    ingest = VictronIngest(
+        hass, signal, signal_batch, watchdog, writes, snapshot, store,
+        batch_interval, tracer, disabled, alarms,
+    )
+    hass.data[DOMAIN][entry.entry_id]["ingest"] = ingest
+
+    # Websocket live subscriptions listen on this ingest; they are ended with an
+    # error on unload instead of going silent across a reload.
+    live_subscriptions: set[Callable[[], None]] = set()
+    hass.data[DOMAIN][entry.entry_id]["live_subscriptions"] = live_subscriptions
+    entry.async_on_unload(lambda: async_end_subscriptions(live_subscriptions))
+
+    # Event-loop lag: coarser telemetry batching and deferred entity creation while degraded.
+    load = LoopLagMonitor(hass)
+    load.add_listener(ingest.set_degraded)
+    hass.data[DOMAIN][entry.entry_id]["load"] = load
+
+    _message_received = ingest.handle_message
+
+    subscribe_started = time.perf_counter()
+    if host:
+        # Topics on the GX broker carry no bridge prefix; platforms only see
+        # the path relative to N/<portal_id>/, which is the same in both modes.
+        n_base = f"N/{portal}/"
+        n_len = len(n_base)
+
+        @callback
+        def _direct_message(topic: str, payload_raw: bytes) -> None:
+            if not topic.startswith(n_base):
+                return
+            path = topic[n_len:]
+            _message_received(topic, path, payload_raw)
+
+        @callback
+        def _send_keepalive(*_: Any) -> None:
+            hass.async_create_background_task(
+                direct.async_publish(f"R/{portal}/keepalive", "{}"), f"{DOMAIN} keepalive"
+            )
+
+        subscriptions = list(DIRECT_SUBSCRIPTIONS)
+        for group, subs in DIRECT_GROUP_SUBSCRIPTIONS.items():
+            if group not in disabled:
+                subscriptions += subs
+
+        direct = DirectMqttClient(
+            hass,
+            host,
+            port,
+            client_id=f"ha-victron-{entry.entry_id[-12:]}",
+            subscriptions=[n_base + sub for sub in subscriptions],
+            on_message=_direct_message,
+            on_connect=_send_keepalive,
+            username=entry.data.get(CONF_BROKER_USERNAME) or None,
+            password=entry.data.get(CONF_BROKER_PASSWORD) or None,
+            tls=entry.data.get(CONF_BROKER_TLS, False),
+            verify_ssl=entry.data.get(CONF_BROKER_VERIFY_SSL, True),
+        )
+        await direct.async_start()
+        if not await direct.async_wait_connected(DIRECT_CONNECT_TIMEOUT):
+            await direct.async_stop()
+            raise ConfigEntryNotReady(f"Cannot connect to GX broker at {host}:{port}")
+        hass.data[DOMAIN][entry.entry_id]["direct"] = direct
+        unsub = async_track_time_interval(
+            hass, _send_keepalive, timedelta(seconds=DIRECT_VICTRON_KEEPALIVE_INTERVAL)
+        )
+    else:
+        # One MQTT subscription per topic prefix, shared with other entries on the same bridge.
+        unsub = await async_get_router(hass, prefix).async_register(portal, _message_received)
+    timings.record("subscription", subscribe_started)
 
-        if not isinstance(payload_dict, dict):
-            return
+    hass.data[DOMAIN][entry.entry_id]["unsub"] = unsub
+    hass.data[DOMAIN][entry.entry_id]["signal"] = signal
+    hass.data[DOMAIN][entry.entry_id]["signal_batch"] = signal_batch
+
+    # Optional closed-loop AC input current limit, fed directly by the ingestion path.
+    # Started once the transport is up, so a ConfigEntryNotReady above leaves nothing running;
+    # routes are only dispatched after the platforms are set up.
+    if entry.options.get(CONF_LIMIT_CONTROL):
+        if MetricGroup.AC_IN in disabled:
+            _LOGGER.warning("AC input current-limit control needs the AC In metric group; not started")
+        else:
+            settings = LimitControlSettings.from_options(entry.options)
+            controller = CurrentLimitController(hass, signal, signal_batch, ingest, store, writes, settings)
+            controller.async_start()
+            hass.data[DOMAIN][entry.entry_id]["limit_control"] = controller
 
-        async_dispatcher_send(hass, SIGNAL_MQTT_MESSAGE, topic, payload_dict)
+    watchdog.async_start()
+    load.async_start()
 
-    unsub = await mqtt.async_subscribe(hass, subscribe_topic, _message_received, qos=0)
-    hass.data[DOMAIN][entry.entry_id]["unsub"] = unsub
-    hass.data[DOMAIN][entry.entry_id]["signal"] = SIGNAL_MQTT_MESSAGE
+    with timings.phase("platforms"):
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    with timings.phase("snapshot_replay"):
+        ingest.async_platforms_ready()
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    entry.async_on_unload(entry.add_update_listener(_async_update_listener))
+    timings.finish()
     return True
 
 
+async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Options changed: reload so ingestion picks them up."""
+    await hass.config_entries.async_reload(entry.entry_id)
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
     unsub = data.get("unsub")
     if unsub:
         unsub()
+    direct = data.get("direct")
+    if direct:
+        await direct.async_stop()
+    controller = data.get("limit_control")
+    if controller:
+        controller.async_stop()
+    ingest = data.get("ingest")
+    if ingest:
+        ingest.async_shutdown()
+    writes = data.get("writes")
+    if writes:
+        writes.async_shutdown()
+    watchdog = data.get("watchdog")
+    if watchdog:
+        watchdog.async_stop()
+    load = data.get("load")
+    if load:
+        load.async_stop()
+    snapshot = data.get("snapshot")
+    if snapshot:
+        await snapshot.async_flush()
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     hass.data.get(DOMAIN, {}).pop(entry.entry_id, None)
     return unload_ok
 
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    await ValueSnapshot(hass, entry.entry_id).async_remove()
+    await Topology(hass, entry.entry_id).async_remove()
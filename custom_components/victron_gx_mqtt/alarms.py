@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+from collections.abc import Mapping
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import EVENT_ALARM, VE_BUS_ALARM_LEVELS
+from .datastore import PathValue, parse_code
+from .routes import Route, RouteKind, resolve
+
+
+class AlarmEvents:
+    """Fire EVENT_ALARM on the HA bus for VE.Bus alarm transitions.
+
+    Called by the ingestion path when the parsed value of a
+    ``vebus/<n>/Alarms/...`` path changes, i.e. not for keepalive
+    republishes. The first value of a path only fires when it is not Ok;
+    values restored from the snapshot count as known, so an alarm that was
+    already active before a restart does not fire again. They are seeded
+    (`seed`) before the subscription starts, because live messages can
+    arrive before the snapshot is replayed into the data store.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._entry_id = entry_id
+        self.fired = 0
+        self.last: dict[str, Any] | None = None
+        # path -> level of alarms not Ok (as of the last transition)
+        self._active: dict[str, int] = {}
+        # path -> level from the snapshot, until the first live value of the path
+        self._restored: dict[str, int] = {}
+
+    @callback
+    def seed(self, values: Mapping[str, dict[str, Any]]) -> None:
+        """Alarm levels of the value snapshot (path -> payload), before any live message."""
+        for path, payload in values.items():
+            route = resolve(path)
+            if route is None or route.kind is not RouteKind.VEBUS_ALARM:
+                continue
+            level = parse_code(payload)
+            if level is None:
+                continue
+            self._restored[route.path] = level
+            if level:
+                self._active[route.path] = level
+
+    @callback
+    def handle(self, route: Route, previous: int | None, pv: PathValue) -> None:
+        if self._restored:
+            restored = self._restored.pop(route.path, None)
+            if previous is None:
+                previous = restored
+        level = pv.value
+        if level is None or level == previous or (previous is None and level == 0):
+            return
+        data = {
+            "config_entry_id": self._entry_id,
+            "vebus_instance": route.instance,
+            "alarm": route.key,  # e.g. "LowBattery", "L1/Overload"
+            "path": route.path,
+            "level": VE_BUS_ALARM_LEVELS.get(level, str(level)),
+            "value": level,
+            "previous": VE_BUS_ALARM_LEVELS.get(previous, str(previous)) if previous is not None else None,
+            "payload": pv.payload,
+        }
+        self.hass.bus.async_fire(EVENT_ALARM, data)
+        self.fired += 1
+        self.last = data
+        if level:
+            self._active[route.path] = level
+        else:
+            self._active.pop(route.path, None)
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {"fired": self.fired, "active": dict(self._active), "last": self.last}
@@ -3,10 +3,60 @@ from __future__ import annotations
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.selector import (
+    SelectSelector,
+    SelectSelectorConfig,
+    TextSelector,
+    TextSelectorConfig,
+    TextSelectorType,
+)
 
-from .const import DOMAIN, CONF_NAME, CONF_TOPIC_PREFIX, CONF_PORTAL_ID
+from .const import (
+    DOMAIN,
+    CONF_NAME,
+    CONF_TOPIC_PREFIX,
+    CONF_PORTAL_ID,
+    CONF_BROKER_HOST,
+    CONF_BROKER_PORT,
+    CONF_BROKER_USERNAME,
+    CONF_BROKER_PASSWORD,
+    CONF_BROKER_TLS,
+    CONF_BROKER_VERIFY_SSL,
+    DEFAULT_BROKER_PORT,
+    CONF_BATCH_INTERVAL,
+    DEFAULT_BATCH_INTERVAL,
+    MAX_BATCH_INTERVAL,
+    CONF_TRACE_LATENCY,
+    CONF_SETTINGS_WRITE_BUDGET,
+    DEFAULT_SETTINGS_WRITE_BUDGET,
+    MAX_SETTINGS_WRITE_BUDGET,
+    CONF_METRIC_GROUPS,
+    CONF_HIDDEN_GROUPS,
+    METRIC_GROUPS,
+    CONF_LIMIT_CONTROL,
+    CONF_LIMIT_TARGET_POWER,
+    CONF_LIMIT_GAIN,
+    CONF_LIMIT_MIN_CURRENT,
+    CONF_LIMIT_MAX_CURRENT,
+    CONF_LIMIT_HYSTERESIS,
+    CONF_LIMIT_MIN_INTERVAL,
+    DEFAULT_LIMIT_TARGET_POWER,
+    DEFAULT_LIMIT_GAIN,
+    DEFAULT_LIMIT_MIN_CURRENT,
+    DEFAULT_LIMIT_MAX_CURRENT,
+    DEFAULT_LIMIT_HYSTERESIS,
+    DEFAULT_LIMIT_MIN_INTERVAL,
+    MAX_LIMIT_CURRENT,
+    MAX_LIMIT_MIN_INTERVAL,
+)
+
+_GROUP_SELECTOR = SelectSelector(
+    SelectSelectorConfig(options=list(METRIC_GROUPS), multiple=True, translation_key="metric_group")
+)
+
+_PASSWORD_SELECTOR = TextSelector(TextSelectorConfig(type=TextSelectorType.PASSWORD))
 
 
 def _normalize_prefix(prefix: str) -> str:
@@ -17,6 +67,11 @@ def _normalize_prefix(prefix: str) -> str:
 class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
     VERSION = 1
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> OptionsFlow:
+        return OptionsFlow()
+
     async def async_step_user(self, user_input=None) -> FlowResult:
         errors: dict[str, str] = {}
 
@@ -24,6 +79,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             name = (user_input[CONF_NAME] or "").strip()
             topic_prefix = _normalize_prefix(user_input[CONF_TOPIC_PREFIX])
             portal_id = (user_input[CONF_PORTAL_ID] or "").strip()
+            broker_host = (user_input.get(CONF_BROKER_HOST) or "").strip()
+            broker_port = int(user_input.get(CONF_BROKER_PORT) or DEFAULT_BROKER_PORT)
 
             if not name:
                 errors[CONF_NAME] = "required"
@@ -31,6 +88,8 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 errors[CONF_TOPIC_PREFIX] = "required"
             if not portal_id:
                 errors[CONF_PORTAL_ID] = "required"
+            if not 0 < broker_port < 65536:
+                errors[CONF_BROKER_PORT] = "invalid_port"
 
             if not errors:
                 await self.async_set_unique_id(f"{topic_prefix}:{portal_id}")
@@ -42,6 +101,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                         CONF_NAME: name,
                         CONF_TOPIC_PREFIX: topic_prefix,
                         CONF_PORTAL_ID: portal_id,
+                        CONF_BROKER_HOST: broker_host,
+                        CONF_BROKER_PORT: broker_port,
+                        CONF_BROKER_USERNAME: (user_input.get(CONF_BROKER_USERNAME) or "").strip(),
+                        CONF_BROKER_PASSWORD: user_input.get(CONF_BROKER_PASSWORD) or "",
+                        CONF_BROKER_TLS: bool(user_input.get(CONF_BROKER_TLS)),
+                        CONF_BROKER_VERIFY_SSL: bool(user_input.get(CONF_BROKER_VERIFY_SSL, True)),
                     },
                 )
 
@@ -50,7 +115,90 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 vol.Required(CONF_NAME, default="home"): str,
                 vol.Required(CONF_TOPIC_PREFIX, default="venus-home"): str,
                 vol.Required(CONF_PORTAL_ID): str,
+                # Optional: connect to the GX broker directly instead of via the bridge.
+                vol.Optional(CONF_BROKER_HOST, default=""): str,
+                vol.Optional(CONF_BROKER_PORT, default=DEFAULT_BROKER_PORT): int,
+                vol.Optional(CONF_BROKER_USERNAME, default=""): str,
+                vol.Optional(CONF_BROKER_PASSWORD, default=""): _PASSWORD_SELECTOR,
+                vol.Optional(CONF_BROKER_TLS, default=False): bool,
+                vol.Optional(CONF_BROKER_VERIFY_SSL, default=True): bool,
             }
         )
 
         return self.async_show_form(step_id="user", data_schema=schema, errors=errors)
+
+
+class OptionsFlow(config_entries.OptionsFlow):
+    """Runtime tuning; saving the options reloads the config entry."""
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        errors: dict[str, str] = {}
+        if user_input is not None:
+            min_a = user_input.get(CONF_LIMIT_MIN_CURRENT, DEFAULT_LIMIT_MIN_CURRENT)
+            max_a = user_input.get(CONF_LIMIT_MAX_CURRENT, DEFAULT_LIMIT_MAX_CURRENT)
+            if min_a > max_a:
+                errors[CONF_LIMIT_MAX_CURRENT] = "limit_range"
+            else:
+                return self.async_create_entry(title="", data=user_input)
+
+        options = {**self.config_entry.options, **(user_input or {})}
+        schema = vol.Schema(
+            {
+                # Milliseconds telemetry is collected before it is applied (0 = off).
+                vol.Optional(
+                    CONF_BATCH_INTERVAL,
+                    default=options.get(CONF_BATCH_INTERVAL, DEFAULT_BATCH_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_BATCH_INTERVAL)),
+                # Per-route receipt -> state write latency in diagnostics.
+                vol.Optional(
+                    CONF_TRACE_LATENCY,
+                    default=options.get(CONF_TRACE_LATENCY, False),
+                ): bool,
+                # Max writes per settings/ path and hour (flash wear), 0 = unlimited.
+                vol.Optional(
+                    CONF_SETTINGS_WRITE_BUDGET,
+                    default=options.get(CONF_SETTINGS_WRITE_BUDGET, DEFAULT_SETTINGS_WRITE_BUDGET),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_SETTINGS_WRITE_BUDGET)),
+                # Metric groups to route at all; unselected groups cost nothing on ingestion.
+                vol.Optional(
+                    CONF_METRIC_GROUPS,
+                    default=list(options.get(CONF_METRIC_GROUPS, METRIC_GROUPS)),
+                ): _GROUP_SELECTOR,
+                # Groups whose new entities are created disabled by default.
+                vol.Optional(
+                    CONF_HIDDEN_GROUPS,
+                    default=list(options.get(CONF_HIDDEN_GROUPS, ())),
+                ): _GROUP_SELECTOR,
+                # Closed-loop AC input current limit (peak shaving), off by default.
+                vol.Optional(
+                    CONF_LIMIT_CONTROL,
+                    default=options.get(CONF_LIMIT_CONTROL, False),
+                ): bool,
+                vol.Optional(
+                    CONF_LIMIT_TARGET_POWER,
+                    default=options.get(CONF_LIMIT_TARGET_POWER, DEFAULT_LIMIT_TARGET_POWER),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=100_000)),
+                vol.Optional(
+                    CONF_LIMIT_GAIN,
+                    default=options.get(CONF_LIMIT_GAIN, DEFAULT_LIMIT_GAIN),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.05, max=1.0)),
+                vol.Optional(
+                    CONF_LIMIT_MIN_CURRENT,
+                    default=options.get(CONF_LIMIT_MIN_CURRENT, DEFAULT_LIMIT_MIN_CURRENT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=MAX_LIMIT_CURRENT)),
+                vol.Optional(
+                    CONF_LIMIT_MAX_CURRENT,
+                    default=options.get(CONF_LIMIT_MAX_CURRENT, DEFAULT_LIMIT_MAX_CURRENT),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=MAX_LIMIT_CURRENT)),
+                vol.Optional(
+                    CONF_LIMIT_HYSTERESIS,
+                    default=options.get(CONF_LIMIT_HYSTERESIS, DEFAULT_LIMIT_HYSTERESIS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.0, max=10.0)),
+                vol.Optional(
+                    CONF_LIMIT_MIN_INTERVAL,
+                    default=options.get(CONF_LIMIT_MIN_INTERVAL, DEFAULT_LIMIT_MIN_INTERVAL),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_LIMIT_MIN_INTERVAL)),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=schema, errors=errors)
@@ -19,8 +19,180 @@ CONF_NAME: Final = "name"
 CONF_TOPIC_PREFIX: Final = "topic_prefix"
 CONF_PORTAL_ID: Final = "portal_id"
 
+# Optional direct connection to the GX broker (bypasses HA MQTT + Mosquitto bridge).
+# Empty host = bridge mode via the HA MQTT integration (README Step 1).
+CONF_BROKER_HOST: Final = "broker_host"
+CONF_BROKER_PORT: Final = "broker_port"
+CONF_BROKER_USERNAME: Final = "broker_username"
+CONF_BROKER_PASSWORD: Final = "broker_password"
+# TLS (GX broker port 8883); the GX certificate is self-signed, so verification is optional.
+CONF_BROKER_TLS: Final = "broker_tls"
+CONF_BROKER_VERIFY_SSL: Final = "broker_verify_ssl"
+DEFAULT_BROKER_PORT: Final = 1883
+
 PLATFORMS: Final[list[Platform]] = [Platform.SENSOR, Platform.SELECT, Platform.SWITCH, Platform.NUMBER]
 
+# -----------------------------------------------------------------------------
+# Writes (W/ publish -> N/ echo)
+# -----------------------------------------------------------------------------
+# A write counts as applied once the GX echoes the same path on N/. Without an
+# echo within the timeout, entities roll back their optimistic state.
+WRITE_ACK_TIMEOUT: Final = 5.0  # seconds
+WRITE_LATENCY_BUCKETS_MS: Final[tuple[int, ...]] = (50, 100, 250, 500, 1000, 2500, 5000)
+
+# Flash-wear guard for `settings/` paths (persisted to flash by the GX).
+# Budget (options flow): max writes per path and hour, 0 = unlimited.
+CONF_SETTINGS_WRITE_BUDGET: Final = "settings_write_budget"
+DEFAULT_SETTINGS_WRITE_BUDGET: Final = 0
+MAX_SETTINGS_WRITE_BUDGET: Final = 3600
+# Writes within this distance of the current value are suppressed (path suffix -> tolerance).
+SETTINGS_WRITE_TOLERANCES: Final[tuple[tuple[str, float], ...]] = (
+    ("/MaxChargeVoltage", 0.05),  # V
+    ("/MaxChargeCurrent", 0.5),  # A (entity step is 1 A)
+)
+
+# -----------------------------------------------------------------------------
+# Staleness (availability)
+# -----------------------------------------------------------------------------
+# With the keepalive automation (README Step 2) the GX republishes every path
+# at least every ~20 s. An entity without updates for the expected interval of
+# its path becomes unavailable. Overrides are matched by path prefix.
+STALE_SWEEP_INTERVAL: Final = 5.0  # seconds (one sweep per config entry)
+STALE_AFTER_DEFAULT: Final = 90.0  # seconds
+STALE_AFTER_OVERRIDES: Final[tuple[tuple[str, float], ...]] = (
+    # Settings only change on writes; allow a few missed keepalive republishes.
+    ("settings/", 300.0),
+)
+
+# -----------------------------------------------------------------------------
+# Value snapshot (.storage)
+# -----------------------------------------------------------------------------
+SNAPSHOT_STORAGE_VERSION: Final = 1
+SNAPSHOT_SAVE_DELAY: Final = 300  # seconds between background writes
+
+# Discovered topology (.storage); changes rarely, so save soon after a change.
+TOPOLOGY_STORAGE_VERSION: Final = 1
+TOPOLOGY_SAVE_DELAY: Final = 30  # seconds
+
+# -----------------------------------------------------------------------------
+# Direct broker mode
+# -----------------------------------------------------------------------------
+DIRECT_KEEPALIVE: Final = 60  # MQTT keepalive (seconds)
+DIRECT_RECONNECT_MIN: Final = 1.0  # seconds
+DIRECT_RECONNECT_MAX: Final = 60.0  # seconds
+DIRECT_CONNECT_TIMEOUT: Final = 10.0  # seconds to wait during setup
+# Venus OS stops publishing without R/<portal>/keepalive; in bridge mode the
+# keepalive automation (README Step 2) does this, in direct mode we do.
+DIRECT_VICTRON_KEEPALIVE_INTERVAL: Final = 20  # seconds
+# Only the subtrees this integration consumes (relative to N/<portal_id>/):
+# the core paths plus those of every enabled metric group.
+DIRECT_SUBSCRIPTIONS: Final[tuple[str, ...]] = (
+    "vebus/+/State",
+    "vebus/+/CustomName",
+    "vebus/+/Ac/NumberOfPhases",
+    "vebus/+/Alarms/#",
+    "full_publish_completed",
+)
+DIRECT_GROUP_SUBSCRIPTIONS: Final[dict[str, tuple[str, ...]]] = {
+    "ac_in": ("vebus/+/Ac/ActiveIn/#", "vebus/+/Ac/In/#"),
+    "ac_out": ("vebus/+/Ac/Out/#",),
+    "battery": ("vebus/+/Soc", "vebus/+/Dc/0/#"),
+    "dvcc": (
+        "settings/+/Settings/SystemSetup/MaxChargeVoltage",
+        "settings/+/Settings/SystemSetup/MaxChargeCurrent",
+    ),
+    "mode": ("vebus/+/Mode",),
+}
+
+# -----------------------------------------------------------------------------
+# Initial load
+# -----------------------------------------------------------------------------
+# Newer Venus OS versions publish N/<portal>/full_publish_completed after the
+# keepalive-triggered republish. Older firmware never sends it.
+FULL_PUBLISH_COMPLETED_PATH: Final = "full_publish_completed"
+INITIAL_LOAD_TIMEOUT: Final = 20.0  # seconds after platform setup
+
+# -----------------------------------------------------------------------------
+# Micro-batching (options flow)
+# -----------------------------------------------------------------------------
+# Telemetry is collected for up to this many milliseconds and applied as one
+# batch (latest value per path). 0 disables batching.
+CONF_BATCH_INTERVAL: Final = "batch_interval_ms"
+DEFAULT_BATCH_INTERVAL: Final = 0
+MAX_BATCH_INTERVAL: Final = 200
+
+# Receipt -> handled latency per priority lane (routes.Lane). Control routes
+# bypass batching; updates slower than the budget are counted.
+LANE_LATENCY_BUCKETS_MS: Final[tuple[int, ...]] = (1, 5, 10, 25, 50, 100, 250, 1000)
+CONTROL_LATENCY_BUDGET_MS: Final = 25.0
+
+# Optional per-route latency tracing (options flow); last N samples per route.
+CONF_TRACE_LATENCY: Final = "trace_latency"
+TRACE_SAMPLES: Final = 128
+
+# -----------------------------------------------------------------------------
+# Metric groups (options flow)
+# -----------------------------------------------------------------------------
+# Disabled groups are dropped right after routing (and not subscribed in direct
+# mode); entities of hidden groups are created disabled by default.
+CONF_METRIC_GROUPS: Final = "metric_groups"
+CONF_HIDDEN_GROUPS: Final = "hidden_metric_groups"
+METRIC_GROUPS: Final[tuple[str, ...]] = ("ac_in", "ac_out", "battery", "dvcc", "mode")
+
+# -----------------------------------------------------------------------------
+# Live stream (websocket)
+# -----------------------------------------------------------------------------
+# Per subscription: at most one delta message per throttle interval.
+WS_TYPE_SUBSCRIBE: Final = f"{DOMAIN}/subscribe"
+LIVE_DEFAULT_THROTTLE_MS: Final = 250
+LIVE_MIN_THROTTLE_MS: Final = 50
+LIVE_MAX_THROTTLE_MS: Final = 60_000
+
+# -----------------------------------------------------------------------------
+# AC input current-limit controller (options flow, off by default)
+# -----------------------------------------------------------------------------
+# Peak shaving: keeps AC In power at or below the target by adjusting
+# vebus/<n>/Ac/ActiveIn/CurrentLimit from the live AC In / AC Out power.
+CONF_LIMIT_CONTROL: Final = "limit_control"
+CONF_LIMIT_TARGET_POWER: Final = "limit_target_power_w"
+CONF_LIMIT_GAIN: Final = "limit_gain"
+CONF_LIMIT_MIN_CURRENT: Final = "limit_min_current_a"
+CONF_LIMIT_MAX_CURRENT: Final = "limit_max_current_a"
+CONF_LIMIT_HYSTERESIS: Final = "limit_hysteresis_a"
+CONF_LIMIT_MIN_INTERVAL: Final = "limit_min_interval_s"
+DEFAULT_LIMIT_TARGET_POWER: Final = 3000
+DEFAULT_LIMIT_GAIN: Final = 0.5  # share of the power error corrected per write
+DEFAULT_LIMIT_MIN_CURRENT: Final = 6.0
+DEFAULT_LIMIT_MAX_CURRENT: Final = 16.0
+DEFAULT_LIMIT_HYSTERESIS: Final = 0.5
+DEFAULT_LIMIT_MIN_INTERVAL: Final = 5
+MAX_LIMIT_CURRENT: Final = 100.0
+MAX_LIMIT_MIN_INTERVAL: Final = 3600
+# Used until the VE.Bus reports Ac/ActiveIn/L1/V.
+LIMIT_NOMINAL_VOLTAGE: Final = 230.0
+LIMIT_CURRENT_STEP: Final = 0.1  # A, resolution of the written limit
+
+# -----------------------------------------------------------------------------
+# Load shedding (event-loop lag)
+# -----------------------------------------------------------------------------
+LOOP_LAG_PROBE_INTERVAL: Final = 1.0  # seconds
+LOOP_LAG_DEGRADE: Final = 0.15  # seconds late -> degraded
+LOOP_LAG_RECOVER: Final = 0.05  # seconds late -> counts towards recovery
+LOOP_LAG_RECOVER_PROBES: Final = 5  # consecutive calm probes to recover
+LOOP_LAG_EVENTS: Final = 20  # transitions kept for diagnostics
+# While degraded, telemetry is batched at least this coarsely (seconds).
+DEGRADED_BATCH_INTERVAL: Final = 1.0
+
+# -----------------------------------------------------------------------------
+# Routing
+# -----------------------------------------------------------------------------
+# Resolved routes per distinct path (shared by all entries). A GX publishes a
+# few hundred paths; bridge mode can add the rest of the Venus tree.
+ROUTE_CACHE_SIZE: Final = 4096
+# Per-phase AC paths are routed for up to this many phases until the VE.Bus
+# reports vebus/<n>/Ac/NumberOfPhases.
+VEBUS_MAX_PHASES: Final = 3
+
 # Global fixed naming (project decision)
 VE_BUS_DEVICE_NAME: Final = "VE-Bus"
 
@@ -68,6 +240,19 @@ VE_BUS_STATE_MAP_DE: Final[dict[int, str]] = {
 # Sensor primary value remains English (stable for automations). German is exposed via attributes.
 VE_BUS_STATE_MAP: Final[dict[int, str]] = VE_BUS_STATE_MAP_EN
 
+# -----------------------------------------------------------------------------
+# VE.Bus Alarms (bus events)
+# -----------------------------------------------------------------------------
+# vebus/<n>/Alarms/<Name> and vebus/<n>/Alarms/L<1-3>/<Name>:
+# 0=Ok;1=Warning;2=Alarm. Every transition fires EVENT_ALARM.
+
+EVENT_ALARM: Final = f"{DOMAIN}_alarm"
+VE_BUS_ALARM_LEVELS: Final[dict[int, str]] = {
+    0: "ok",
+    1: "warning",
+    2: "alarm",
+}
+
 # -----------------------------------------------------------------------------
 # VE.Bus Mode (Select)
 # -----------------------------------------------------------------------------
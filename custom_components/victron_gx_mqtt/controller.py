@@ -0,0 +1,258 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable, Mapping
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_connect
+
+from .const import (
+    CONF_LIMIT_GAIN,
+    CONF_LIMIT_HYSTERESIS,
+    CONF_LIMIT_MAX_CURRENT,
+    CONF_LIMIT_MIN_CURRENT,
+    CONF_LIMIT_MIN_INTERVAL,
+    CONF_LIMIT_TARGET_POWER,
+    DEFAULT_LIMIT_GAIN,
+    DEFAULT_LIMIT_HYSTERESIS,
+    DEFAULT_LIMIT_MAX_CURRENT,
+    DEFAULT_LIMIT_MIN_CURRENT,
+    DEFAULT_LIMIT_MIN_INTERVAL,
+    DEFAULT_LIMIT_TARGET_POWER,
+    DOMAIN,
+    LANE_LATENCY_BUCKETS_MS,
+    LIMIT_CURRENT_STEP,
+    LIMIT_NOMINAL_VOLTAGE,
+    VEBUS_MAX_PHASES,
+)
+from .datastore import EntryDataStore, PathValue
+from .ingest import VictronIngest, phase_count
+from .routes import Route, RouteKind
+from .writes import LatencyHistogram, PendingWriteTracker, WriteResult
+
+
+@dataclass(frozen=True, slots=True)
+class LimitControlSettings:
+    target_power: float  # W, AC In power to stay at or below
+    gain: float  # share of the power error corrected per write (0..1]
+    min_current: float  # A per phase
+    max_current: float  # A per phase
+    hysteresis: float  # A, smaller corrections are not written
+    min_interval: float  # seconds between two writes
+
+    @classmethod
+    def from_options(cls, options: Mapping[str, Any]) -> LimitControlSettings:
+        return cls(
+            target_power=float(options.get(CONF_LIMIT_TARGET_POWER, DEFAULT_LIMIT_TARGET_POWER)),
+            gain=float(options.get(CONF_LIMIT_GAIN, DEFAULT_LIMIT_GAIN)),
+            min_current=float(options.get(CONF_LIMIT_MIN_CURRENT, DEFAULT_LIMIT_MIN_CURRENT)),
+            max_current=float(options.get(CONF_LIMIT_MAX_CURRENT, DEFAULT_LIMIT_MAX_CURRENT)),
+            hysteresis=float(options.get(CONF_LIMIT_HYSTERESIS, DEFAULT_LIMIT_HYSTERESIS)),
+            min_interval=float(options.get(CONF_LIMIT_MIN_INTERVAL, DEFAULT_LIMIT_MIN_INTERVAL)),
+        )
+
+
+@dataclass(slots=True, eq=False)
+class _Loop:
+    """Control state of one VE.Bus instance."""
+
+    instance: str
+    grid_path: str  # vebus/<n>/Ac/ActiveIn/P
+    load_path: str  # vebus/<n>/Ac/Out/P
+    limit_path: str  # vebus/<n>/Ac/ActiveIn/CurrentLimit
+    volts_path: str
+    phases_path: str
+    load_at_grid: float | None = None  # AC Out power when the last AC In sample arrived
+    commanded: float | None = None  # limit being written (until echoed or failed)
+    last_write: float | None = None  # time.monotonic() of the last write
+    setpoint: float | None = None  # last computed limit (diagnostics)
+
+
+class CurrentLimitController:
+    """Closed-loop AC input current limit (peak shaving), one loop per VE.Bus instance.
+
+    The controller is a path listener of AC In and AC Out power, so every
+    live sample is evaluated in the ingestion callback as it arrives: no
+    batching, no entity state and no automation round trip. Between two AC
+    In samples a change of AC Out power (load) is applied as feed-forward,
+    the grid following the load until the next AC In sample.
+
+    Per evaluation the limit moves by `gain` times the power error (target -
+    AC In power) converted to amps per phase, clamped to the configured range
+    and rounded to LIMIT_CURRENT_STEP. It is written only if it differs from
+    the current limit by at least the hysteresis and the previous write is at
+    least `min_interval` old; while a write awaits its N/ echo the loop
+    builds on the written value. Only the publish itself leaves the callback
+    (MQTT publishing is a coroutine).
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        signal: str,
+        signal_batch: str,
+        ingest: VictronIngest,
+        store: EntryDataStore,
+        writes: PendingWriteTracker,
+        settings: LimitControlSettings,
+    ) -> None:
+        self.hass = hass
+        self._signal = signal
+        self._signal_batch = signal_batch
+        self._ingest = ingest
+        self._store = store
+        self._writes = writes
+        self._settings = settings
+        self._loops: dict[str, _Loop] = {}
+        # AC In / AC Out power path -> (loop, is AC In)
+        self._paths: dict[str, tuple[_Loop, bool]] = {}
+        self._unsubs: list[Callable[[], None]] = []
+
+        self.stats: dict[str, int] = {
+            "evaluations": 0,
+            "writes": 0,
+            "within_hysteresis": 0,
+            "rate_limited": 0,
+            "clamped": 0,
+            "failed": 0,
+        }
+        # Sample receipt -> W/ published, W/ published -> N/ echo, sample receipt -> echo.
+        self.decision = LatencyHistogram(LANE_LATENCY_BUCKETS_MS)
+        self.actuation = LatencyHistogram()
+        self.round_trip = LatencyHistogram()
+
+    @callback
+    def async_start(self) -> None:
+        """Pick up VE.Bus instances as their current-limit route appears."""
+        self._unsubs.append(async_dispatcher_connect(self.hass, self._signal, self._on_route))
+        self._unsubs.append(async_dispatcher_connect(self.hass, self._signal_batch, self._on_routes))
+
+    @callback
+    def async_stop(self) -> None:
+        for unsub in self._unsubs:
+            unsub()
+        self._unsubs.clear()
+
+    @callback
+    def _on_routes(self, items: list[tuple[Route, PathValue | None]]) -> None:
+        for route, pv in items:
+            self._on_route(route, pv)
+
+    @callback
+    def _on_route(self, route: Route, pv: PathValue | None) -> None:
+        if route.kind is not RouteKind.AC_IN_LIMIT or route.instance in self._loops:
+            return
+        inst = route.instance
+        loop = _Loop(
+            instance=inst,
+            grid_path=f"vebus/{inst}/Ac/ActiveIn/P",
+            load_path=f"vebus/{inst}/Ac/Out/P",
+            limit_path=f"vebus/{inst}/Ac/ActiveIn/CurrentLimit",
+            volts_path=f"vebus/{inst}/Ac/ActiveIn/L1/V",
+            phases_path=f"vebus/{inst}/Ac/NumberOfPhases",
+        )
+        self._loops[inst] = loop
+        self._paths[loop.grid_path] = (loop, True)
+        self._paths[loop.load_path] = (loop, False)
+        self._unsubs.append(
+            self._ingest.async_add_path_listener([loop.grid_path, loop.load_path], self._on_sample)
+        )
+
+    @callback
+    def _on_sample(self, path: str, payload: dict[str, Any]) -> None:
+        """Live AC In / AC Out power sample (already parsed into the store)."""
+        loop, is_grid = self._paths[path]
+        store = self._store
+        if is_grid:
+            loop.load_at_grid = store.value(loop.load_path)
+        sample = store.get(path)
+        if sample is not None and sample.received is not None:
+            self._evaluate(loop, sample.received)
+
+    @callback
+    def _evaluate(self, loop: _Loop, received: float) -> None:
+        store = self._store
+        s = self._settings
+        grid = store.get(loop.grid_path)
+        if grid is None or grid.value is None or grid.received is None:
+            return
+        base = loop.commanded
+        if base is None:
+            limit = store.get(loop.limit_path)
+            if limit is None or limit.value is None or limit.received is None:
+                return  # only live limits: a restored value may be outdated
+            base = limit.value
+        self.stats["evaluations"] += 1
+
+        grid_w = grid.value
+        load_w = store.value(loop.load_path)
+        if load_w is not None and loop.load_at_grid is not None:
+            grid_w += load_w - loop.load_at_grid
+
+        volts = store.value(loop.volts_path)
+        if volts is None or volts < LIMIT_NOMINAL_VOLTAGE / 2:
+            volts = LIMIT_NOMINAL_VOLTAGE  # not reported yet, or grid lost
+        phases = phase_count(store.value(loop.phases_path)) or VEBUS_MAX_PHASES
+
+        wanted = base + s.gain * (s.target_power - grid_w) / (volts * phases)
+        setpoint = min(max(wanted, s.min_current), s.max_current)
+        if setpoint != wanted:
+            self.stats["clamped"] += 1
+        setpoint = round(round(setpoint / LIMIT_CURRENT_STEP) * LIMIT_CURRENT_STEP, 1)
+        loop.setpoint = setpoint
+
+        if setpoint == base or abs(setpoint - base) < s.hysteresis:
+            self.stats["within_hysteresis"] += 1
+            return
+        now = time.monotonic()
+        if loop.last_write is not None and now - loop.last_write < s.min_interval:
+            self.stats["rate_limited"] += 1
+            return
+
+        loop.commanded = setpoint
+        loop.last_write = now
+        self.stats["writes"] += 1
+        self.hass.async_create_background_task(
+            self._async_write(loop, setpoint, received), f"{DOMAIN} current limit {loop.instance}"
+        )
+
+    async def _async_write(self, loop: _Loop, setpoint: float, received: float) -> None:
+        try:
+            echo = await self._writes.async_write(loop.limit_path, setpoint)
+            published = time.monotonic()
+            self.decision.record((published - received) * 1000.0)
+            result = await echo
+        finally:
+            # Superseded writes leave the newer command in place.
+            if loop.commanded == setpoint:
+                loop.commanded = None
+
+        if result is WriteResult.ACKED:
+            done = time.monotonic()
+            self.actuation.record((done - published) * 1000.0)
+            self.round_trip.record((done - received) * 1000.0)
+        elif result is not WriteResult.SUPERSEDED:
+            self.stats["failed"] += 1
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        s = self._settings
+        return {
+            "settings": {
+                "target_power_w": s.target_power,
+                "gain": s.gain,
+                "min_current_a": s.min_current,
+                "max_current_a": s.max_current,
+                "hysteresis_a": s.hysteresis,
+                "min_interval_s": s.min_interval,
+            },
+            "instances": {
+                inst: {"setpoint_a": loop.setpoint, "write_pending": loop.commanded is not None}
+                for inst, loop in self._loops.items()
+            },
+            **self.stats,
+            "decision_latency_ms": self.decision.as_dict(),
+            "actuation_latency_ms": self.actuation.as_dict(),
+            "loop_latency_ms": self.round_trip.as_dict(),
+        }
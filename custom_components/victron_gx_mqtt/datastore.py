@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.core import callback
+
+from .routes import Route, RouteKind
+
+
+def parse_numeric(payload: dict[str, Any], key: str = "value") -> float | None:
+    """Numeric payload field as float (ints, floats and strings with '.' or ',')."""
+    v = payload.get(key)
+    if v is None or isinstance(v, bool):
+        return None
+    if isinstance(v, (int, float)):
+        return float(v)
+    if isinstance(v, str):
+        s = v.strip().replace(",", ".")
+        if not s:
+            return None
+        try:
+            return float(s)
+        except ValueError:
+            return None
+    return None
+
+
+def parse_code(payload: dict[str, Any]) -> int | None:
+    """Integer code (Mode, State, NumberOfPhases); whole floats are accepted."""
+    v = payload.get("value")
+    if isinstance(v, float) and v.is_integer():
+        v = int(v)
+    if isinstance(v, bool) or not isinstance(v, int):
+        return None
+    return v
+
+
+def parse_text(payload: dict[str, Any]) -> str | None:
+    v = payload.get("value")
+    if isinstance(v, str) and v.strip():
+        return v.strip()
+    return None
+
+
+_PARSERS: dict[RouteKind, Callable[[dict[str, Any]], Any]] = {
+    RouteKind.VEBUS_STATE: parse_code,
+    RouteKind.VEBUS_MODE: parse_code,
+    RouteKind.VEBUS_PHASES: parse_code,
+    RouteKind.VEBUS_ALARM: parse_code,
+    RouteKind.VEBUS_CUSTOM_NAME: parse_text,
+    RouteKind.BATTERY: parse_numeric,
+    RouteKind.AC_OUT: parse_numeric,
+    RouteKind.AC_IN: parse_numeric,
+    RouteKind.AC_IN_LIMIT: parse_numeric,
+    RouteKind.DVCC_MAX_CHARGE_VOLTAGE: parse_numeric,
+    RouteKind.DVCC_MAX_CHARGE_CURRENT: parse_numeric,
+}
+
+
+@dataclass(slots=True, eq=False)
+class PathValue:
+    """Latest value of one path, shared by every consumer (treat as read-only)."""
+
+    value: Any  # parsed for the route kind (float / int code / str), None if unparsable
+    payload: dict[str, Any]  # decoded payload (e.g. min/max of settings)
+    raw: Any  # payload as received (None: restored from storage)
+    received: float | None  # time.monotonic() of the last message (None: restored)
+    updates: int  # messages received since setup
+
+
+class EntryDataStore:
+    """Per-entry latest value per path; entities subscribe to their path.
+
+    Ingestion records every message here (`set` / `touch`, O(1)); a payload
+    is parsed once, at receipt, for all consumers. Subscribers are called by
+    `publish`, which the ingestion path invokes when a value is due to be
+    applied (after initial-load buffering and micro-batching), so entity
+    state writes keep their batching. Values can be read at any time without
+    touching the HA state machine.
+    """
+
+    def __init__(self) -> None:
+        self._values: dict[str, PathValue] = {}
+        self._subscribers: dict[str, list[Callable[[PathValue], None]]] = {}
+
+    @property
+    def values(self) -> dict[str, PathValue]:
+        return self._values
+
+    def get(self, path: str) -> PathValue | None:
+        return self._values.get(path)
+
+    def value(self, path: str) -> Any:
+        """Parsed value of `path` (None if unknown or unparsable)."""
+        pv = self._values.get(path)
+        return pv.value if pv is not None else None
+
+    @callback
+    def set(self, route: Route, raw: Any, payload: dict[str, Any], received: float | None) -> PathValue:
+        """Record a new payload for `route` and parse it (received None: restored from storage)."""
+        parser = _PARSERS.get(route.kind)
+        value = parser(payload) if parser is not None else payload.get("value")
+        pv = self._values.get(route.path)
+        if pv is None:
+            pv = self._values[route.path] = PathValue(value, payload, raw, received, 0)
+        else:
+            pv.value = value
+            pv.payload = payload
+            pv.raw = raw
+            pv.received = received
+        if received is not None:
+            pv.updates += 1
+        return pv
+
+    @callback
+    def touch(self, pv: PathValue, received: float) -> None:
+        """Same payload received again (keepalive republish): no parsing."""
+        pv.received = received
+        pv.updates += 1
+
+    @callback
+    def publish(self, path: str) -> None:
+        """Hand the current value of `path` to its subscribers."""
+        subscribers = self._subscribers.get(path)
+        if not subscribers:
+            return
+        pv = self._values.get(path)
+        if pv is None:
+            return
+        for subscriber in subscribers:
+            subscriber(pv)
+
+    @callback
+    def subscribe(self, path: str, subscriber: Callable[[PathValue], None]) -> Callable[[], None]:
+        self._subscribers.setdefault(path, []).append(subscriber)
+
+        @callback
+        def _unsubscribe() -> None:
+            subscribers = self._subscribers.get(path)
+            if subscribers and subscriber in subscribers:
+                subscribers.remove(subscriber)
+                if not subscribers:
+                    del self._subscribers[path]
+
+        return _unsubscribe
+
+    @callback
+    def discard(self, path: str) -> None:
+        self._values.pop(path, None)
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "paths": len(self._values),
+            "subscribed_paths": len(self._subscribers),
+            "subscribers": sum(len(s) for s in self._subscribers.values()),
+            "updates": sum(pv.updates for pv in self._values.values()),
+        }
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    DOMAIN,
+    CONF_BROKER_HOST,
+    CONF_BROKER_PASSWORD,
+    CONF_BROKER_USERNAME,
+    CONF_PORTAL_ID,
+    CONF_TOPIC_PREFIX,
+)
+
+TO_REDACT = {CONF_PORTAL_ID, CONF_BROKER_HOST, CONF_BROKER_USERNAME, CONF_BROKER_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return runtime metrics for a config entry."""
+    data = hass.data.get(DOMAIN, {}).get(entry.entry_id, {})
+
+    diag: dict[str, Any] = {
+        "entry": async_redact_data(dict(entry.data), TO_REDACT),
+    }
+
+    startup = data.get("startup")
+    if startup is not None:
+        diag["startup"] = startup.as_diagnostics()
+
+    router = hass.data.get(DOMAIN, {}).get("routers", {}).get(entry.data[CONF_TOPIC_PREFIX])
+    if router is not None:
+        diag["routing"] = router.as_diagnostics()
+
+    direct = data.get("direct")
+    if direct is not None:
+        diag["direct"] = direct.as_diagnostics()
+
+    ingest = data.get("ingest")
+    if ingest is not None:
+        diag["ingest"] = ingest.as_diagnostics()
+
+    alarms = data.get("alarms")
+    if alarms is not None:
+        diag["alarms"] = alarms.as_diagnostics()
+
+    load = data.get("load")
+    if load is not None:
+        diag["load_shedding"] = load.as_diagnostics()
+
+    writes = data.get("writes")
+    if writes is not None:
+        diag["writes"] = writes.as_diagnostics()
+
+    controller = data.get("limit_control")
+    if controller is not None:
+        diag["limit_control"] = controller.as_diagnostics()
+
+    wear_guard = data.get("wear_guard")
+    if wear_guard is not None:
+        diag["settings_writes"] = wear_guard.as_diagnostics()
+
+    watchdog = data.get("watchdog")
+    if watchdog is not None:
+        diag["staleness"] = watchdog.as_diagnostics()
+
+    store = data.get("store")
+    if store is not None:
+        diag["data_store"] = store.as_diagnostics()
+
+    snapshot = data.get("snapshot")
+    if snapshot is not None:
+        diag["snapshot"] = snapshot.as_diagnostics()
+
+    topology = data.get("topology")
+    if topology is not None:
+        diag["topology"] = topology.as_diagnostics()
+
+    return diag
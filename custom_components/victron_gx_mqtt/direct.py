@@ -0,0 +1,305 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable
+from typing import Any
+
+import paho.mqtt.client as mqtt
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util.ssl import client_context, client_context_no_verify
+
+from .const import DIRECT_KEEPALIVE, DIRECT_RECONNECT_MAX, DIRECT_RECONNECT_MIN
+
+_LOGGER = logging.getLogger(__name__)
+
+# Packets handled per socket read callback before the event loop gets control back.
+_MAX_PACKETS_PER_READ = 500
+
+# Called with (topic, payload) for every received PUBLISH.
+MessageHandler = Callable[[str, bytes], None]
+
+
+class DirectMqttClient:
+    """paho-mqtt client for talking to the GX broker directly.
+
+    Only what this integration needs: a clean session with a fixed set of
+    QoS 0 subscriptions (sent again on every connect), QoS 0 publishes,
+    optional username/password and TLS, and automatic reconnects with
+    backoff. paho is driven from the event loop through its socket callbacks
+    (like HA's MQTT integration), so `on_message` runs in the event loop;
+    only the blocking connect runs in the executor.
+
+    paho's keepalive handling (PINGREQ every keepalive period, connection
+    closed when the broker stays silent) also catches half-open connections.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        host: str,
+        port: int,
+        client_id: str,
+        subscriptions: list[str],
+        on_message: MessageHandler,
+        on_connect: Callable[[], None] | None = None,
+        keepalive: int = DIRECT_KEEPALIVE,
+        username: str | None = None,
+        password: str | None = None,
+        tls: bool = False,
+        verify_ssl: bool = True,
+    ) -> None:
+        self._hass = hass
+        self._host = host
+        self._port = port
+        self._subscriptions = subscriptions
+        self._on_message = on_message
+        self._on_connect = on_connect
+        self._keepalive = keepalive
+
+        client = mqtt.Client(
+            mqtt.CallbackAPIVersion.VERSION2,
+            client_id=client_id,
+            clean_session=True,
+            protocol=mqtt.MQTTv311,
+            reconnect_on_failure=False,
+        )
+        if username:
+            client.username_pw_set(username, password or None)
+        if tls:
+            # The GX ships a self-signed certificate; verify_ssl=False accepts it.
+            client.tls_set_context(client_context() if verify_ssl else client_context_no_verify())
+        client.on_connect = self._mqtt_on_connect
+        client.on_disconnect = self._mqtt_on_disconnect
+        client.on_message = self._mqtt_on_message
+        client.on_subscribe = self._mqtt_on_subscribe
+        # paho opens the socket (and queues CONNECT) inside the executor job.
+        client.on_socket_open = self._on_socket_open
+        client.on_socket_register_write = self._on_socket_register_write
+        client.on_socket_close = self._async_on_socket_close
+        client.on_socket_unregister_write = self._async_on_socket_unregister_write
+        self._client = client
+
+        self._task: asyncio.Task[None] | None = None
+        self._misc_timer: asyncio.TimerHandle | None = None
+        self._connected = asyncio.Event()
+        self._delay = DIRECT_RECONNECT_MIN
+        self._sub_mid: int | None = None
+        self._closing = False
+
+        self.connects = 0
+        self.messages = 0
+        self.handler_errors = 0
+        self.half_open = 0
+        self.rejected_subscriptions: list[str] = []
+
+    @property
+    def connected(self) -> bool:
+        return self._connected.is_set()
+
+    async def async_start(self) -> None:
+        """Start connecting (returns immediately)."""
+        self._closing = False
+        self._client.connect_async(self._host, self._port, self._keepalive)
+        self._schedule_connect(0.0)
+
+    async def async_wait_connected(self, timeout: float) -> bool:
+        try:
+            await asyncio.wait_for(self._connected.wait(), timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    async def async_stop(self) -> None:
+        self._closing = True
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._client.socket() is not None:
+            # Queue DISCONNECT and flush it; paho closes the socket once it is written.
+            self._client.disconnect()
+            self._client.loop_write()
+        self._connected.clear()
+        self._cancel_misc()
+
+    async def async_publish(self, topic: str, payload: str, retain: bool = False) -> None:
+        """QoS 0 publish; silently dropped while disconnected (like HA's MQTT client)."""
+        if not self.connected:
+            _LOGGER.debug("Direct MQTT not connected, dropping publish to %s", topic)
+            return
+        self._client.publish(topic, payload, qos=0, retain=retain)
+
+    # -- connection management ------------------------------------------------
+
+    @callback
+    def _schedule_connect(self, delay: float) -> None:
+        if self._closing or (self._task is not None and not self._task.done()):
+            return
+        self._task = self._hass.async_create_background_task(
+            self._connect_loop(delay), f"victron_gx_mqtt direct {self._host}"
+        )
+
+    async def _connect_loop(self, delay: float) -> None:
+        while not self._closing:
+            if delay:
+                await asyncio.sleep(delay)
+            # Backoff also spans refused CONNACKs; reset on a successful connect.
+            delay = self._delay
+            self._delay = min(self._delay * 2, DIRECT_RECONNECT_MAX)
+            try:
+                result = await self._hass.async_add_executor_job(self._client.reconnect)
+            except OSError as err:
+                _LOGGER.debug("Direct MQTT connection to %s:%s failed: %s", self._host, self._port, err)
+                continue
+            if result == mqtt.MQTT_ERR_SUCCESS:
+                # Socket is open and CONNECT queued; CONNACK arrives via the reader.
+                return
+
+    @callback
+    def _mqtt_on_connect(
+        self,
+        client: mqtt.Client,
+        userdata: Any,
+        flags: mqtt.ConnectFlags,
+        reason_code: mqtt.ReasonCode,
+        properties: mqtt.Properties | None,
+    ) -> None:
+        if reason_code.is_failure:
+            _LOGGER.warning("GX broker at %s:%s refused the connection: %s", self._host, self._port, reason_code)
+            return  # the broker closes the socket; _mqtt_on_disconnect reconnects
+        self._delay = DIRECT_RECONNECT_MIN
+        _, self._sub_mid = client.subscribe([(topic_filter, 0) for topic_filter in self._subscriptions])
+        self.connects += 1
+        self._connected.set()
+        if self._on_connect is not None:
+            self._on_connect()
+        _LOGGER.debug("Direct MQTT connected to %s:%s", self._host, self._port)
+
+    @callback
+    def _mqtt_on_disconnect(
+        self,
+        client: mqtt.Client,
+        userdata: Any,
+        flags: mqtt.DisconnectFlags,
+        reason_code: mqtt.ReasonCode,
+        properties: mqtt.Properties | None,
+    ) -> None:
+        self._connected.clear()
+        if self._closing:
+            return
+        if reason_code == "Keep alive timeout":
+            # Nothing received for a whole keepalive period: half-open connection.
+            self.half_open += 1
+        _LOGGER.debug("Direct MQTT connection to %s:%s lost: %s", self._host, self._port, reason_code)
+        self._schedule_connect(self._delay)
+
+    @callback
+    def _mqtt_on_message(self, client: mqtt.Client, userdata: Any, msg: mqtt.MQTTMessage) -> None:
+        self.messages += 1
+        topic = msg.topic
+        try:
+            self._on_message(topic, msg.payload)
+        except Exception:
+            # One bad message must not end the read loop.
+            self.handler_errors += 1
+            _LOGGER.exception("Error handling direct MQTT message on %s", topic)
+
+    @callback
+    def _mqtt_on_subscribe(
+        self,
+        client: mqtt.Client,
+        userdata: Any,
+        mid: int,
+        reason_codes: list[mqtt.ReasonCode],
+        properties: mqtt.Properties | None,
+    ) -> None:
+        if mid != self._sub_mid:
+            return
+        # Return code 0x80: the broker refused that topic filter.
+        rejected = [f for f, code in zip(self._subscriptions, reason_codes) if code.is_failure]
+        self.rejected_subscriptions = [f.split("/", 2)[-1] for f in rejected]
+        if rejected:
+            _LOGGER.warning(
+                "GX broker at %s:%s refused %d of %d subscriptions: %s",
+                self._host,
+                self._port,
+                len(rejected),
+                len(self._subscriptions),
+                ", ".join(self.rejected_subscriptions),
+            )
+
+    # -- socket callbacks (paho driven by the event loop) ---------------------
+
+    def _on_socket_open(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        self._hass.loop.call_soon_threadsafe(self._async_on_socket_open, client, sock)
+
+    @callback
+    def _async_on_socket_open(self, client: mqtt.Client, sock: Any) -> None:
+        if self._closing:
+            # A connect that was already running in the executor when async_stop cancelled it.
+            client.disconnect()
+            client.loop_write()
+            return
+        if sock.fileno() > -1:
+            self._hass.loop.add_reader(sock, self._async_read, client)
+        if self._misc_timer is None:
+            self._misc_timer = self._hass.loop.call_later(1, self._async_misc, client)
+        # Data may already be buffered; add_reader only fires on the next iteration.
+        self._async_read(client)
+
+    @callback
+    def _async_on_socket_close(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        if sock.fileno() > -1:
+            self._hass.loop.remove_reader(sock)
+            self._hass.loop.remove_writer(sock)
+        self._cancel_misc()
+
+    def _on_socket_register_write(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        # Called from the executor while connecting and from the loop on publish.
+        self._hass.loop.call_soon_threadsafe(self._async_on_socket_register_write, client, sock)
+
+    @callback
+    def _async_on_socket_register_write(self, client: mqtt.Client, sock: Any) -> None:
+        if sock.fileno() > -1:
+            self._hass.loop.add_writer(sock, client.loop_write)
+
+    @callback
+    def _async_on_socket_unregister_write(self, client: mqtt.Client, userdata: Any, sock: Any) -> None:
+        if sock.fileno() > -1:
+            self._hass.loop.remove_writer(sock)
+
+    @callback
+    def _async_read(self, client: mqtt.Client) -> None:
+        # Errors close the socket inside paho, which ends in _mqtt_on_disconnect.
+        client.loop_read(_MAX_PACKETS_PER_READ)
+
+    @callback
+    def _async_misc(self, client: mqtt.Client) -> None:
+        # Keepalive: sends PINGREQ and closes a connection that stays silent.
+        if client.loop_misc() == mqtt.MQTT_ERR_SUCCESS:
+            self._misc_timer = self._hass.loop.call_later(1, self._async_misc, client)
+        else:
+            self._misc_timer = None
+
+    @callback
+    def _cancel_misc(self) -> None:
+        if self._misc_timer is not None:
+            self._misc_timer.cancel()
+            self._misc_timer = None
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "connected": self.connected,
+            "connects": self.connects,
+            "messages": self.messages,
+            "handler_errors": self.handler_errors,
+            "half_open": self.half_open,
+            "rejected_subscriptions": self.rejected_subscriptions,
+            # Relative to N/<portal_id>/: the portal ID must not end up in diagnostics.
+            "subscriptions": [topic_filter.split("/", 2)[-1] for topic_filter in self._subscriptions],
+        }
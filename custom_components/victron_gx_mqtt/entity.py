@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+from abc import abstractmethod
+from collections.abc import Callable, Iterable
+from functools import lru_cache
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import callback
+from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.device_registry import DeviceInfo
+from homeassistant.helpers.entity import Entity
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DOMAIN, HUB_MODEL, HUB_NAME, MANUFACTURER
+from .datastore import EntryDataStore, PathValue
+from .loadshed import LoopLagMonitor
+from .routes import MetricGroup, Route, path_aliases, resolve
+from .topology import Topology
+
+# Platform message handler: (route, current value); creates the entities of a route.
+# Values reach the entities through the data store (`VictronPathEntity.handle_update`).
+MessageHandler = Callable[[Route, "PathValue | None"], None]
+
+
+def known_routes(paths: Iterable[str]) -> list[tuple[Route, None]]:
+    """Create-only batch items for known paths (sorted for a stable entity order)."""
+    return [(route, None) for path in sorted(paths) if (route := resolve(path)) is not None]
+
+
+@lru_cache(maxsize=32)
+def hub_device_info(portal_id: str) -> DeviceInfo:
+    """DeviceInfo of the single Cerbo GX device, shared by all entities of a portal.
+
+    All entities attach to this one device (no separate VE-Bus device), so one
+    instance per portal replaces an identical dict per entity. Treat as read-only.
+    """
+    return DeviceInfo(
+        identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
+        name=HUB_NAME,
+        manufacturer=MANUFACTURER,
+        model=HUB_MODEL,
+    )
+
+
+class VictronPathEntity(Entity):
+    """Mixin for entities backed by a single Victron path (e.g. ``vebus/276/State``).
+
+    The path is relative to ``<prefix>/N/<portal_id>/``. The entity is a
+    subscriber of that path (and its aliases, see `routes.path_aliases`) in
+    the entry's data store (`handle_update`) from creation on, so values
+    applied before it is added are written by HA on add. Entities become
+    unavailable when the per-entry staleness watchdog reports the path stale
+    (tracked under `Route.watch_path`, which its aliases share). Must be
+    listed before the platform entity class so `async_added_to_hass` chains
+    correctly.
+    """
+
+    _entry: ConfigEntry
+    _path: str
+    _unsub_values: list[Callable[[], None]] | None = None
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        watchdog = self.hass.data[DOMAIN][self._entry.entry_id]["watchdog"]
+        # Keyed like the ingest touches it, so updates on any alias keep the entity available.
+        route = resolve(self._path)
+        watch_path = route.watch_path if route is not None else self._path
+        self._attr_available = not watchdog.is_stale(watch_path)
+        self.async_on_remove(watchdog.register(watch_path, self._set_stale))
+
+    async def async_will_remove_from_hass(self) -> None:
+        await super().async_will_remove_from_hass()
+        self.detach()
+
+    @callback
+    def attach(self, store: EntryDataStore) -> None:
+        """Subscribe to this entity's path and its aliases in the data store (at creation)."""
+        self._unsub_values = [store.subscribe(path, self.handle_update) for path in path_aliases(self._path)]
+
+    @callback
+    def detach(self) -> None:
+        if self._unsub_values is not None:
+            for unsub in self._unsub_values:
+                unsub()
+            self._unsub_values = None
+
+    @callback
+    @abstractmethod
+    def handle_update(self, pv: PathValue) -> None:
+        """New value of `self._path` or an alias (parsed for the route kind, see `datastore`)."""
+
+    @callback
+    def async_write_ha_state(self) -> None:
+        # Values applied before the entity is added (batched creation) are
+        # written by HA itself when the entity is added.
+        if self.entity_id is None:
+            return
+        super().async_write_ha_state()
+
+    @callback
+    def _set_stale(self, stale: bool) -> None:
+        self._attr_available = not stale
+        self.async_write_ha_state()
+
+
+class EntityBatcher:
+    """Adds the entities created while handling a batch of messages in one call.
+
+    Outside of `run()` new entities are added immediately (live discovery).
+    Every created entity is subscribed to its path in the data store and the
+    path is recorded in the persisted topology. While the event loop is
+    lagging (`LoopLagMonitor.degraded`) new entities are held back and added
+    in one call once the loop has recovered. Entities of hidden metric groups
+    are registered disabled by default.
+    """
+
+    def __init__(
+        self,
+        async_add_entities: AddEntitiesCallback,
+        topology: Topology,
+        load: LoopLagMonitor,
+        store: EntryDataStore,
+        hidden_groups: frozenset[MetricGroup] = frozenset(),
+    ) -> None:
+        self._async_add_entities = async_add_entities
+        self._topology = topology
+        self._store = store
+        self._load = load
+        self._hidden = hidden_groups
+        self._pending: list[Entity] | None = None
+        self._deferred: list[Entity] = []
+        load.add_listener(self._load_changed)
+
+    @callback
+    def add(self, entity: VictronPathEntity, path: str) -> None:
+        entity.attach(self._store)
+        self._topology.add(path)
+        if self._hidden and (route := resolve(path)) is not None and route.group in self._hidden:
+            entity._attr_entity_registry_enabled_default = False
+        if self._pending is not None:
+            self._pending.append(entity)
+        else:
+            self._add([entity])
+
+    @callback
+    def remove(self, entity: VictronPathEntity) -> None:
+        """Forget an entity whose path no longer exists on the GX (topology and entity registry)."""
+        entity.detach()
+        self._topology.discard(entity.path)
+        for held in (self._pending, self._deferred):
+            if held and entity in held:
+                held.remove(entity)
+                return
+        if entity.registry_entry is not None:
+            er.async_get(entity.hass).async_remove(entity.entity_id)
+        elif entity.platform is not None:
+            entity.hass.async_create_task(entity.async_remove(force_remove=True))
+
+    @callback
+    def run(self, handler: MessageHandler, items: Iterable[tuple[Route, PathValue | None]]) -> None:
+        self._pending = []
+        try:
+            for route, pv in items:
+                handler(route, pv)
+        finally:
+            pending, self._pending = self._pending, None
+            if pending:
+                self._add(pending)
+
+    @callback
+    def _add(self, entities: list[Entity]) -> None:
+        if self._load.degraded:
+            self._deferred.extend(entities)
+        else:
+            self._async_add_entities(entities)
+
+    @callback
+    def _load_changed(self, degraded: bool) -> None:
+        if not degraded and self._deferred:
+            deferred, self._deferred = self._deferred, []
+            self._async_add_entities(deferred)
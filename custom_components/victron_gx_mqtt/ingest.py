@@ -0,0 +1,376 @@
+from __future__ import annotations
+
+import json
+import time
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+
+from .const import (
+    CONTROL_LATENCY_BUDGET_MS,
+    DEGRADED_BATCH_INTERVAL,
+    FULL_PUBLISH_COMPLETED_PATH,
+    INITIAL_LOAD_TIMEOUT,
+    LANE_LATENCY_BUCKETS_MS,
+    VEBUS_MAX_PHASES,
+)
+from .alarms import AlarmEvents
+from .datastore import EntryDataStore
+from .routes import Lane, MetricGroup, Route, RouteKind, cache_diagnostics, resolve
+from .snapshot import ValueSnapshot
+from .tracing import LatencyTracer
+from .watchdog import StalenessWatchdog
+from .writes import LatencyHistogram, PendingWriteTracker
+
+
+class VictronIngest:
+    """Per-entry ingestion path: decode N/ payloads into the data store and fan them out.
+
+    Every message is recorded in the entry's `EntryDataStore` at receipt
+    (parsed once). Applying a value means: the platforms are asked to create
+    the entities of a route the first time it is applied (dispatcher), then
+    the store hands the value to its subscribers (the entities).
+
+    Until Venus OS reports ``full_publish_completed`` (or INITIAL_LOAD_TIMEOUT
+    passes on firmware without the marker) messages are only buffered, keeping
+    the latest payload per path. The buffer is then sent to the platforms as
+    one batch, so all new entities are added with a single
+    `async_add_entities` call per platform and every entity gets exactly one
+    initial state write. Afterwards messages are dispatched one by one.
+
+    With micro-batching enabled (option, or while the event loop is lagging,
+    see `set_degraded`) telemetry is collected per route and sent as one
+    batch per interval: intermediate samples are dropped and every entity
+    gets at most one state write per batch. Control-lane routes (Mode, State,
+    current limit, DVCC) are never batched.
+
+    Routes of metric groups disabled in the options are dropped right after
+    the (cached) route lookup, before any decoding, snapshot or dispatch.
+    The same applies to per-phase AC paths above the phase count the VE.Bus
+    reports (vebus/<n>/Ac/NumberOfPhases), e.g. stray L2/L3 topics on a
+    single-phase system.
+
+    Path listeners (websocket live stream) get every decoded message of
+    their paths directly, independent of initial-load buffering and batching.
+    Changes of VE.Bus alarm paths are handed to `AlarmEvents` the same way,
+    right after parsing, so alarm events are never delayed by either.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        signal: str,
+        signal_batch: str,
+        watchdog: StalenessWatchdog,
+        writes: PendingWriteTracker,
+        snapshot: ValueSnapshot,
+        store: EntryDataStore,
+        batch_interval: float = 0.0,
+        tracer: LatencyTracer | None = None,
+        disabled_groups: frozenset[MetricGroup] = frozenset(),
+        alarms: AlarmEvents | None = None,
+    ) -> None:
+        self.hass = hass
+        self._signal = signal
+        self._signal_batch = signal_batch
+        self._watchdog = watchdog
+        self._writes = writes
+        self._snapshot = snapshot
+        self._store = store
+        self._tracer = tracer
+        self._disabled = disabled_groups
+        self._alarms = alarms
+        # VE.Bus instance -> reported phase count (VEBUS_MAX_PHASES until known).
+        self._phases: dict[str, int] = {}
+        # path -> raw value listeners (live stream), called for every decoded message.
+        self._path_listeners: dict[str, list[Callable[[str, dict[str, Any]], None]]] = {}
+
+        # Routes the platforms have already handled (entities exist); later values
+        # go to the store subscribers only. NumberOfPhases is handled on every change.
+        self._provisioned: set[Route] = set()
+        # Routes received in the initial-load phase (insertion ordered); None afterwards.
+        self._initial: dict[Route, None] | None = {}
+        self._platforms_ready = False
+        self._marker_seen = False
+        self._timeout: Any = None
+        self._started = time.monotonic()
+
+        self.initial_load: dict[str, Any] = {"phase": "buffering"}
+
+        # Routes collected for the next micro-batch (telemetry lane only).
+        # `_interval` is the configured interval, raised while the loop is lagging.
+        self._batch_interval = batch_interval
+        self._interval = batch_interval
+        self._batch: dict[Route, None] = {}
+        self._flush: Any = None
+        self._batch_started = 0.0
+        self.batch_stats: dict[str, int] = {"batches": 0, "messages": 0, "applied": 0, "max_batch": 0}
+
+        # Receipt -> handled latency per lane (telemetry batches: oldest message).
+        self._lanes = {lane: LatencyHistogram(LANE_LATENCY_BUCKETS_MS) for lane in Lane}
+        self._control_over_budget = 0
+
+    @callback
+    def handle_message(self, topic: str, path: str, payload_raw: Any) -> None:
+        """Entry point for every N/ message of this GX (hot path)."""
+        received = time.monotonic()
+        if path == FULL_PUBLISH_COMPLETED_PATH:
+            self._marker_seen = True
+            self._finish_initial_load("marker")
+            return
+
+        # Paths no platform consumes (or of a disabled group) are dropped before any decoding.
+        route = resolve(path)
+        if route is None or route.group in self._disabled:
+            return
+        if route.phase and route.phase > self._phases.get(route.instance, VEBUS_MAX_PHASES):
+            return
+        tracer = self._tracer
+        routed = time.monotonic() if tracer is not None else received
+
+        # The GX republishes unchanged values on every keepalive: the stored
+        # value is reused (no decoding or parsing) when the raw payload is identical.
+        path = route.path
+        store = self._store
+        pv = store.get(path)
+        if pv is not None and pv.raw == payload_raw:
+            store.touch(pv, received)
+        else:
+            payload_dict = _decode(payload_raw)
+            if payload_dict is None:
+                return
+            previous = pv.value if pv is not None else None
+            pv = store.set(route, payload_raw, payload_dict, received)
+            if route.kind is RouteKind.VEBUS_ALARM and self._alarms is not None:
+                self._alarms.handle(route, previous, pv)
+        decoded = time.monotonic() if tracer is not None else received
+
+        payload_dict = pv.payload
+        self._watchdog.touch(route.watch_path)
+        self._writes.handle_echo(path, payload_dict)
+        self._snapshot.update(path, payload_dict)
+        if self._path_listeners and (listeners := self._path_listeners.get(path)):
+            for listener in listeners:
+                listener(path, payload_dict)
+        if route.kind is RouteKind.VEBUS_PHASES:
+            self._set_phase_count(route.instance, pv.value)
+
+        if self._initial is not None:
+            self._initial[route] = None
+            return
+
+        if self._interval and route.lane is Lane.TELEMETRY:
+            self.batch_stats["messages"] += 1
+            self._batch[route] = None
+            if tracer is not None:
+                tracer.hold(route, received, routed, decoded)
+            if self._flush is None:
+                self._batch_started = received
+                self._flush = self.hass.loop.call_later(self._interval, self._flush_batch)
+            return
+
+        dispatched = time.monotonic() if tracer is not None else received
+        self._apply(route)
+
+        done = time.monotonic()
+        if tracer is not None:
+            tracer.record(route, received, routed, decoded, dispatched, done)
+        ms = (done - received) * 1000.0
+        self._lanes[route.lane].record(ms)
+        if route.lane is Lane.CONTROL and ms > CONTROL_LATENCY_BUDGET_MS:
+            self._control_over_budget += 1
+
+    @callback
+    def _apply(self, route: Route) -> None:
+        """Create the entities of a new route (platforms), then hand its value to the subscribers."""
+        if route not in self._provisioned:
+            async_dispatcher_send(self.hass, self._signal, route, self._store.get(route.path))
+            if route.kind is not RouteKind.VEBUS_PHASES:
+                self._provisioned.add(route)
+        self._store.publish(route.path)
+
+    @callback
+    def _apply_batch(self, routes: list[Route]) -> None:
+        """Like `_apply` for many routes: one platform dispatch (one entity add per platform)."""
+        store = self._store
+        new = [(route, store.get(route.path)) for route in routes if route not in self._provisioned]
+        if new:
+            async_dispatcher_send(self.hass, self._signal_batch, new)
+            self._provisioned.update(route for route, _ in new if route.kind is not RouteKind.VEBUS_PHASES)
+        for route in routes:
+            store.publish(route.path)
+
+    @callback
+    def _flush_batch(self) -> None:
+        self._flush = None
+        routes = list(self._batch)
+        self._batch.clear()
+
+        stats = self.batch_stats
+        stats["batches"] += 1
+        stats["applied"] += len(routes)
+        stats["max_batch"] = max(stats["max_batch"], len(routes))
+
+        dispatched = time.monotonic()
+        self._apply_batch(routes)
+
+        done = time.monotonic()
+        if self._tracer is not None:
+            self._tracer.release(dispatched, done)
+        self._lanes[Lane.TELEMETRY].record((done - self._batch_started) * 1000.0)
+
+    @callback
+    def async_add_path_listener(
+        self, paths: list[str], listener: Callable[[str, dict[str, Any]], None]
+    ) -> Callable[[], None]:
+        """Call `listener(path, payload)` for every message on `paths` (not batched or buffered)."""
+        for path in paths:
+            self._path_listeners.setdefault(path, []).append(listener)
+
+        @callback
+        def _remove() -> None:
+            for path in paths:
+                listeners = self._path_listeners.get(path)
+                if listeners and listener in listeners:
+                    listeners.remove(listener)
+                    if not listeners:
+                        del self._path_listeners[path]
+
+        return _remove
+
+    @callback
+    def _set_phase_count(self, instance: str, value: Any) -> None:
+        """Stop routing phases above the reported count and drop what is held for them.
+
+        The sensor platform removes the entities of those phases when it
+        handles the same route.
+        """
+        count = phase_count(value)
+        if count is None or self._phases.get(instance) == count:
+            return
+        self._phases[instance] = count
+
+        def _gone(route: Route) -> bool:
+            return route.instance == instance and route.phase > count
+
+        for held in (self._batch, self._initial):
+            if held:
+                for route in [r for r in held if _gone(r)]:
+                    del held[route]
+        self._provisioned = {r for r in self._provisioned if not _gone(r)}
+        for values in (self._store.values, self._snapshot.values):
+            for path in [p for p in values if (r := resolve(p)) is not None and _gone(r)]:
+                self._store.discard(path)
+                self._snapshot.discard(path)
+
+    @callback
+    def set_degraded(self, degraded: bool) -> None:
+        """Loop lag transition: coarsen telemetry batching (dropping intermediate samples) or restore it."""
+        if degraded:
+            self._interval = max(self._batch_interval, DEGRADED_BATCH_INTERVAL)
+            return
+        self._interval = self._batch_interval
+        if not self._interval and self._flush is not None:
+            self._flush.cancel()
+            self._flush_batch()
+
+    @callback
+    def async_platforms_ready(self) -> None:
+        """Platforms are set up: replay the snapshot and arm the initial-load timeout."""
+        self._platforms_ready = True
+
+        self._snapshot.async_replay(self._replay)
+
+        if self._marker_seen:
+            self._finish_initial_load("marker")
+        elif self._initial is not None:
+            self._timeout = self.hass.loop.call_later(
+                INITIAL_LOAD_TIMEOUT, self._finish_initial_load, "timeout"
+            )
+
+    @callback
+    def _replay(self, items: list[tuple[str, dict[str, Any]]]) -> None:
+        """Restored values go into the data store (unless a live value is already there) and are applied."""
+        store = self._store
+        routes: list[Route] = []
+        for path, payload in items:
+            route = resolve(path)
+            if route is None or route.group in self._disabled:
+                continue
+            if store.get(route.path) is None:
+                store.set(route, None, payload, None)
+            routes.append(route)
+        self._apply_batch(routes)
+
+    @callback
+    def _finish_initial_load(self, reason: str) -> None:
+        if self._initial is None or not self._platforms_ready:
+            return
+        if self._timeout is not None:
+            self._timeout.cancel()
+            self._timeout = None
+
+        routes = list(self._initial)
+        self._initial = None
+        self._apply_batch(routes)
+
+        self.initial_load = {
+            "phase": "incremental",
+            "completed_by": reason,
+            "buffered_paths": len(routes),
+            "duration_ms": round((time.monotonic() - self._started) * 1000.0, 1),
+        }
+
+    @callback
+    def async_shutdown(self) -> None:
+        if self._timeout is not None:
+            self._timeout.cancel()
+            self._timeout = None
+        if self._flush is not None:
+            self._flush.cancel()
+            self._flush = None
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        initial = dict(self.initial_load)
+        if self._initial is not None:
+            initial["buffered_paths"] = len(self._initial)
+        batching: dict[str, Any] = {
+            "interval_ms": round(self._batch_interval * 1000.0),
+            "effective_interval_ms": round(self._interval * 1000.0),
+            **self.batch_stats,
+        }
+        lanes = {lane.value: hist.as_dict() for lane, hist in self._lanes.items()}
+        lanes[Lane.CONTROL]["budget_ms"] = CONTROL_LATENCY_BUDGET_MS
+        lanes[Lane.CONTROL]["over_budget"] = self._control_over_budget
+        diag: dict[str, Any] = {
+            "initial_load": initial,
+            "batching": batching,
+            "lanes": lanes,
+            "route_cache": cache_diagnostics(),
+            "disabled_groups": sorted(self._disabled),
+            "phases": dict(self._phases),
+            "provisioned_routes": len(self._provisioned),
+            "live_listeners": sum(len(listeners) for listeners in self._path_listeners.values()),
+        }
+        if self._tracer is not None:
+            diag["tracing"] = self._tracer.as_diagnostics()
+        return diag
+
+
+def phase_count(value: Any) -> int | None:
+    """Parsed vebus/<n>/Ac/NumberOfPhases value if it is a valid phase count."""
+    return value if isinstance(value, int) and 1 <= value <= VEBUS_MAX_PHASES else None
+
+
+def _decode(payload_raw: Any) -> dict[str, Any] | None:
+    try:
+        if isinstance(payload_raw, (bytes, bytearray)):
+            payload_raw = payload_raw.decode("utf-8", errors="ignore")
+        if isinstance(payload_raw, str) and payload_raw.strip():
+            payload = json.loads(payload_raw)
+            return payload if isinstance(payload, dict) else None
+    except Exception:
+        pass
+    return None
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+from collections import deque
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    LOOP_LAG_DEGRADE,
+    LOOP_LAG_EVENTS,
+    LOOP_LAG_PROBE_INTERVAL,
+    LOOP_LAG_RECOVER,
+    LOOP_LAG_RECOVER_PROBES,
+)
+
+
+class LoopLagMonitor:
+    """Per-entry event-loop lag probe with degraded/normal hysteresis.
+
+    A timer is scheduled every LOOP_LAG_PROBE_INTERVAL; how late it fires is
+    the loop lag. One probe above LOOP_LAG_DEGRADE switches to degraded,
+    LOOP_LAG_RECOVER_PROBES consecutive probes below LOOP_LAG_RECOVER switch
+    back. Listeners are called with the new state on every transition.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self.hass = hass
+        self.degraded = False
+        self._listeners: list[Callable[[bool], None]] = []
+        self._handle: Any = None
+        self._expected = 0.0
+        self._calm = 0
+
+        self.max_lag_ms = 0.0
+        self.transitions = 0
+        self.events: deque[dict[str, Any]] = deque(maxlen=LOOP_LAG_EVENTS)
+
+    @callback
+    def add_listener(self, listener: Callable[[bool], None]) -> None:
+        """Listen for degraded/normal transitions (dropped on `async_stop`)."""
+        self._listeners.append(listener)
+
+    @callback
+    def async_start(self) -> None:
+        self._schedule()
+
+    @callback
+    def async_stop(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+        self._listeners.clear()
+
+    @callback
+    def _schedule(self) -> None:
+        loop = self.hass.loop
+        self._expected = loop.time() + LOOP_LAG_PROBE_INTERVAL
+        self._handle = loop.call_at(self._expected, self._probe)
+
+    @callback
+    def _probe(self) -> None:
+        lag = max(0.0, self.hass.loop.time() - self._expected)
+        self.max_lag_ms = max(self.max_lag_ms, lag * 1000.0)
+
+        if not self.degraded:
+            if lag > LOOP_LAG_DEGRADE:
+                self._set_degraded(True, lag)
+        elif lag < LOOP_LAG_RECOVER:
+            self._calm += 1
+            if self._calm >= LOOP_LAG_RECOVER_PROBES:
+                self._set_degraded(False, lag)
+        else:
+            self._calm = 0
+
+        self._schedule()
+
+    @callback
+    def _set_degraded(self, degraded: bool, lag: float) -> None:
+        self.degraded = degraded
+        self._calm = 0
+        self.transitions += 1
+        self.events.append(
+            {
+                "at": dt_util.utcnow().isoformat(),
+                "state": "degraded" if degraded else "normal",
+                "lag_ms": round(lag * 1000.0, 1),
+            }
+        )
+        for listener in list(self._listeners):
+            listener(degraded)
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "degraded": self.degraded,
+            "max_lag_ms": round(self.max_lag_ms, 1),
+            "transitions": self.transitions,
+            "events": list(self.events),
+        }
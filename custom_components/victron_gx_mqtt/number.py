@@ -1,50 +1,26 @@
 from __future__ import annotations
 
-import json
-import re
+import logging
+import time
 from typing import Any
 
-from homeassistant.components.mqtt import async_publish
 from homeassistant.components.number import NumberEntity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import UnitOfElectricCurrent, UnitOfElectricPotential, STATE_UNKNOWN, STATE_UNAVAILABLE, UnitOfElectricPotential, STATE_UNKNOWN, STATE_UNAVAILABLE
+from homeassistant.const import STATE_UNAVAILABLE, STATE_UNKNOWN, UnitOfElectricCurrent, UnitOfElectricPotential
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.restore_state import RestoreEntity
 
-from .const import DOMAIN, HUB_MODEL, HUB_NAME, MANUFACTURER
-
-_VEBUS_AC_IN_LIMIT_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/Ac/(?P<sub>(?:ActiveIn|In))/CurrentLimit$"
-)
-
-_DVCC_MAX_CHARGE_VOLTAGE_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/settings/(?P<sid>\d+)/Settings/SystemSetup/MaxChargeVoltage$"
-)
-_DVCC_MAX_CHARGE_CURRENT_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/settings/(?P<sid>\d+)/Settings/SystemSetup/MaxChargeCurrent$"
-)
-
-
-def _parse_numeric(payload: dict[str, Any], key: str = "value") -> float | None:
-    v = payload.get(key)
-    if v is None or isinstance(v, bool):
-        return None
-    if isinstance(v, (int, float)):
-        return float(v)
-    if isinstance(v, str):
-        s = v.strip().replace(",", ".")
-        if not s:
-            return None
-        try:
-            return float(s)
-        except ValueError:
-            return None
-    return None
+from .const import DOMAIN
+from .datastore import PathValue, parse_numeric
+from .entity import EntityBatcher, VictronPathEntity, hub_device_info, known_routes
+from .routes import MetricGroup, Route, RouteKind
+from .writes import GuardDecision, normalize_write
+
+_LOGGER = logging.getLogger(__name__)
 
 
-class _VictronRestoreNumber(NumberEntity, RestoreEntity):
+class _VictronRestoreNumber(VictronPathEntity, NumberEntity, RestoreEntity):
     """Number entity that restores last known value if broker does not publish retained values."""
 
     async def async_added_to_hass(self) -> None:
@@ -60,6 +36,46 @@ class _VictronRestoreNumber(NumberEntity, RestoreEntity):
         except (ValueError, TypeError):
             return
 
+    async def _async_write(self, path: str, value: float | int) -> None:
+        """Publish a W/ write, update optimistically and roll back if the GX does not echo it."""
+        previous = self._attr_native_value
+        data = self.hass.data[DOMAIN][self._entry.entry_id]
+
+        # settings/ paths are persisted to flash by the GX: skip no-op writes, enforce the budget.
+        guard = data["wear_guard"]
+        if guard.applies(path):
+            # Compare with the value the GX reported, not the (optimistic/restored) entity state.
+            decision = guard.check(path, value, data["store"].value(path))
+            if decision is not GuardDecision.ALLOWED:
+                if decision is GuardDecision.BLOCKED:
+                    _LOGGER.warning("Write to %s blocked: hourly write budget exhausted", path)
+                self.async_write_ha_state()
+                return
+
+        # Optimistic update before publishing: an echo that arrives while the
+        # publish is in progress reaches the entity through the store and wins.
+        self._attr_native_value = value
+        self.async_write_ha_state()
+
+        writes = data["writes"]
+        try:
+            await writes.async_write(path, value, on_timeout=lambda: self._rollback_value(previous))
+        except BaseException:
+            self._rollback_value(previous)
+            raise
+
+    @callback
+    def _rollback_value(self, previous: float | int | None) -> None:
+        self._attr_native_value = previous
+        self.async_write_ha_state()
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        guard = self.hass.data[DOMAIN][self._entry.entry_id]["wear_guard"]
+        if not guard.applies(self._path):
+            return None
+        return guard.stats(self._path)
+
 
 class VictronVeBusAcInCurrentLimit(_VictronRestoreNumber):
     _attr_has_entity_name = False
@@ -77,13 +93,9 @@ class VictronVeBusAcInCurrentLimit(_VictronRestoreNumber):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._instance = vebus_instance
+        self._path = f"vebus/{vebus_instance}/Ac/ActiveIn/CurrentLimit"
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         self._attr_name = "VE-Bus AC In Current Limit"
         self._attr_unique_id = f"{portal_id}_vebus_{vebus_instance}_ac_in_current_limit"
@@ -91,15 +103,16 @@ class VictronVeBusAcInCurrentLimit(_VictronRestoreNumber):
         self._attr_native_unit_of_measurement = UnitOfElectricCurrent.AMPERE
         self._attr_native_step = 0.1
 
-    def handle_payload(self, payload: dict[str, Any]) -> None:
-        val = _parse_numeric(payload, "value")
+    @callback
+    def handle_update(self, pv: PathValue) -> None:
+        val = pv.value
         if val is None:
             return
 
         self._attr_native_value = val
 
-        mn = _parse_numeric(payload, "min")
-        mx = _parse_numeric(payload, "max")
+        mn = parse_numeric(pv.payload, "min")
+        mx = parse_numeric(pv.payload, "max")
         if mn is not None:
             self._attr_native_min_value = mn
         if mx is not None:
@@ -108,9 +121,9 @@ class VictronVeBusAcInCurrentLimit(_VictronRestoreNumber):
         self.async_write_ha_state()
 
     async def async_set_native_value(self, value: float) -> None:
-        prefix = self._entry.data["topic_prefix"]
-        topic = f"{prefix}/W/{self._portal}/vebus/{self._instance}/Ac/ActiveIn/CurrentLimit"
-        await async_publish(self.hass, topic, json.dumps({"value": value}), qos=0, retain=False)
+        await self._async_write(
+            f"vebus/{self._instance}/Ac/ActiveIn/CurrentLimit", normalize_write(RouteKind.AC_IN_LIMIT, value)
+        )
 
 
 
@@ -123,13 +136,9 @@ class VictronDvccMaxChargeVoltage(_VictronRestoreNumber):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._sid = settings_id
+        self._path = f"settings/{settings_id}/Settings/SystemSetup/MaxChargeVoltage"
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         self._attr_name = "VE-Bus Battery DVCC Max Charge Voltage"
         self._attr_unique_id = f"{portal_id}_settings_{settings_id}_dvcc_max_charge_voltage"
@@ -138,14 +147,15 @@ class VictronDvccMaxChargeVoltage(_VictronRestoreNumber):
         self._attr_native_step = 0.01
         self._attr_suggested_display_precision = 2
 
-    def handle_payload(self, payload: dict[str, Any]) -> None:
-        val = _parse_numeric(payload, "value")
+    @callback
+    def handle_update(self, pv: PathValue) -> None:
+        val = pv.value
         if val is None:
             return
         self._attr_native_value = round(val, 2)
 
-        mn = _parse_numeric(payload, "min")
-        mx = _parse_numeric(payload, "max")
+        mn = parse_numeric(pv.payload, "min")
+        mx = parse_numeric(pv.payload, "max")
         if mn is not None:
             self._attr_native_min_value = mn
         if mx is not None:
@@ -154,9 +164,10 @@ class VictronDvccMaxChargeVoltage(_VictronRestoreNumber):
         self.async_write_ha_state()
 
     async def async_set_native_value(self, value: float) -> None:
-        prefix = self._entry.data["topic_prefix"]
-        topic = f"{prefix}/W/{self._portal}/settings/{self._sid}/Settings/SystemSetup/MaxChargeVoltage"
-        await async_publish(self.hass, topic, json.dumps({"value": round(float(value), 2)}), qos=0, retain=False)
+        await self._async_write(
+            f"settings/{self._sid}/Settings/SystemSetup/MaxChargeVoltage",
+            normalize_write(RouteKind.DVCC_MAX_CHARGE_VOLTAGE, value),
+        )
 
 
 class VictronDvccMaxChargeCurrent(_VictronRestoreNumber):
@@ -168,13 +179,9 @@ class VictronDvccMaxChargeCurrent(_VictronRestoreNumber):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._sid = settings_id
+        self._path = f"settings/{settings_id}/Settings/SystemSetup/MaxChargeCurrent"
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         self._attr_name = "VE-Bus Battery DVCC Max Charge Current"
         self._attr_unique_id = f"{portal_id}_settings_{settings_id}_dvcc_max_charge_current"
@@ -183,14 +190,15 @@ class VictronDvccMaxChargeCurrent(_VictronRestoreNumber):
         self._attr_native_step = 1
         self._attr_suggested_display_precision = 0
 
-    def handle_payload(self, payload: dict[str, Any]) -> None:
-        val = _parse_numeric(payload, "value")
+    @callback
+    def handle_update(self, pv: PathValue) -> None:
+        val = pv.value
         if val is None:
             return
         self._attr_native_value = int(round(val))
 
-        mn = _parse_numeric(payload, "min")
-        mx = _parse_numeric(payload, "max")
+        mn = parse_numeric(pv.payload, "min")
+        mx = parse_numeric(pv.payload, "max")
         if mn is not None:
             self._attr_native_min_value = mn
         if mx is not None:
@@ -199,75 +207,65 @@ class VictronDvccMaxChargeCurrent(_VictronRestoreNumber):
         self.async_write_ha_state()
 
     async def async_set_native_value(self, value: float) -> None:
-        prefix = self._entry.data["topic_prefix"]
-        topic = f"{prefix}/W/{self._portal}/settings/{self._sid}/Settings/SystemSetup/MaxChargeCurrent"
-        await async_publish(self.hass, topic, json.dumps({"value": int(round(float(value)))}), qos=0, retain=False)
+        await self._async_write(
+            f"settings/{self._sid}/Settings/SystemSetup/MaxChargeCurrent",
+            normalize_write(RouteKind.DVCC_MAX_CHARGE_CURRENT, value),
+        )
 
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry, async_add_entities) -> None:
+    started = time.perf_counter()
     cfg_name = entry.data.get("name") or entry.title
     cfg_slug = (cfg_name or "victron").strip().lower().replace(" ", "_").replace("-", "_")
 
     portal = entry.data["portal_id"]
-    prefix = entry.data["topic_prefix"]
     signal = hass.data[DOMAIN][entry.entry_id]["signal"]
+    signal_batch = hass.data[DOMAIN][entry.entry_id]["signal_batch"]
+
+    topology = hass.data[DOMAIN][entry.entry_id]["topology"]
+    load = hass.data[DOMAIN][entry.entry_id]["load"]
+    data_store = hass.data[DOMAIN][entry.entry_id]["store"]
 
     runtime = hass.data[DOMAIN][entry.entry_id].setdefault("runtime_number", {"entities": {}})
 
-    # Create DVCC entities proactively (settings id 0) so they are visible even if the broker
-    # does not publish retained values on startup.
-    sid0 = "0"
-    if ("dvcc_v", sid0) not in runtime["entities"]:
-        ent_v = VictronDvccMaxChargeVoltage(hass, entry, cfg_slug, portal, sid0)
-        runtime["entities"][("dvcc_v", sid0)] = ent_v
-        async_add_entities([ent_v])
-    if ("dvcc_a", sid0) not in runtime["entities"]:
-        ent_a = VictronDvccMaxChargeCurrent(hass, entry, cfg_slug, portal, sid0)
-        runtime["entities"][("dvcc_a", sid0)] = ent_a
-        async_add_entities([ent_a])
+    # Entities are added in batches: known paths at setup, buffered initial load later.
+    hidden = hass.data[DOMAIN][entry.entry_id]["hidden_groups"]
+    batcher = EntityBatcher(async_add_entities, topology, load, data_store, hidden)
 
+    # Route kind -> (runtime key prefix, entity class)
+    kinds = {
+        RouteKind.AC_IN_LIMIT: ("ac_in_limit", VictronVeBusAcInCurrentLimit),  # VE.Bus AC In Current Limit
+        RouteKind.DVCC_MAX_CHARGE_VOLTAGE: ("dvcc_v", VictronDvccMaxChargeVoltage),  # DVCC (settings)
+        RouteKind.DVCC_MAX_CHARGE_CURRENT: ("dvcc_a", VictronDvccMaxChargeCurrent),  # DVCC (settings)
+    }
 
     @callback
-    def _on_message(topic: str, payload: dict[str, Any]) -> None:
-        # VE.Bus AC In Current Limit
-        m = _VEBUS_AC_IN_LIMIT_RE.match(topic)
-        if m:
-            if m.group("prefix") == prefix and m.group("portal") == portal:
-                inst = m.group("instance")
-                ent = runtime["entities"].get(("ac_in_limit", inst))
-                if ent is None:
-                    ent = VictronVeBusAcInCurrentLimit(hass, entry, cfg_slug, portal, inst)
-                    runtime["entities"][("ac_in_limit", inst)] = ent
-                    async_add_entities([ent])
-                ent.handle_payload(payload)
+    def _on_message(route: Route, pv: PathValue | None) -> None:
+        """Create the entity for `route`; values reach it through the data store."""
+        kind = kinds.get(route.kind)
+        if kind is None:
             return
 
-        # DVCC Max Charge Voltage (settings)
-        m = _DVCC_MAX_CHARGE_VOLTAGE_RE.match(topic)
-        if m:
-            if m.group("prefix") == prefix and m.group("portal") == portal:
-                sid = m.group("sid")
-                ent = runtime["entities"].get(("dvcc_v", sid))
-                if ent is None:
-                    ent = VictronDvccMaxChargeVoltage(hass, entry, cfg_slug, portal, sid)
-                    runtime["entities"][("dvcc_v", sid)] = ent
-                    async_add_entities([ent])
-                ent.handle_payload(payload)
-            return
+        key = (kind[0], route.instance)
+        if key not in runtime["entities"]:
+            ent = kind[1](hass, entry, cfg_slug, portal, route.instance)
+            runtime["entities"][key] = ent
+            batcher.add(ent, route.path)
 
-        # DVCC Max Charge Current (settings)
-        m = _DVCC_MAX_CHARGE_CURRENT_RE.match(topic)
-        if m:
-            if m.group("prefix") == prefix and m.group("portal") == portal:
-                sid = m.group("sid")
-                ent = runtime["entities"].get(("dvcc_a", sid))
-                if ent is None:
-                    ent = VictronDvccMaxChargeCurrent(hass, entry, cfg_slug, portal, sid)
-                    runtime["entities"][("dvcc_a", sid)] = ent
-                    async_add_entities([ent])
-                ent.handle_payload(payload)
-            return
+    # Create DVCC entities proactively (settings id 0) so they are visible even if the broker
+    # does not publish retained values on startup (unless the DVCC group is disabled).
+    initial = set(topology.paths)
+    if MetricGroup.DVCC not in hass.data[DOMAIN][entry.entry_id]["disabled_groups"]:
+        initial |= {
+            "settings/0/Settings/SystemSetup/MaxChargeVoltage",
+            "settings/0/Settings/SystemSetup/MaxChargeCurrent",
+        }
+    batcher.run(_on_message, known_routes(initial))
 
     entry.async_on_unload(async_dispatcher_connect(hass, signal, _on_message))
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, signal_batch, lambda items: batcher.run(_on_message, items))
+    )
+    hass.data[DOMAIN][entry.entry_id]["startup"].record("platform.number", started)
 
@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.components import mqtt
+from homeassistant.core import HomeAssistant, callback
+
+from .const import DOMAIN
+
+# Handler signature: (topic, path, raw payload). `path` is the part after
+# <prefix>/N/<portal_id>/, e.g. "vebus/276/State".
+PortalHandler = Callable[[str, str, Any], None]
+
+
+class PortalRouter:
+    """One MQTT subscription per topic prefix, shared by all config entries.
+
+    Topics look like ``<prefix>/N/<portal_id>/<path>``. Messages are routed to
+    the owning config entry with a single dict lookup on the portal id, so the
+    per-message cost stays constant no matter how many GX devices share the
+    prefix (instead of every entry regex-matching every topic).
+    """
+
+    def __init__(self, hass: HomeAssistant, prefix: str) -> None:
+        self.hass = hass
+        self.prefix = prefix
+        self._handlers: dict[str, PortalHandler] = {}
+        self._unsub: Callable[[], None] | None = None
+        self._subscribing = False
+
+        self.unrouted = 0
+
+    @callback
+    def _message_received(self, msg: mqtt.ReceiveMessage) -> None:
+        parts = msg.topic.split("/", 3)
+        if len(parts) != 4:
+            return
+        handler = self._handlers.get(parts[2])
+        if handler is None:
+            self.unrouted += 1
+            return
+        handler(msg.topic, parts[3], msg.payload)
+
+    async def async_register(self, portal_id: str, handler: PortalHandler) -> Callable[[], None]:
+        """Route messages for `portal_id` to `handler`; returns the unregister callback."""
+        self._handlers[portal_id] = handler
+
+        if self._unsub is None and not self._subscribing:
+            self._subscribing = True
+            try:
+                unsub = await mqtt.async_subscribe(
+                    self.hass, f"{self.prefix}/N/+/#", self._message_received, qos=0
+                )
+            finally:
+                self._subscribing = False
+            if self._handlers:
+                self._unsub = unsub
+            else:
+                # Every entry unregistered while we were subscribing.
+                unsub()
+
+        @callback
+        def _unregister() -> None:
+            if self._handlers.get(portal_id) is handler:
+                del self._handlers[portal_id]
+            if self._handlers:
+                return
+            if self._unsub is not None:
+                self._unsub()
+                self._unsub = None
+            routers: dict[str, PortalRouter] = self.hass.data.get(DOMAIN, {}).get("routers", {})
+            if routers.get(self.prefix) is self:
+                del routers[self.prefix]
+
+        return _unregister
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "subscription": f"{self.prefix}/N/+/#",
+            "entries": len(self._handlers),
+            "unrouted_messages": self.unrouted,
+        }
+
+
+def async_get_router(hass: HomeAssistant, prefix: str) -> PortalRouter:
+    """Return the shared router for `prefix`, creating it on first use."""
+    routers: dict[str, PortalRouter] = hass.data[DOMAIN].setdefault("routers", {})
+    router = routers.get(prefix)
+    if router is None:
+        router = routers[prefix] = PortalRouter(hass, prefix)
+    return router
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import re
+import sys
+from dataclasses import dataclass
+from enum import StrEnum
+from functools import lru_cache
+
+from .const import ROUTE_CACHE_SIZE
+
+
+class RouteKind(StrEnum):
+    VEBUS_STATE = "vebus_state"
+    VEBUS_MODE = "vebus_mode"
+    VEBUS_CUSTOM_NAME = "vebus_custom_name"
+    VEBUS_PHASES = "vebus_phases"
+    VEBUS_ALARM = "vebus_alarm"
+    BATTERY = "battery"
+    AC_OUT = "ac_out"
+    AC_IN = "ac_in"
+    AC_IN_LIMIT = "ac_in_limit"
+    DVCC_MAX_CHARGE_VOLTAGE = "dvcc_max_charge_voltage"
+    DVCC_MAX_CHARGE_CURRENT = "dvcc_max_charge_current"
+
+
+class Lane(StrEnum):
+    """Ingestion priority of a route."""
+
+    CONTROL = "control"  # consumed by switch/select/number or state: never batched or throttled
+    TELEMETRY = "telemetry"  # bulk measurements: may be batched
+
+
+class MetricGroup(StrEnum):
+    """Options-flow group a route belongs to (see CONF_METRIC_GROUPS)."""
+
+    AC_IN = "ac_in"
+    AC_OUT = "ac_out"
+    BATTERY = "battery"
+    DVCC = "dvcc"
+    MODE = "mode"
+
+
+# State, CustomName, NumberOfPhases and alarms belong to no group: they are always routed.
+_GROUPS: dict[RouteKind, MetricGroup] = {
+    RouteKind.VEBUS_MODE: MetricGroup.MODE,
+    RouteKind.BATTERY: MetricGroup.BATTERY,
+    RouteKind.AC_OUT: MetricGroup.AC_OUT,
+    RouteKind.AC_IN: MetricGroup.AC_IN,
+    RouteKind.AC_IN_LIMIT: MetricGroup.AC_IN,
+    RouteKind.DVCC_MAX_CHARGE_VOLTAGE: MetricGroup.DVCC,
+    RouteKind.DVCC_MAX_CHARGE_CURRENT: MetricGroup.DVCC,
+}
+
+_CONTROL_KINDS = frozenset(
+    {
+        RouteKind.VEBUS_STATE,
+        RouteKind.VEBUS_MODE,
+        RouteKind.VEBUS_PHASES,
+        RouteKind.VEBUS_ALARM,
+        RouteKind.AC_IN_LIMIT,
+        RouteKind.DVCC_MAX_CHARGE_VOLTAGE,
+        RouteKind.DVCC_MAX_CHARGE_CURRENT,
+    }
+)
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class Route:
+    """Resolved meaning of a Victron path, shared by every message on that path.
+
+    Routes are created once per distinct path and interned (`_ROUTES`), so the
+    steady-state ingestion path allocates no new route objects or key strings
+    and there is exactly one Route per path. Identity equality/hash
+    (eq=False) keeps dict lookups keyed by a route cheap.
+    """
+
+    kind: RouteKind
+    path: str  # e.g. "vebus/276/Ac/Out/L1/P"
+    instance: str  # VE.Bus instance or settings id, e.g. "276"
+    key: str  # canonical entity key, e.g. "ac_out_l1_power"; alarm name for alarms ("" if not applicable)
+    ent_key: str  # runtime map key, e.g. "276:ac_out_l1_power"
+    watch_path: str  # staleness key: `path`, AC In aliases (Ac/In/...) under Ac/ActiveIn/...
+    lane: Lane
+    group: MetricGroup | None
+    phase: int  # AC phase 1..3 of per-phase paths, 0 otherwise
+
+
+# Paths relative to <prefix>/N/<portal_id>/
+_VEBUS_RE = re.compile(r"^vebus/(?P<instance>\d+)/(?P<rest>.+)$")
+_AC_OUT_RE = re.compile(r"^Ac/Out(?:/(?P<phase>L[123]))?/(?P<metric>[PIVF])$")
+_AC_IN_RE = re.compile(
+    r"^Ac/(?P<sub>(?:ActiveIn|In))(?:/(?P<phase>L[123]))?/(?P<metric>(?:P|I|V|F|CurrentLimit))$"
+)
+_ALARM_RE = re.compile(r"^Alarms/(?:(?P<phase>L[123])/)?(?P<name>\w+)$")
+_DVCC_RE = re.compile(
+    r"^settings/(?P<sid>\d+)/Settings/SystemSetup/(?P<name>MaxChargeVoltage|MaxChargeCurrent)$"
+)
+
+_BATTERY_KEYS: dict[str, str] = {
+    "Soc": "battery_soc",
+    "Dc/0/Power": "battery_power",
+    "Dc/0/Current": "battery_current",
+    "Dc/0/Voltage": "battery_voltage",
+}
+
+_METRIC_SUFFIX: dict[str, str] = {
+    "P": "power",
+    "I": "current",
+    "V": "voltage",
+    "F": "frequency",
+}
+
+
+def ac_out_key(phase: str | None, metric: str) -> str | None:
+    """Map VE.Bus AC Out phase/metric to our canonical sensor key."""
+
+    if phase is None:
+        # Total values: only /Ac/Out/P is relevant
+        return "ac_out_power_total" if metric == "P" else None
+
+    suffix = _METRIC_SUFFIX.get(metric)
+    if suffix is None:
+        return None
+    return f"ac_out_{phase.lower()}_{suffix}"
+
+
+def ac_in_key(phase: str | None, metric: str) -> str | None:
+    """Map VE.Bus AC In phase/metric to our canonical sensor key."""
+
+    if metric == "CurrentLimit":
+        return None  # handled by NumberEntity
+
+    if phase is None:
+        return "ac_in_power_total" if metric == "P" else None
+
+    suffix = _METRIC_SUFFIX.get(metric)
+    if suffix is None:
+        return None
+    return f"ac_in_{phase.lower()}_{suffix}"
+
+
+def _route(kind: RouteKind, path: str, instance: str, key: str = "", phase: str | None = None) -> Route:
+    instance = sys.intern(instance)
+    path = sys.intern(path)
+    watch_path = path
+    if kind in (RouteKind.AC_IN, RouteKind.AC_IN_LIMIT):
+        watch_path = sys.intern(path.replace("/Ac/In/", "/Ac/ActiveIn/", 1))
+    return Route(
+        kind=kind,
+        path=path,
+        instance=instance,
+        key=sys.intern(key),
+        ent_key=sys.intern(f"{instance}:{key}") if key else instance,
+        watch_path=watch_path,
+        lane=Lane.CONTROL if kind in _CONTROL_KINDS else Lane.TELEMETRY,
+        group=_GROUPS.get(kind),
+        phase=int(phase[1]) if phase else 0,
+    )
+
+
+# Consumed path -> its Route, never evicted (bounded by the paths the GXs
+# publish). Routes are compared by identity, so a path must always resolve to
+# the same object, also after the LRU in `resolve` has evicted it.
+_ROUTES: dict[str, Route] = {}
+
+
+@lru_cache(maxsize=ROUTE_CACHE_SIZE)
+def resolve(path: str) -> Route | None:
+    """Resolve a path to its Route (None: not consumed by this integration).
+
+    The GX republishes the same few hundred paths forever, so the bounded LRU
+    turns steady-state routing into one dict lookup per message; negative
+    results (the rest of the Venus tree in bridge mode) are cached too. An
+    evicted path resolves to its interned Route again.
+    """
+    route = _ROUTES.get(path)
+    if route is None:
+        route = _parse(path)
+        if route is not None:
+            _ROUTES[path] = route
+    return route
+
+
+def _parse(path: str) -> Route | None:
+    m = _VEBUS_RE.match(path)
+    if m:
+        inst = m.group("instance")
+        rest = m.group("rest")
+
+        if rest == "State":
+            return _route(RouteKind.VEBUS_STATE, path, inst)
+        if rest == "Mode":
+            return _route(RouteKind.VEBUS_MODE, path, inst)
+        if rest == "CustomName":
+            return _route(RouteKind.VEBUS_CUSTOM_NAME, path, inst)
+        if rest == "Ac/NumberOfPhases":
+            return _route(RouteKind.VEBUS_PHASES, path, inst)
+        if rest.startswith("Alarms/"):
+            m_alarm = _ALARM_RE.match(rest)
+            if m_alarm is None:
+                return None
+            return _route(RouteKind.VEBUS_ALARM, path, inst, rest[7:], m_alarm.group("phase"))
+
+        key = _BATTERY_KEYS.get(rest)
+        if key is not None:
+            return _route(RouteKind.BATTERY, path, inst, key)
+
+        m_ac = _AC_OUT_RE.match(rest)
+        if m_ac:
+            phase = m_ac.group("phase")
+            key = ac_out_key(phase, m_ac.group("metric"))
+            return _route(RouteKind.AC_OUT, path, inst, key, phase) if key else None
+
+        m_ac = _AC_IN_RE.match(rest)
+        if m_ac:
+            if m_ac.group("metric") == "CurrentLimit":
+                if m_ac.group("phase") is not None:
+                    return None
+                return _route(RouteKind.AC_IN_LIMIT, path, inst)
+            phase = m_ac.group("phase")
+            key = ac_in_key(phase, m_ac.group("metric"))
+            return _route(RouteKind.AC_IN, path, inst, key, phase) if key else None
+        return None
+
+    m = _DVCC_RE.match(path)
+    if m:
+        if m.group("name") == "MaxChargeVoltage":
+            return _route(RouteKind.DVCC_MAX_CHARGE_VOLTAGE, path, m.group("sid"))
+        return _route(RouteKind.DVCC_MAX_CHARGE_CURRENT, path, m.group("sid"))
+
+    return None
+
+
+def path_aliases(path: str) -> tuple[str, ...]:
+    """`path` and the paths carrying the same value under another name.
+
+    The GX publishes AC input values as ``Ac/ActiveIn/...`` and, depending on
+    the firmware, also as ``Ac/In/...``; both resolve to the same entity.
+    """
+    route = resolve(path)
+    if route is None or route.kind not in (RouteKind.AC_IN, RouteKind.AC_IN_LIMIT):
+        return (path,)
+    prefix = f"vebus/{route.instance}/Ac/"
+    sub, tail = path[len(prefix) :].split("/", 1)
+    return (path, f"{prefix}{'In' if sub == 'ActiveIn' else 'ActiveIn'}/{tail}")
+
+
+def cache_diagnostics() -> dict[str, int]:
+    info = resolve.cache_info()
+    return {
+        "hits": info.hits,
+        "misses": info.misses,
+        "size": info.currsize,
+        "max_size": info.maxsize or 0,
+        "routes": len(_ROUTES),
+    }
@@ -1,44 +1,33 @@
 from __future__ import annotations
 
-import re
+import time
 from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.select import SelectEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.components import mqtt
 
+from .datastore import PathValue
+from .entity import EntityBatcher, VictronPathEntity, hub_device_info, known_routes
+from .routes import Route, RouteKind
 from .const import (
     DOMAIN,
     CONF_NAME,
     CONF_TOPIC_PREFIX,
     CONF_PORTAL_ID,
-    MANUFACTURER,
-    HUB_NAME,
-    HUB_MODEL,
     VE_BUS_MODE_MAP_DE,
     VE_BUS_MODE_MAP_EN,
     VE_BUS_MODE_MAP_INV,
     VE_BUS_MODE_OPTIONS,
 )
 
-_VEBUS_MODE_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/Mode$"
-)
-_VEBUS_CUSTOMNAME_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/CustomName$"
-)
-
 
 @dataclass
 class _Runtime:
     mode_entities: dict[str, "VictronVeBusModeSelect"]
-    customname_by_instance: dict[str, str]
 
 
 def _device_ident(portal_id: str, vebus_instance: str) -> str:
@@ -61,6 +50,7 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
+    started = time.perf_counter()
     cfg_name: str = (entry.title or entry.data.get(CONF_NAME) or 'home')
     cfg_slug: str = _slug(cfg_name)
     prefix: str = entry.data[CONF_TOPIC_PREFIX]
@@ -68,36 +58,27 @@ async def async_setup_entry(
 
     runtime: _Runtime = hass.data[DOMAIN][entry.entry_id].setdefault(
         "select_runtime",
-        _Runtime(mode_entities={}, customname_by_instance={}),
+        _Runtime(mode_entities={}),
     )
 
     signal: str = hass.data[DOMAIN][entry.entry_id]["signal"]
+    signal_batch: str = hass.data[DOMAIN][entry.entry_id]["signal_batch"]
+    topology = hass.data[DOMAIN][entry.entry_id]["topology"]
+    load = hass.data[DOMAIN][entry.entry_id]["load"]
+    data_store = hass.data[DOMAIN][entry.entry_id]["store"]
 
-    @callback
-    def _on_message(topic: str, payload: dict[str, Any]) -> None:
-        # CustomName
-        m_cn = _VEBUS_CUSTOMNAME_RE.match(topic)
-        if m_cn and m_cn.group("prefix") == prefix and m_cn.group("portal") == portal:
-            inst = m_cn.group("instance")
-            v = payload.get("value")
-            if isinstance(v, str) and v.strip():
-                custom_name = v.strip()
-                runtime.customname_by_instance[inst] = custom_name
-                ent = runtime.mode_entities.get(inst)
-                if ent:
-                    ent.set_custom_name(custom_name)
-            return
+    # Entities are added in batches: known paths at setup, buffered initial load later.
+    hidden = hass.data[DOMAIN][entry.entry_id]["hidden_groups"]
+    batcher = EntityBatcher(async_add_entities, topology, load, data_store, hidden)
 
-        # Mode
-        m = _VEBUS_MODE_RE.match(topic)
-        if not m:
-            return
-        if m.group("prefix") != prefix or m.group("portal") != portal:
+    @callback
+    def _on_message(route: Route, pv: PathValue | None) -> None:
+        """Create the entity for `route`; values reach it through the data store."""
+        if route.kind is not RouteKind.VEBUS_MODE:
             return
 
-        inst = m.group("instance")
-        ent = runtime.mode_entities.get(inst)
-        if ent is None:
+        inst = route.instance
+        if inst not in runtime.mode_entities:
             ent = VictronVeBusModeSelect(
                 hass=hass,
                 entry=entry,
@@ -106,17 +87,20 @@ async def async_setup_entry(
                 topic_prefix=prefix,
                 portal_id=portal,
                 vebus_instance=inst,
-                custom_name=runtime.customname_by_instance.get(inst),
             )
             runtime.mode_entities[inst] = ent
-            async_add_entities([ent])
+            batcher.add(ent, route.path)
 
-        ent.handle_mode(payload)
+    batcher.run(_on_message, known_routes(topology.paths))
 
-    async_dispatcher_connect(hass, signal, _on_message)
+    entry.async_on_unload(async_dispatcher_connect(hass, signal, _on_message))
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, signal_batch, lambda items: batcher.run(_on_message, items))
+    )
+    hass.data[DOMAIN][entry.entry_id]["startup"].record("platform.select", started)
 
 
-class VictronVeBusModeSelect(SelectEntity):
+class VictronVeBusModeSelect(VictronPathEntity, SelectEntity):
     """VE.Bus Mode select."""
 
     # Use explicit entity names (not "device name + entity name") to keep naming
@@ -133,7 +117,6 @@ class VictronVeBusModeSelect(SelectEntity):
         topic_prefix: str,
         portal_id: str,
         vebus_instance: str,
-        custom_name: str | None,
     ) -> None:
         self.hass = hass
         self._entry = entry
@@ -142,17 +125,12 @@ class VictronVeBusModeSelect(SelectEntity):
         self._prefix = topic_prefix
         self._portal = portal_id
         self._instance = vebus_instance
-        self._custom_name = custom_name
+        self._path = f"vebus/{vebus_instance}/Mode"
 
         self._mode_code: int | None = None
 
         # Attach to the single Victron GX device (Cerbo GX).
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         # Entity name (UI). Keep single-language; DE/EN mappings are exposed via attributes.
         self._attr_name = "VE-Bus Mode"
@@ -163,16 +141,10 @@ class VictronVeBusModeSelect(SelectEntity):
 
         self._attr_current_option = None
 
-    def set_custom_name(self, custom_name: str) -> None:
-        self._custom_name = custom_name
-        self.async_write_ha_state()
-
     @callback
-    def handle_mode(self, payload: dict[str, Any]) -> None:
-        value = payload.get("value")
-        if isinstance(value, float) and value.is_integer():
-            value = int(value)
-        if not isinstance(value, int):
+    def handle_update(self, pv: PathValue) -> None:
+        value = pv.value
+        if value is None:
             return
 
         self._mode_code = value
@@ -195,14 +167,29 @@ class VictronVeBusModeSelect(SelectEntity):
         if value is None:
             return
 
-        write_topic = f"{self._prefix}/W/{self._portal}/vebus/{self._instance}/Mode"
-        payload = f'{{"value": {value}}}'
-        await mqtt.async_publish(self.hass, write_topic, payload=payload, qos=0, retain=False)
+        previous = self._mode_code
+        writes = self.hass.data[DOMAIN][self._entry.entry_id]["writes"]
 
-        # Optimistic update.
+        # Optimistic update before publishing (rolled back if the GX does not echo
+        # the write; an echo that arrives during the publish wins).
         self._mode_code = value
         self._attr_current_option = _label_en(value)
         self.async_write_ha_state()
+        try:
+            await writes.async_write(
+                f"vebus/{self._instance}/Mode",
+                value,
+                on_timeout=lambda: self._rollback_mode(previous),
+            )
+        except BaseException:
+            self._rollback_mode(previous)
+            raise
+
+    @callback
+    def _rollback_mode(self, previous: int | None) -> None:
+        self._mode_code = previous
+        self._attr_current_option = _label_en(previous) if previous is not None else None
+        self.async_write_ha_state()
 
 
 def _slug(text: str) -> str:
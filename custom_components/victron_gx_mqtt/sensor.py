@@ -1,16 +1,16 @@
 from __future__ import annotations
 
 import re
+import time
 from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.sensor import SensorDeviceClass, SensorEntity, SensorStateClass
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers import device_registry as dr
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.start import async_at_started
 
 from homeassistant.const import (
     PERCENTAGE,
@@ -20,41 +20,19 @@ from homeassistant.const import (
     UnitOfPower,
 )
 
+from .datastore import PathValue
+from .entity import EntityBatcher, VictronPathEntity, hub_device_info, known_routes
+from .ingest import phase_count
+from .routes import Route, RouteKind, resolve
 from .const import (
     DOMAIN,
     CONF_NAME,
-    CONF_TOPIC_PREFIX,
     CONF_PORTAL_ID,
-    MANUFACTURER,
-    HUB_NAME,
-    HUB_MODEL,
     VE_BUS_STATE_MAP,
     VE_BUS_STATE_MAP_DE,
     VE_BUS_STATE_MAP_EN,
 )
 
-_VEBUS_STATE_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/State$"
-)
-_VEBUS_CUSTOMNAME_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/CustomName$"
-)
-
-
-_VEBUS_BATTERY_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/(?P<path>(?:Soc|Dc/0/(?:Power|Current|Voltage)))$"
-)
-
-
-_VEBUS_AC_OUT_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/Ac/Out(?:/(?P<phase>L[123]))?/(?P<metric>[PIVF])$"
-)
-
-
-_VEBUS_AC_IN_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/Ac/(?P<sub>(?:ActiveIn|In))(?:/(?P<phase>L[123]))?/(?P<metric>(?:P|I|V|F|CurrentLimit))$"
-)
-
 @dataclass(frozen=True)
 class _SensorDef:
     key: str
@@ -148,7 +126,6 @@ class _Runtime:
     ac_out_entities: dict[str, "VictronVeBusAcOutSensor"]
     ac_in_entities: dict[str, "VictronVeBusAcInSensor"]
     battery_entities: dict[str, "VictronVeBusBatterySensor"]
-    customname_by_instance: dict[str, str]
 
 
 async def _migrate_entity_registry(hass: HomeAssistant, entry: ConfigEntry) -> None:
@@ -249,12 +226,19 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
+    started = time.perf_counter()
+    startup = hass.data[DOMAIN][entry.entry_id]["startup"]
     cfg_name: str = (entry.title or entry.data.get(CONF_NAME) or 'home')
     cfg_slug: str = _slug(cfg_name)
+
     # Entity IDs are prefixed with the config entry name slug for repeatable naming
-    # across installations (e.g. sensor.ve_base_ve_bus_state).
-    await _migrate_entity_registry(hass, entry)
-    prefix: str = entry.data[CONF_TOPIC_PREFIX]
+    # across installations (e.g. sensor.ve_base_ve_bus_state). The full-registry
+    # migration does not block boot: it runs once HA has started.
+    async def _async_deferred_migration(hass: HomeAssistant) -> None:
+        with startup.phase("sensor_registry_migration", deferred=True):
+            await _migrate_entity_registry(hass, entry)
+
+    entry.async_on_unload(async_at_started(hass, _async_deferred_migration))
     portal: str = entry.data[CONF_PORTAL_ID]
 
     runtime: _Runtime = hass.data[DOMAIN][entry.entry_id].setdefault(
@@ -264,154 +248,69 @@ async def async_setup_entry(
             ac_out_entities={},
             ac_in_entities={},
             battery_entities={},
-            customname_by_instance={},
         ),
     )
 
     signal: str = hass.data[DOMAIN][entry.entry_id]["signal"]
+    signal_batch: str = hass.data[DOMAIN][entry.entry_id]["signal_batch"]
+    topology = hass.data[DOMAIN][entry.entry_id]["topology"]
+    load = hass.data[DOMAIN][entry.entry_id]["load"]
+    data_store = hass.data[DOMAIN][entry.entry_id]["store"]
+
+    # Entities are added in batches: known paths at setup, buffered initial load later.
+    hidden = hass.data[DOMAIN][entry.entry_id]["hidden_groups"]
+    batcher = EntityBatcher(async_add_entities, topology, load, data_store, hidden)
+
+    # Numeric sensor kinds: route kind -> (runtime map, definitions, entity class)
+    numeric_kinds: dict[RouteKind, tuple[dict[str, Any], dict[str, _SensorDef], type]] = {
+        RouteKind.BATTERY: (runtime.battery_entities, _BATTERY_DEFS, VictronVeBusBatterySensor),
+        RouteKind.AC_IN: (runtime.ac_in_entities, _AC_IN_DEFS, VictronVeBusAcInSensor),
+        RouteKind.AC_OUT: (runtime.ac_out_entities, _AC_OUT_DEFS, VictronVeBusAcOutSensor),
+    }
 
     @callback
-    def _on_message(topic: str, payload: dict[str, Any]) -> None:
-        # CustomName
-        m_cn = _VEBUS_CUSTOMNAME_RE.match(topic)
-        if m_cn and m_cn.group("prefix") == prefix and m_cn.group("portal") == portal:
-            inst = m_cn.group("instance")
-            v = payload.get("value")
-            if isinstance(v, str) and v.strip():
-                custom_name = v.strip()
-                runtime.customname_by_instance[inst] = custom_name
-
-                ent = runtime.state_entities.get(inst)
-                if ent:
-                    ent.set_custom_name(custom_name)
-
-                # Update all AC Out sensors for that instance.
-                for aent in list(runtime.ac_out_entities.values()):
-                    if aent.vebus_instance == inst:
-                        aent.set_custom_name(custom_name)
-
-                # Update all AC In sensors for that instance.
-                for aent in list(runtime.ac_in_entities.values()):
-                    if aent.vebus_instance == inst:
-                        aent.set_custom_name(custom_name)
-
-                # Update all Battery sensors for that instance.
-                for aent in list(runtime.battery_entities.values()):
-                    if aent.vebus_instance == inst:
-                        aent.set_custom_name(custom_name)
-            return
-
-        
-
-        # VE-Bus battery sensors (SOC and DC/0)
-        m_batt = _VEBUS_BATTERY_RE.match(topic)
-        if m_batt and m_batt.group("prefix") == prefix and m_batt.group("portal") == portal:
-            inst = m_batt.group("instance")
-            path = m_batt.group("path")
-
-            key_map: dict[str, str] = {
-                "Soc": "battery_soc",
-                "Dc/0/Power": "battery_power",
-                "Dc/0/Current": "battery_current",
-                "Dc/0/Voltage": "battery_voltage",
-            }
-            key = key_map.get(path)
-            if key is None:
+    def _on_message(route: Route, pv: PathValue | None) -> None:
+        """Create the entity for `route`; values reach it through the data store."""
+        kind = route.kind
+        inst = route.instance
+
+        # Phase count: remove AC In / AC Out entities of phases the VE.Bus does not have.
+        if kind is RouteKind.VEBUS_PHASES:
+            count = phase_count(pv.value) if pv is not None else None
+            if count is None:
                 return
-
-            ent_key = f"{inst}:{key}"
-            ent = runtime.battery_entities.get(ent_key)
-            if ent is None:
-                sdef = _BATTERY_DEFS[key]
-                ent = VictronVeBusBatterySensor(
-                    hass=hass,
-                    entry=entry,
-                    cfg_name=cfg_name,
-                    cfg_slug=cfg_slug,
-                    portal_id=portal,
-                    vebus_instance=inst,
-                    custom_name=runtime.customname_by_instance.get(inst),
-                    sdef=sdef,
-                )
-                runtime.battery_entities[ent_key] = ent
-                async_add_entities([ent])
-
-            ent.handle_value(payload)
+            for entities in (runtime.ac_in_entities, runtime.ac_out_entities):
+                for ent_key, aent in list(entities.items()):
+                    aroute = resolve(aent.path)
+                    if aent.vebus_instance == inst and aroute is not None and aroute.phase > count:
+                        del entities[ent_key]
+                        batcher.remove(aent)
             return
 
-        # AC In sensors (ActiveIn and In)
-        m_in = _VEBUS_AC_IN_RE.match(topic)
-        if m_in and m_in.group("prefix") == prefix and m_in.group("portal") == portal:
-            inst = m_in.group("instance")
-            phase = m_in.group("phase")
-            metric = m_in.group("metric")
-
-            key = _ac_in_key(phase, metric)
-            if key is None:
-                return
-
-            ent_key = f"{inst}:{key}"
-            ent = runtime.ac_in_entities.get(ent_key)
-            if ent is None:
-                sdef = _AC_IN_DEFS[key]
-                ent = VictronVeBusAcInSensor(
+        # VE-Bus battery (SOC and DC/0), AC In (ActiveIn and In) and AC Out (Total and per phase)
+        numeric = numeric_kinds.get(kind)
+        if numeric is not None:
+            entities, defs, cls = numeric
+            if route.ent_key not in entities:
+                ent = cls(
                     hass=hass,
                     entry=entry,
                     cfg_name=cfg_name,
                     cfg_slug=cfg_slug,
                     portal_id=portal,
                     vebus_instance=inst,
-                    custom_name=runtime.customname_by_instance.get(inst),
-                    sdef=sdef,
+                    sdef=defs[route.key],
+                    path=route.path,
                 )
-                runtime.ac_in_entities[ent_key] = ent
-                async_add_entities([ent])
-
-            ent.handle_value(payload)
-            return
-
-
-        # AC Out sensors (Total and per phase)
-        m_ac = _VEBUS_AC_OUT_RE.match(topic)
-        if m_ac and m_ac.group("prefix") == prefix and m_ac.group("portal") == portal:
-            inst = m_ac.group("instance")
-            phase = m_ac.group("phase")
-            metric = m_ac.group("metric")
-
-            key = _ac_out_key(phase, metric)
-            if key is None:
-                return
-
-            ent_key = f"{inst}:{key}"
-            ent = runtime.ac_out_entities.get(ent_key)
-            if ent is None:
-                sdef = _AC_OUT_DEFS[key]
-                ent = VictronVeBusAcOutSensor(
-                    hass=hass,
-                    entry=entry,
-                    cfg_name=cfg_name,
-                    cfg_slug=cfg_slug,
-                    portal_id=portal,
-                    vebus_instance=inst,
-                    custom_name=runtime.customname_by_instance.get(inst),
-                    sdef=sdef,
-                )
-                runtime.ac_out_entities[ent_key] = ent
-                async_add_entities([ent])
-
-            ent.handle_value(payload)
+                entities[route.ent_key] = ent
+                batcher.add(ent, route.path)
             return
 
         # State
-        m = _VEBUS_STATE_RE.match(topic)
-        if not m:
-            return
-        if m.group("prefix") != prefix or m.group("portal") != portal:
+        if kind is not RouteKind.VEBUS_STATE:
             return
 
-        inst = m.group("instance")
-        ent = runtime.state_entities.get(inst)
-        if ent is None:
+        if inst not in runtime.state_entities:
             ent = VictronVeBusStateSensor(
                 hass=hass,
                 entry=entry,
@@ -419,17 +318,21 @@ async def async_setup_entry(
                 cfg_slug=cfg_slug,
                 portal_id=portal,
                 vebus_instance=inst,
-                custom_name=runtime.customname_by_instance.get(inst),
+                path=route.path,
             )
             runtime.state_entities[inst] = ent
-            async_add_entities([ent])
+            batcher.add(ent, route.path)
 
-        ent.handle_state(payload)
+    batcher.run(_on_message, known_routes(topology.paths))
 
-    async_dispatcher_connect(hass, signal, _on_message)
+    entry.async_on_unload(async_dispatcher_connect(hass, signal, _on_message))
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, signal_batch, lambda items: batcher.run(_on_message, items))
+    )
+    startup.record("platform.sensor", started)
 
 
-class VictronVeBusStateSensor(SensorEntity):
+class VictronVeBusStateSensor(VictronPathEntity, SensorEntity):
     """VE.Bus State sensor."""
 
     # Use explicit entity names (not "device name + entity name") to keep naming
@@ -444,7 +347,7 @@ class VictronVeBusStateSensor(SensorEntity):
         cfg_slug: str,
         portal_id: str,
         vebus_instance: str,
-        custom_name: str | None,
+        path: str,
     ) -> None:
         self.hass = hass
         self._entry = entry
@@ -452,17 +355,12 @@ class VictronVeBusStateSensor(SensorEntity):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._instance = vebus_instance
-        self._custom_name = custom_name
+        self._path = path
         self._state_code: int | None = None
 
         # Attach all VE-Bus entities to the single Victron GX (Cerbo GX) HA device.
         # We intentionally do NOT create a separate "VE-Bus" device.
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         # Entity name (UI). Keep single-language; DE/EN mappings are exposed via attributes.
         self._attr_name = "VE-Bus State"
@@ -474,17 +372,10 @@ class VictronVeBusStateSensor(SensorEntity):
 
         self._attr_native_value = None
 
-    def set_custom_name(self, custom_name: str) -> None:
-        self._custom_name = custom_name
-        # Ensure device name is persisted.
-        self.async_write_ha_state()
-
     @callback
-    def handle_state(self, payload: dict[str, Any]) -> None:
-        value = payload.get("value")
-        if isinstance(value, float) and value.is_integer():
-            value = int(value)
-        if not isinstance(value, int):
+    def handle_update(self, pv: PathValue) -> None:
+        value = pv.value
+        if value is None:
             return
 
         self._state_code = value
@@ -503,79 +394,7 @@ class VictronVeBusStateSensor(SensorEntity):
         }
 
 
-def _parse_numeric_value(payload: dict[str, Any]) -> float | None:
-    """Parse Victron MQTT JSON payloads into a numeric float.
-
-    Accepts:
-    - numbers (int/float)
-    - strings with '.' or ',' decimal separators
-    """
-
-    v = payload.get("value")
-    if v is None:
-        return None
-
-    if isinstance(v, bool):
-        return None
-
-    if isinstance(v, (int, float)):
-        return float(v)
-
-    if isinstance(v, str):
-        s = v.strip()
-        if not s:
-            return None
-        s = s.replace(",", ".")
-        try:
-            return float(s)
-        except ValueError:
-            return None
-
-    return None
-
-
-def _ac_out_key(phase: str | None, metric: str) -> str | None:
-    """Map VE.Bus AC Out regex match groups to our canonical sensor key."""
-
-    if phase is None:
-        # Total values: only /Ac/Out/P is relevant
-        return "ac_out_power_total" if metric == "P" else None
-
-    metric_map: dict[str, str] = {
-        "P": "power",
-        "I": "current",
-        "V": "voltage",
-        "F": "frequency",
-    }
-    suffix = metric_map.get(metric)
-    if suffix is None:
-        return None
-    return f"ac_out_{phase.lower()}_{suffix}"
-
-
-def _ac_in_key(phase: str | None, metric: str) -> str | None:
-    """Map VE.Bus AC In regex match groups to our canonical sensor key."""
-
-    if metric == "CurrentLimit":
-        return None  # handled by NumberEntity
-
-    if phase is None:
-        return "ac_in_power_total" if metric == "P" else None
-
-    metric_map: dict[str, str] = {
-        "P": "power",
-        "I": "current",
-        "V": "voltage",
-        "F": "frequency",
-    }
-    suffix = metric_map.get(metric)
-    if suffix is None:
-        return None
-    return f"ac_in_{phase.lower()}_{suffix}"
-
-
-
-class VictronVeBusBatterySensor(SensorEntity):
+class VictronVeBusBatterySensor(VictronPathEntity, SensorEntity):
     """VE.Bus battery related sensors (SOC and DC measurements)."""
 
     _attr_has_entity_name = False
@@ -588,8 +407,8 @@ class VictronVeBusBatterySensor(SensorEntity):
         cfg_slug: str,
         portal_id: str,
         vebus_instance: str,
-        custom_name: str | None,
         sdef: _SensorDef,
+        path: str,
     ) -> None:
         self.hass = hass
         self._entry = entry
@@ -597,16 +416,11 @@ class VictronVeBusBatterySensor(SensorEntity):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._instance = vebus_instance
-        self._custom_name = custom_name
+        self._path = path
         self._sdef = sdef
 
         # Battery values belong to the Cerbo GX device (VE.Bus subsystem).
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         self._attr_name = f"VE-Bus {sdef.entity_name}"
         self._attr_unique_id = f"{entry.entry_id}_vebus_{vebus_instance}_{sdef.key}"
@@ -627,12 +441,9 @@ class VictronVeBusBatterySensor(SensorEntity):
     def vebus_instance(self) -> str:
         return self._instance
 
-    def set_custom_name(self, custom_name: str | None) -> None:
-        self._custom_name = custom_name
-
     @callback
-    def handle_value(self, payload: dict[str, Any]) -> None:
-        val = _parse_numeric_value(payload)
+    def handle_update(self, pv: PathValue) -> None:
+        val = pv.value
         if val is None:
             return
         if self._sdef.key in ("battery_soc", "battery_voltage"):
@@ -641,7 +452,7 @@ class VictronVeBusBatterySensor(SensorEntity):
         self.async_write_ha_state()
 
 
-class VictronVeBusAcInSensor(SensorEntity):
+class VictronVeBusAcInSensor(VictronPathEntity, SensorEntity):
     """VE.Bus AC In sensors (Total and per phase)."""
 
     _attr_has_entity_name = False
@@ -654,8 +465,8 @@ class VictronVeBusAcInSensor(SensorEntity):
         cfg_slug: str,
         portal_id: str,
         vebus_instance: str,
-        custom_name: str | None,
         sdef: _SensorDef,
+        path: str,
     ) -> None:
         self.hass = hass
         self._entry = entry
@@ -663,15 +474,10 @@ class VictronVeBusAcInSensor(SensorEntity):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._instance = vebus_instance
-        self._custom_name = custom_name
+        self._path = path
         self._sdef = sdef
 
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         self._attr_name = f"VE-Bus {sdef.entity_name}"
         self._attr_unique_id = f"{portal_id}_vebus_{vebus_instance}_{sdef.key}"
@@ -688,11 +494,9 @@ class VictronVeBusAcInSensor(SensorEntity):
     def vebus_instance(self) -> str:
         return self._instance
 
-    def set_custom_name(self, custom_name: str | None) -> None:
-        self._custom_name = custom_name
-
-    def handle_value(self, payload: dict[str, Any]) -> None:
-        val = _parse_numeric_value(payload)
+    @callback
+    def handle_update(self, pv: PathValue) -> None:
+        val = pv.value
         if val is None:
             return
         if self._sdef.device_class == SensorDeviceClass.FREQUENCY:
@@ -701,7 +505,7 @@ class VictronVeBusAcInSensor(SensorEntity):
         self.async_write_ha_state()
 
 
-class VictronVeBusAcOutSensor(SensorEntity):
+class VictronVeBusAcOutSensor(VictronPathEntity, SensorEntity):
     """VE.Bus AC Out sensors (Total and per phase)."""
 
     # Use explicit entity names (not "device name + entity name") to keep naming
@@ -716,8 +520,8 @@ class VictronVeBusAcOutSensor(SensorEntity):
         cfg_slug: str,
         portal_id: str,
         vebus_instance: str,
-        custom_name: str | None,
         sdef: _SensorDef,
+        path: str,
     ) -> None:
         self.hass = hass
         self._entry = entry
@@ -725,16 +529,11 @@ class VictronVeBusAcOutSensor(SensorEntity):
         self._cfg_slug = cfg_slug
         self._portal = portal_id
         self._instance = vebus_instance
-        self._custom_name = custom_name
+        self._path = path
         self._sdef = sdef
 
         # Attach all VE-Bus entities to the single Victron GX (Cerbo GX) HA device.
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
         # UI name (explicit) - always prefixed with "VE-Bus".
         self._attr_name = f"VE-Bus {sdef.entity_name}"
@@ -759,13 +558,9 @@ class VictronVeBusAcOutSensor(SensorEntity):
     def vebus_instance(self) -> str:
         return self._instance
 
-    def set_custom_name(self, custom_name: str) -> None:
-        self._custom_name = custom_name
-        self.async_write_ha_state()
-
     @callback
-    def handle_value(self, payload: dict[str, Any]) -> None:
-        val = _parse_numeric_value(payload)
+    def handle_update(self, pv: PathValue) -> None:
+        val = pv.value
         if val is None:
             return
         if self._sdef.device_class == SensorDeviceClass.FREQUENCY:
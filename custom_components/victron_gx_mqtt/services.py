@@ -0,0 +1,185 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import time
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse
+from homeassistant.exceptions import ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import DOMAIN
+from .routes import RouteKind, resolve
+from .writes import GuardDecision, WriteResult, normalize_write
+
+SERVICE_WRITE_SETTINGS = "write_settings"
+SERVICE_SNAPSHOT = "snapshot"
+
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_SETTINGS = "settings"
+ATTR_PATH_PREFIX = "path_prefix"
+
+# Paths that may be written through the service (same set the entities write).
+_WRITABLE_KINDS = frozenset(
+    {
+        RouteKind.VEBUS_MODE,
+        RouteKind.AC_IN_LIMIT,
+        RouteKind.DVCC_MAX_CHARGE_VOLTAGE,
+        RouteKind.DVCC_MAX_CHARGE_CURRENT,
+    }
+)
+
+def _number(value: Any) -> int | float:
+    """int or float, but not bool (a bool is an int to `vol.Any(int, float)`)."""
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise vol.Invalid(f"expected a number, got {value!r}")
+    return value
+
+
+WRITE_SETTINGS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        # path (relative to W/<portal_id>/) -> value
+        vol.Required(ATTR_SETTINGS): vol.All(
+            vol.Schema({cv.string: _number}), vol.Length(min=1)
+        ),
+    }
+)
+
+SNAPSHOT_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_CONFIG_ENTRY_ID): cv.string,
+        # Only paths starting with this prefix, e.g. "vebus/276/"
+        vol.Optional(ATTR_PATH_PREFIX, default=""): cv.string,
+    }
+)
+
+
+def _entry_data(hass: HomeAssistant, entry_id: str) -> dict[str, Any]:
+    data = hass.data.get(DOMAIN, {}).get(entry_id)
+    if not data or "ingest" not in data:
+        raise ServiceValidationError(f"Config entry {entry_id} is not loaded")
+    return data
+
+
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the integration services (once, not per config entry)."""
+
+    async def _write_settings(call: ServiceCall) -> ServiceResponse:
+        """Publish all settings at once and wait for every N/ echo.
+
+        Writes are pipelined (all W/ messages go out before the first echo is
+        awaited), so the call takes one round trip instead of one per path.
+        """
+        entry_id: str = call.data[ATTR_CONFIG_ENTRY_ID]
+        settings: dict[str, int | float] = call.data[ATTR_SETTINGS]
+
+        data = _entry_data(hass, entry_id)
+
+        # Paths of disabled metric groups are not routed, so their echo would never arrive.
+        # Values are rounded and range-checked like the entities do, all before the first write.
+        disabled = data["disabled_groups"]
+        store = data["store"]
+        requested: dict[str, int | float] = {}
+        for path, value in settings.items():
+            path = path.strip("/")
+            route = resolve(path)
+            if route is None or route.kind not in _WRITABLE_KINDS or route.group in disabled:
+                raise ServiceValidationError(f"Path is not writable: {path}")
+            current = store.get(path)
+            try:
+                requested[path] = normalize_write(route.kind, value, current.payload if current else None)
+            except ValueError as err:
+                raise ServiceValidationError(f"Invalid value for {path}: {err}") from err
+
+        writes = data["writes"]
+        started = time.monotonic()
+        done_at: dict[str, float] = {}
+        results: dict[str, Any] = {}
+
+        # No-op writes are skipped: Venus only publishes changes, so their echo would
+        # never arrive. Flash-persisted settings also respect the write budget.
+        guard = data["wear_guard"]
+        to_write: dict[str, int | float] = {}
+        for path, value in requested.items():
+            current = store.value(path)
+            if guard.applies(path):
+                decision = guard.check(path, value, current)
+                if decision is not GuardDecision.ALLOWED:
+                    results[path] = {"result": decision.value, "latency_ms": None}
+                    continue
+            elif current is not None and math.isclose(value, current, abs_tol=1e-6):
+                results[path] = {"result": GuardDecision.SUPPRESSED.value, "latency_ms": None}
+                continue
+            to_write[path] = value
+
+        paths = list(to_write)
+        futures = await asyncio.gather(
+            *(writes.async_write(path, value) for path, value in to_write.items())
+        )
+        for path, fut in zip(paths, futures):
+            fut.add_done_callback(lambda _, path=path: done_at.setdefault(path, time.monotonic()))
+
+        outcomes = await asyncio.gather(*futures, return_exceptions=True)
+
+        for path, outcome in zip(paths, outcomes):
+            result = outcome.value if isinstance(outcome, WriteResult) else "cancelled"
+            latency = done_at.get(path)
+            results[path] = {
+                "result": result,
+                "latency_ms": round((latency - started) * 1000.0, 1) if latency is not None else None,
+            }
+
+        return {
+            "success": all(
+                r["result"] in (WriteResult.ACKED, GuardDecision.SUPPRESSED) for r in results.values()
+            ),
+            "duration_ms": round((time.monotonic() - started) * 1000.0, 1),
+            "results": results,
+        }
+
+    async def _snapshot(call: ServiceCall) -> ServiceResponse:
+        """All latest values of a GX in one call, keyed by Victron path.
+
+        Served from the entry's data store, which the ingestion path keeps up
+        to date; no entity states are read. `received` is None for values restored from
+        storage that have not been refreshed since startup.
+        """
+        data = _entry_data(hass, call.data[ATTR_CONFIG_ENTRY_ID])
+        prefix: str = call.data[ATTR_PATH_PREFIX].lstrip("/")
+
+        current = data["store"].values
+        # Monotonic receive times -> wall clock.
+        offset = time.time() - time.monotonic()
+
+        values: dict[str, Any] = {}
+        for path in sorted(current):
+            if not path.startswith(prefix):
+                continue
+            pv = current[path]
+            at = pv.received
+            values[path] = {
+                "value": pv.payload.get("value"),
+                "received": dt_util.utc_from_timestamp(at + offset).isoformat() if at is not None else None,
+            }
+
+        return {"count": len(values), "values": values}
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_WRITE_SETTINGS,
+        _write_settings,
+        schema=WRITE_SETTINGS_SCHEMA,
+        supports_response=SupportsResponse.OPTIONAL,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_SNAPSHOT,
+        _snapshot,
+        schema=SNAPSHOT_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, SNAPSHOT_SAVE_DELAY, SNAPSHOT_STORAGE_VERSION
+
+
+class ValueSnapshot:
+    """Latest payload per Victron path, persisted to `.storage` at a low rate.
+
+    On startup the stored snapshot is replayed so entities come up with their
+    last known values immediately; live N/ messages then refresh them.
+    Writes are batched: the first update after a save schedules the next save
+    `SNAPSHOT_SAVE_DELAY` seconds later, further updates only replace the
+    in-memory value. Pending data is flushed on HA shutdown by the Store.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, SNAPSHOT_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.snapshot"
+        )
+        self._values: dict[str, dict[str, Any]] = {}
+        self._save_scheduled = False
+
+        # Restart metrics (seconds since config entry setup started).
+        self._setup_started = time.monotonic()
+        self.restored_paths = 0
+        self.restored_after: float | None = None
+        self.first_live_after: float | None = None
+
+    @property
+    def values(self) -> dict[str, dict[str, Any]]:
+        return self._values
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not isinstance(data, dict):
+            return
+        paths = data.get("paths")
+        if isinstance(paths, dict):
+            self._values = {p: v for p, v in paths.items() if isinstance(v, dict)}
+
+    @callback
+    def async_replay(self, send: Callable[[list[tuple[str, dict[str, Any]]], None], None]) -> None:
+        """Hand all stored (path, payload) pairs to `send` as one batch at startup."""
+        send(list(self._values.items()))
+        self.restored_paths = len(self._values)
+        self.restored_after = time.monotonic() - self._setup_started
+
+    @callback
+    def update(self, path: str, payload: dict[str, Any]) -> None:
+        """Record a live value (hot path: one dict store)."""
+        self._values[path] = payload
+        # Before the early return: discard() may already have scheduled the save.
+        if self.first_live_after is None:
+            self.first_live_after = time.monotonic() - self._setup_started
+        if self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def discard(self, path: str) -> None:
+        """Forget a path that no longer exists on the GX (not replayed on the next start)."""
+        if self._values.pop(path, None) is None or self._save_scheduled:
+            return
+        self._save_scheduled = True
+        self._store.async_delay_save(self._data_to_save, SNAPSHOT_SAVE_DELAY)
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        self._save_scheduled = False
+        # Store serializes in the executor while update() keeps writing to _values;
+        # payload dicts are replaced, never mutated, so a shallow copy is enough.
+        return {"paths": dict(self._values)}
+
+    async def async_flush(self) -> None:
+        """Write pending values now (config entry unload)."""
+        if self._save_scheduled:
+            await self._store.async_save(self._data_to_save())
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "paths": len(self._values),
+            "restored_paths": self.restored_paths,
+            "restored_after_ms": _ms(self.restored_after),
+            "first_live_after_ms": _ms(self.first_live_after),
+        }
+
+
+def _ms(seconds: float | None) -> float | None:
+    return round(seconds * 1000.0, 1) if seconds is not None else None
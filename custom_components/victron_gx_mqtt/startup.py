@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+
+class StartupTimings:
+    """Wall-clock duration of each setup phase of one config entry.
+
+    Phases run inside `async_setup_entry` (and the platform setups it
+    forwards) add to HA boot time; deferred phases run after
+    EVENT_HOMEASSISTANT_STARTED and are reported separately.
+    """
+
+    def __init__(self) -> None:
+        self._started = time.perf_counter()
+        self.setup_ms: float | None = None
+        self.phases: dict[str, float] = {}
+        self.deferred: dict[str, float] = {}
+
+    @contextmanager
+    def phase(self, name: str, deferred: bool = False) -> Iterator[None]:
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, deferred)
+
+    def record(self, name: str, started: float, deferred: bool = False) -> None:
+        """Phase `name` began at `started` (`time.perf_counter()`) and ends now."""
+        (self.deferred if deferred else self.phases)[name] = (time.perf_counter() - started) * 1000.0
+
+    def finish(self) -> None:
+        """`async_setup_entry` returned: the entry's share of HA boot time is known."""
+        self.setup_ms = (time.perf_counter() - self._started) * 1000.0
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "setup_ms": round(self.setup_ms, 2) if self.setup_ms is not None else None,
+            "phases_ms": {name: round(ms, 2) for name, ms in self.phases.items()},
+            "deferred_ms": {name: round(ms, 2) for name, ms in self.deferred.items()},
+        }
@@ -1,32 +1,24 @@
 from __future__ import annotations
 
-import re
+import time
 from dataclasses import dataclass
 from typing import Any
 
 from homeassistant.components.switch import SwitchEntity
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant, callback
-from homeassistant.helpers.device_registry import DeviceInfo
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
-from homeassistant.components import mqtt
 
+from .datastore import PathValue
+from .entity import EntityBatcher, VictronPathEntity, hub_device_info, known_routes
 from .const import (
     DOMAIN,
     CONF_NAME,
     CONF_TOPIC_PREFIX,
     CONF_PORTAL_ID,
-    MANUFACTURER,
-    HUB_NAME,
-    HUB_MODEL,
-)
-
-# Victron VE.Bus Mode topic (read)
-# <prefix>/N/<portal_id>/vebus/<instance>/Mode
-_VEBUS_MODE_RE = re.compile(
-    r"^(?P<prefix>[^/]+)/N/(?P<portal>[^/]+)/vebus/(?P<instance>\d+)/Mode$"
 )
+from .routes import Route, RouteKind
 
 
 @dataclass
@@ -62,6 +54,7 @@ async def async_setup_entry(
     entry: ConfigEntry,
     async_add_entities: AddEntitiesCallback,
 ) -> None:
+    started = time.perf_counter()
     cfg_name: str = (entry.title or entry.data.get(CONF_NAME) or "home")
     cfg_slug: str = _slug(cfg_name)
 
@@ -74,20 +67,25 @@ async def async_setup_entry(
     )
 
     signal: str = hass.data[DOMAIN][entry.entry_id]["signal"]
+    signal_batch: str = hass.data[DOMAIN][entry.entry_id]["signal_batch"]
+    topology = hass.data[DOMAIN][entry.entry_id]["topology"]
+    load = hass.data[DOMAIN][entry.entry_id]["load"]
+    data_store = hass.data[DOMAIN][entry.entry_id]["store"]
+
+    # Entities are added in batches: known paths at setup, buffered initial load later.
+    hidden = hass.data[DOMAIN][entry.entry_id]["hidden_groups"]
+    batcher = EntityBatcher(async_add_entities, topology, load, data_store, hidden)
 
     @callback
-    def _on_message(topic: str, payload: dict[str, Any]) -> None:
-        m = _VEBUS_MODE_RE.match(topic)
-        if not m:
-            return
-        if m.group("prefix") != prefix or m.group("portal") != portal:
+    def _on_message(route: Route, pv: PathValue | None) -> None:
+        """Create the entities for `route`; values reach them through the data store."""
+        if route.kind is not RouteKind.VEBUS_MODE:
             return
 
-        inst = m.group("instance")
+        inst = route.instance
 
         # Emergency shutdown switch (Mode -> 4)
-        ent_em = runtime.emergency.get(inst)
-        if ent_em is None:
+        if inst not in runtime.emergency:
             ent_em = VictronVeBusEmergencyShutdownSwitch(
                 hass=hass,
                 entry=entry,
@@ -97,11 +95,10 @@ async def async_setup_entry(
                 vebus_instance=inst,
             )
             runtime.emergency[inst] = ent_em
-            async_add_entities([ent_em])
+            batcher.add(ent_em, route.path)
 
         # Grid active switch (Mode -> 3)
-        ent_grid = runtime.grid.get(inst)
-        if ent_grid is None:
+        if inst not in runtime.grid:
             ent_grid = VictronVeBusGridActiveSwitch(
                 hass=hass,
                 entry=entry,
@@ -111,16 +108,18 @@ async def async_setup_entry(
                 vebus_instance=inst,
             )
             runtime.grid[inst] = ent_grid
-            async_add_entities([ent_grid])
+            batcher.add(ent_grid, route.path)
 
-        # Update both from the same Mode payload
-        ent_em.handle_mode(payload)
-        ent_grid.handle_mode(payload)
+    batcher.run(_on_message, known_routes(topology.paths))
 
-    async_dispatcher_connect(hass, signal, _on_message)
+    entry.async_on_unload(async_dispatcher_connect(hass, signal, _on_message))
+    entry.async_on_unload(
+        async_dispatcher_connect(hass, signal_batch, lambda items: batcher.run(_on_message, items))
+    )
+    hass.data[DOMAIN][entry.entry_id]["startup"].record("platform.switch", started)
 
 
-class _BaseVeBusModeSwitch(SwitchEntity):
+class _BaseVeBusModeSwitch(VictronPathEntity, SwitchEntity):
     """Base class for VE.Bus mode derived switches."""
 
     _attr_has_entity_name = False
@@ -140,32 +139,45 @@ class _BaseVeBusModeSwitch(SwitchEntity):
         self._prefix = topic_prefix
         self._portal = portal_id
         self._instance = vebus_instance
+        self._path = f"vebus/{vebus_instance}/Mode"
 
         self._mode_code: int | None = None
 
         # Single HA device per installation (Cerbo GX).
-        self._attr_device_info = DeviceInfo(
-            identifiers={(DOMAIN, f"{portal_id}_cerbo_gx")},
-            name=HUB_NAME,
-            manufacturer=MANUFACTURER,
-            model=HUB_MODEL,
-        )
+        self._attr_device_info = hub_device_info(portal_id)
 
     @callback
-    def handle_mode(self, payload: dict[str, Any]) -> None:
-        value = payload.get("value")
-        if isinstance(value, float) and value.is_integer():
-            value = int(value)
-        if not isinstance(value, int):
+    def handle_update(self, pv: PathValue) -> None:
+        # Both switches subscribe to the same Mode path; the code is parsed once.
+        value = pv.value
+        if value is None:
             return
 
         self._mode_code = value
         self.async_write_ha_state()
 
-    def _write_mode(self, mode: int) -> Any:
-        write_topic = f"{self._prefix}/W/{self._portal}/vebus/{self._instance}/Mode"
-        payload = f'{{"value": {mode}}}'
-        return mqtt.async_publish(self.hass, write_topic, payload=payload, qos=0, retain=False)
+    async def _write_mode(self, mode: int) -> None:
+        """Publish Mode and update optimistically; roll back if the GX does not echo it."""
+        previous = self._mode_code
+        writes = self.hass.data[DOMAIN][self._entry.entry_id]["writes"]
+
+        # Optimistic update before publishing (an echo during the publish wins).
+        self._mode_code = mode
+        self.async_write_ha_state()
+        try:
+            await writes.async_write(
+                f"vebus/{self._instance}/Mode",
+                mode,
+                on_timeout=lambda: self._rollback_mode(previous),
+            )
+        except BaseException:
+            self._rollback_mode(previous)
+            raise
+
+    @callback
+    def _rollback_mode(self, previous: int | None) -> None:
+        self._mode_code = previous
+        self.async_write_ha_state()
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
@@ -225,10 +237,6 @@ class VictronVeBusEmergencyShutdownSwitch(_BaseVeBusModeSwitch):
     async def async_turn_on(self, **kwargs: Any) -> None:
         await self._write_mode(4)
 
-        # Optimistic update.
-        self._mode_code = 4
-        self.async_write_ha_state()
-
     async def async_turn_off(self, **kwargs: Any) -> None:
         # Explicitly disabled: this switch must not switch from 4 to other modes.
         self.async_write_ha_state()
@@ -284,10 +292,6 @@ class VictronVeBusGridActiveSwitch(_BaseVeBusModeSwitch):
     async def async_turn_on(self, **kwargs: Any) -> None:
         await self._write_mode(3)
 
-        # Optimistic update.
-        self._mode_code = 3
-        self.async_write_ha_state()
-
     async def async_turn_off(self, **kwargs: Any) -> None:
         # Explicitly disabled: this switch must not switch from 3 to other modes.
         self.async_write_ha_state()
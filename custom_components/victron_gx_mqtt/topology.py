@@ -0,0 +1,85 @@
+from __future__ import annotations
+
+import re
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN, TOPOLOGY_SAVE_DELAY, TOPOLOGY_STORAGE_VERSION
+
+_VEBUS_PATH_RE = re.compile(r"^vebus/(?P<instance>\d+)/")
+_PHASE_PATH_RE = re.compile(r"^vebus/(?P<instance>\d+)/Ac/(?:Out|ActiveIn|In)/(?P<phase>L[123])/")
+
+
+class Topology:
+    """Entity-backing paths discovered on this GX, persisted across restarts.
+
+    Platforms record a path when they create an entity for it. On the next
+    start every platform pre-creates the entities for all known paths in a
+    single `async_add_entities` call; live discovery then only handles paths
+    (and VE.Bus instances) that were never seen before.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        self.hass = hass
+        self._store: Store[dict[str, Any]] = Store(
+            hass, TOPOLOGY_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.topology"
+        )
+        self._paths: set[str] = set()
+
+    @property
+    def paths(self) -> set[str]:
+        return self._paths
+
+    async def async_load(self) -> None:
+        data = await self._store.async_load()
+        if not isinstance(data, dict):
+            return
+        paths = data.get("paths")
+        if isinstance(paths, list):
+            self._paths = {p for p in paths if isinstance(p, str)}
+
+    @callback
+    def add(self, path: str) -> None:
+        if path in self._paths:
+            return
+        self._paths.add(path)
+        self._store.async_delay_save(self._data_to_save, TOPOLOGY_SAVE_DELAY)
+
+    @callback
+    def discard(self, path: str) -> None:
+        if path not in self._paths:
+            return
+        self._paths.discard(path)
+        self._store.async_delay_save(self._data_to_save, TOPOLOGY_SAVE_DELAY)
+
+    def vebus_instances(self) -> list[str]:
+        found = {m.group("instance") for p in self._paths if (m := _VEBUS_PATH_RE.match(p))}
+        return sorted(found, key=int)
+
+    def phases(self) -> dict[str, list[str]]:
+        found: dict[str, set[str]] = {}
+        for p in self._paths:
+            m = _PHASE_PATH_RE.match(p)
+            if m:
+                found.setdefault(m.group("instance"), set()).add(m.group("phase"))
+        return {inst: sorted(ph) for inst, ph in found.items()}
+
+    @callback
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "vebus_instances": self.vebus_instances(),
+            "phases": self.phases(),
+            "paths": sorted(self._paths),
+        }
+
+    async def async_remove(self) -> None:
+        await self._store.async_remove()
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "paths": len(self._paths),
+            "vebus_instances": self.vebus_instances(),
+            "phases": self.phases(),
+        }
@@ -0,0 +1,104 @@
+from __future__ import annotations
+
+import math
+from array import array
+from typing import Any
+
+from homeassistant.core import callback
+
+from .const import TRACE_SAMPLES
+from .routes import Route
+
+# Stages of one traced message, in ring order.
+STAGES: tuple[str, ...] = ("route", "decode", "wait", "handler", "total")
+_N = len(STAGES)
+
+
+class _RouteTrace:
+    """Ring buffer of the last TRACE_SAMPLES stage timings (ms) of one route."""
+
+    __slots__ = ("count", "ring")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.ring = array("d", bytes(8 * _N * TRACE_SAMPLES))
+
+    def add(self, route_ms: float, decode_ms: float, wait_ms: float, handler_ms: float) -> None:
+        base = (self.count % TRACE_SAMPLES) * _N
+        ring = self.ring
+        ring[base] = route_ms
+        ring[base + 1] = decode_ms
+        ring[base + 2] = wait_ms
+        ring[base + 3] = handler_ms
+        ring[base + 4] = route_ms + decode_ms + wait_ms + handler_ms
+        self.count += 1
+
+    def percentiles(self) -> dict[str, dict[str, float]]:
+        n = min(self.count, TRACE_SAMPLES)
+        out: dict[str, dict[str, float]] = {}
+        for i, stage in enumerate(STAGES):
+            values = sorted(self.ring[j * _N + i] for j in range(n))
+            out[stage] = {
+                "p50": _pct(values, 0.50),
+                "p95": _pct(values, 0.95),
+                "p99": _pct(values, 0.99),
+                "max": round(values[-1], 2),
+            }
+        return out
+
+
+class LatencyTracer:
+    """Optional receipt -> state write tracing per route.
+
+    Every dispatched message is split into route (path lookup), decode (JSON),
+    wait (micro-batch / throttle hold) and handler (platform callback up to
+    and including `async_write_ha_state`). For batched telemetry only the
+    sample that is actually written is traced, and handler is the duration of
+    the batch dispatch. Buffered initial-load messages are not traced.
+    """
+
+    def __init__(self) -> None:
+        self._routes: dict[Route, _RouteTrace] = {}
+        # route -> (received, routed, decoded) of the sample held in the current batch
+        self._held: dict[Route, tuple[float, float, float]] = {}
+
+    @callback
+    def record(
+        self, route: Route, received: float, routed: float, decoded: float, dispatched: float, done: float
+    ) -> None:
+        trace = self._routes.get(route)
+        if trace is None:
+            trace = self._routes[route] = _RouteTrace()
+        trace.add(
+            (routed - received) * 1000.0,
+            (decoded - routed) * 1000.0,
+            (dispatched - decoded) * 1000.0,
+            (done - dispatched) * 1000.0,
+        )
+
+    @callback
+    def hold(self, route: Route, received: float, routed: float, decoded: float) -> None:
+        """Remember the stamps of a batched sample (a newer one replaces it)."""
+        self._held[route] = (received, routed, decoded)
+
+    @callback
+    def release(self, dispatched: float, done: float) -> None:
+        """The current batch was dispatched: record all held samples."""
+        for route, (received, routed, decoded) in self._held.items():
+            self.record(route, received, routed, decoded, dispatched, done)
+        self._held.clear()
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "samples_per_route": TRACE_SAMPLES,
+            "routes": {
+                route.path: {"count": trace.count, **trace.percentiles()}
+                for route, trace in sorted(self._routes.items(), key=lambda item: item[0].path)
+            },
+        }
+
+
+def _pct(values: list[float], q: float) -> float:
+    # Nearest-rank percentile.
+    idx = max(0, math.ceil(q * len(values)) - 1)
+    return round(values[idx], 2)
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.event import async_track_time_interval
+
+from .const import STALE_AFTER_DEFAULT, STALE_AFTER_OVERRIDES, STALE_SWEEP_INTERVAL
+
+
+def expected_interval(path: str) -> float:
+    """Seconds after which a path without updates is considered stale."""
+    for path_prefix, seconds in STALE_AFTER_OVERRIDES:
+        if path.startswith(path_prefix):
+            return seconds
+    return STALE_AFTER_DEFAULT
+
+
+class _Tracked:
+    __slots__ = ("interval", "listeners", "slot", "stale")
+
+    def __init__(self, interval: float) -> None:
+        self.interval = interval
+        self.listeners: list[Callable[[bool], None]] = []
+        self.slot: int | None = None
+        self.stale = False
+
+
+class StalenessWatchdog:
+    """Per-entry staleness detection driven by a single timer wheel.
+
+    Every tracked path sits in exactly one wheel slot (its deadline rounded up
+    to the sweep tick). `touch()` moves a path to a later slot in O(1), and
+    the periodic sweep only pops the slots that have already expired, so the
+    sweep cost is O(expired paths) regardless of how many entities exist.
+    """
+
+    def __init__(self, hass: HomeAssistant, tick: float = STALE_SWEEP_INTERVAL) -> None:
+        self.hass = hass
+        self._tick = tick
+        self._tracked: dict[str, _Tracked] = {}
+        self._slots: dict[int, set[str]] = {}
+        self._cursor = self._slot_for(hass.loop.time())
+        self._unsub: Callable[[], None] | None = None
+
+        self.stale_events = 0
+
+    def _slot_for(self, when: float) -> int:
+        # Round up so a path never expires before its full interval has passed.
+        return int(when // self._tick) + 1
+
+    def _schedule(self, path: str, tracked: _Tracked, now: float) -> None:
+        slot = self._slot_for(now + tracked.interval)
+        if slot == tracked.slot:
+            return
+        if tracked.slot is not None:
+            bucket = self._slots.get(tracked.slot)
+            if bucket is not None:
+                bucket.discard(path)
+                if not bucket:
+                    del self._slots[tracked.slot]
+        self._slots.setdefault(slot, set()).add(path)
+        tracked.slot = slot
+
+    @callback
+    def register(self, path: str, listener: Callable[[bool], None]) -> Callable[[], None]:
+        """Track `path`; `listener(stale)` is called on every availability transition."""
+        tracked = self._tracked.get(path)
+        if tracked is None:
+            tracked = self._tracked[path] = _Tracked(expected_interval(path))
+            self._schedule(path, tracked, self.hass.loop.time())
+        tracked.listeners.append(listener)
+
+        @callback
+        def _unregister() -> None:
+            tracked.listeners.remove(listener)
+            if tracked.listeners:
+                return
+            self._tracked.pop(path, None)
+            if tracked.slot is not None:
+                bucket = self._slots.get(tracked.slot)
+                if bucket is not None:
+                    bucket.discard(path)
+                    if not bucket:
+                        del self._slots[tracked.slot]
+
+        return _unregister
+
+    def is_stale(self, path: str) -> bool:
+        tracked = self._tracked.get(path)
+        return tracked is not None and tracked.stale
+
+    @callback
+    def touch(self, path: str) -> None:
+        """Record an update for `path` (hot path)."""
+        tracked = self._tracked.get(path)
+        if tracked is None:
+            return
+        self._schedule(path, tracked, self.hass.loop.time())
+        if tracked.stale:
+            tracked.stale = False
+            for listener in tuple(tracked.listeners):
+                listener(False)
+
+    @callback
+    def _sweep(self, _now: Any = None) -> None:
+        current = int(self.hass.loop.time() // self._tick)
+        while self._cursor <= current:
+            expired = self._slots.pop(self._cursor, None)
+            self._cursor += 1
+            if not expired:
+                continue
+            for path in expired:
+                tracked = self._tracked.get(path)
+                if tracked is None:
+                    continue
+                tracked.slot = None
+                if tracked.stale:
+                    continue
+                tracked.stale = True
+                self.stale_events += 1
+                for listener in tuple(tracked.listeners):
+                    listener(True)
+
+    @callback
+    def async_start(self) -> None:
+        self._unsub = async_track_time_interval(
+            self.hass, self._sweep, timedelta(seconds=self._tick), name="victron_gx_mqtt staleness sweep"
+        )
+
+    @callback
+    def async_stop(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "tracked_paths": len(self._tracked),
+            "stale_paths": sorted(p for p, t in self._tracked.items() if t.stale),
+            "wheel_slots": len(self._slots),
+            "stale_events": self.stale_events,
+        }
@@ -0,0 +1,144 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+import voluptuous as vol
+
+from homeassistant.components import websocket_api
+from homeassistant.core import HomeAssistant, callback
+
+from .const import (
+    DOMAIN,
+    LIVE_DEFAULT_THROTTLE_MS,
+    LIVE_MAX_THROTTLE_MS,
+    LIVE_MIN_THROTTLE_MS,
+    WS_TYPE_SUBSCRIBE,
+)
+from .routes import resolve
+
+_MISSING = object()
+
+
+class LiveSubscription:
+    """One websocket client's throttled, delta-only view of a set of paths.
+
+    Values come straight from the ingestion path (before micro-batching and
+    entity state writes). A value equal to the last one sent is not sent
+    again; changed values are collected and sent as one event at most once
+    per throttle interval (latest value per path).
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, send: Callable[[dict[str, Any]], None], msg_id: int, throttle: float
+    ) -> None:
+        self.hass = hass
+        self._send_message = send
+        self._msg_id = msg_id
+        self._throttle = throttle
+        self._sent: dict[str, Any] = {}
+        self._pending: dict[str, Any] = {}
+        self._handle: Any = None
+        self._last_send = 0.0
+
+    @callback
+    def on_value(self, path: str, payload: dict[str, Any]) -> None:
+        value = payload.get("value")
+        if self._sent.get(path, _MISSING) == value:
+            self._pending.pop(path, None)
+            return
+        self._pending[path] = value
+        if self._handle is None:
+            loop = self.hass.loop
+            delay = max(0.0, self._last_send + self._throttle - loop.time())
+            self._handle = loop.call_later(delay, self._flush)
+
+    @callback
+    def send_initial(self, values: dict[str, Any]) -> None:
+        """Full state of the subscribed paths, sent once right after subscribing."""
+        self._sent.update(values)
+        self._send_message(websocket_api.event_message(self._msg_id, {"values": values, "initial": True}))
+        self._last_send = self.hass.loop.time()
+
+    @callback
+    def _flush(self) -> None:
+        self._handle = None
+        if not self._pending:
+            return
+        values, self._pending = self._pending, {}
+        self._sent.update(values)
+        self._send_message(websocket_api.event_message(self._msg_id, {"values": values}))
+        self._last_send = self.hass.loop.time()
+
+    @callback
+    def cancel(self) -> None:
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+
+@websocket_api.websocket_command(
+    {
+        vol.Required("type"): WS_TYPE_SUBSCRIBE,
+        vol.Required("config_entry_id"): str,
+        # Paths relative to N/<portal_id>/, e.g. "vebus/276/Ac/Out/L1/P"
+        vol.Required("paths"): vol.All([str], vol.Length(min=1)),
+        vol.Optional("throttle_ms", default=LIVE_DEFAULT_THROTTLE_MS): vol.All(
+            vol.Coerce(int), vol.Range(min=LIVE_MIN_THROTTLE_MS, max=LIVE_MAX_THROTTLE_MS)
+        ),
+    }
+)
+@callback
+def ws_subscribe(
+    hass: HomeAssistant, connection: websocket_api.ActiveConnection, msg: dict[str, Any]
+) -> None:
+    """Stream raw values of selected paths: the current values first, then throttled deltas."""
+    data = hass.data.get(DOMAIN, {}).get(msg["config_entry_id"])
+    if not data or "ingest" not in data:
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry is not loaded")
+        return
+
+    paths = [path.strip("/") for path in msg["paths"]]
+    unknown = [path for path in paths if resolve(path) is None]
+    if unknown:
+        connection.send_error(
+            msg["id"], websocket_api.ERR_INVALID_FORMAT, f"Paths not handled: {', '.join(unknown)}"
+        )
+        return
+
+    sub = LiveSubscription(hass, connection.send_message, msg["id"], msg["throttle_ms"] / 1000.0)
+    unsub = data["ingest"].async_add_path_listener(paths, sub.on_value)
+    live: set[Callable[[], None]] = data["live_subscriptions"]
+
+    @callback
+    def _unsubscribe() -> None:
+        live.discard(_end)
+        unsub()
+        sub.cancel()
+
+    @callback
+    def _end() -> None:
+        # Entry unload: the listener belongs to this entry's ingest, which goes away
+        # with it. The client has to subscribe again once the entry is loaded.
+        connection.subscriptions.pop(msg["id"], None)
+        _unsubscribe()
+        connection.send_error(msg["id"], websocket_api.ERR_NOT_FOUND, "Config entry was unloaded")
+
+    live.add(_end)
+    connection.subscriptions[msg["id"]] = _unsubscribe
+    connection.send_result(msg["id"])
+
+    current = data["store"].values
+    sub.send_initial({path: current[path].payload.get("value") for path in paths if path in current})
+
+
+@callback
+def async_end_subscriptions(live: set[Callable[[], None]]) -> None:
+    """End all live subscriptions of an entry (registered as its unload hook)."""
+    for end in list(live):
+        end()
+
+
+@callback
+def async_setup_websocket(hass: HomeAssistant) -> None:
+    websocket_api.async_register_command(hass, ws_subscribe)
@@ -0,0 +1,322 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import math
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from enum import StrEnum
+from typing import Any
+
+from homeassistant.core import HomeAssistant, callback
+
+from .const import SETTINGS_WRITE_TOLERANCES, VE_BUS_MODE_MAP, WRITE_ACK_TIMEOUT, WRITE_LATENCY_BUCKETS_MS
+from .datastore import parse_numeric
+from .routes import RouteKind
+
+_HOUR = 3600.0
+
+
+class WriteResult(StrEnum):
+    """Outcome of a W/ write as observed on the N/ echo."""
+
+    ACKED = "acked"  # echo carried the written value
+    MISMATCH = "mismatch"  # echo arrived, but the GX reports a different value (clamped)
+    TIMEOUT = "timeout"  # no echo (or only the previous value) within WRITE_ACK_TIMEOUT
+    SUPERSEDED = "superseded"  # a newer write to the same path replaced this one
+
+
+class LatencyHistogram:
+    """Fixed-bucket latency histogram (milliseconds).
+
+    Buckets are upper bounds; everything above the last bound lands in "+Inf".
+    """
+
+    def __init__(self, buckets_ms: tuple[int, ...] = WRITE_LATENCY_BUCKETS_MS) -> None:
+        self._bounds = buckets_ms
+        self._counts = [0] * (len(buckets_ms) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, ms: float) -> None:
+        idx = len(self._bounds)
+        for i, bound in enumerate(self._bounds):
+            if ms <= bound:
+                idx = i
+                break
+        self._counts[idx] += 1
+        self.count += 1
+        self.total_ms += ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def as_dict(self) -> dict[str, Any]:
+        buckets = {f"le_{b}": c for b, c in zip(self._bounds, self._counts)}
+        buckets["+Inf"] = self._counts[-1]
+        return {
+            "count": self.count,
+            "avg_ms": round(self.total_ms / self.count, 1) if self.count else None,
+            "max_ms": round(self.max_ms, 1),
+            "buckets": buckets,
+        }
+
+
+@dataclass
+class _PendingWrite:
+    value: Any
+    sent_at: float
+    future: asyncio.Future[WriteResult]
+    timer: asyncio.TimerHandle | None
+    on_timeout: Callable[[], None] | None
+    before: Any = None  # value stored for the path when the write was made
+
+
+def _same_value(written: Any, echoed: Any) -> bool:
+    if isinstance(written, (int, float)) and isinstance(echoed, (int, float)):
+        if isinstance(written, bool) or isinstance(echoed, bool):
+            return written == echoed
+        return math.isclose(float(written), float(echoed), rel_tol=1e-6, abs_tol=1e-6)
+    return written == echoed
+
+
+class PendingWriteTracker:
+    """Track W/ writes until the GX confirms them with an N/ echo on the same path.
+
+    Paths are relative to the portal, e.g. ``vebus/276/Mode`` or
+    ``settings/0/Settings/SystemSetup/MaxChargeVoltage``. `publish(path, payload)`
+    sends the W/ message over the active connection (HA MQTT or direct).
+    Only one write per path is pending at a time; a newer write supersedes
+    the older one. `current(path)` returns the value stored for a path: an
+    N/ message repeating the value from before the write (a republish that
+    was already in flight) does not resolve the write.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        publish: Callable[[str, str], Awaitable[None]],
+        timeout: float = WRITE_ACK_TIMEOUT,
+        current: Callable[[str], Any] | None = None,
+    ) -> None:
+        self.hass = hass
+        self._publish = publish
+        self._timeout = timeout
+        self._current = current
+        self._pending: dict[str, _PendingWrite] = {}
+
+        self.latency = LatencyHistogram()
+        self.results: dict[str, int] = {r.value: 0 for r in WriteResult}
+
+    async def async_write(
+        self,
+        path: str,
+        value: Any,
+        on_timeout: Callable[[], None] | None = None,
+    ) -> asyncio.Future[WriteResult]:
+        """Publish ``{"value": value}`` to W/<path> and return a future for the echo.
+
+        ``on_timeout`` is called (in the event loop) when no echo arrives in
+        time; entities use it to roll back their optimistic state.
+
+        The write is pending before the publish is awaited, so an echo that
+        arrives while the publish is still in progress resolves it.
+        """
+        old = self._pending.pop(path, None)
+        if old is not None:
+            self._finish(old, WriteResult.SUPERSEDED)
+
+        fut: asyncio.Future[WriteResult] = self.hass.loop.create_future()
+        pending = _PendingWrite(
+            value=value,
+            sent_at=time.monotonic(),
+            future=fut,
+            timer=None,
+            on_timeout=on_timeout,
+            before=self._current(path) if self._current is not None else None,
+        )
+        pending.timer = self.hass.loop.call_later(self._timeout, self._expire, path, pending)
+        self._pending[path] = pending
+
+        try:
+            await self._publish(path, json.dumps({"value": value}))
+        except BaseException:
+            # Not sent: forget the write (no timeout, no rollback callback).
+            if self._pending.get(path) is pending:
+                del self._pending[path]
+            if pending.timer is not None:
+                pending.timer.cancel()
+                pending.timer = None
+            fut.cancel()
+            raise
+        return fut
+
+    @callback
+    def handle_echo(self, path: str, payload: dict[str, Any]) -> None:
+        """Resolve a pending write from an N/ message (hot path: one dict lookup)."""
+        if not self._pending:
+            return
+        pending = self._pending.get(path)
+        if pending is None:
+            return
+
+        echoed = payload.get("value")
+        if _same_value(pending.value, echoed):
+            result = WriteResult.ACKED
+        elif _same_value(pending.before, echoed):
+            return  # the old value, published before the GX applied the write: keep waiting
+        else:
+            result = WriteResult.MISMATCH
+        del self._pending[path]
+        self.latency.record((time.monotonic() - pending.sent_at) * 1000.0)
+        self._finish(pending, result)
+
+    @callback
+    def _expire(self, path: str, pending: _PendingWrite) -> None:
+        if self._pending.get(path) is pending:
+            del self._pending[path]
+        pending.timer = None
+        self._finish(pending, WriteResult.TIMEOUT)
+        if pending.on_timeout is not None:
+            pending.on_timeout()
+
+    def _finish(self, pending: _PendingWrite, result: WriteResult) -> None:
+        if pending.timer is not None:
+            pending.timer.cancel()
+            pending.timer = None
+        self.results[result.value] += 1
+        if not pending.future.done():
+            pending.future.set_result(result)
+
+    @callback
+    def async_shutdown(self) -> None:
+        """Cancel all outstanding writes (config entry unload)."""
+        for pending in self._pending.values():
+            if pending.timer is not None:
+                pending.timer.cancel()
+            if not pending.future.done():
+                pending.future.cancel()
+        self._pending.clear()
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "pending": sorted(self._pending),
+            "results": dict(self.results),
+            "ack_latency_ms": self.latency.as_dict(),
+        }
+
+
+class GuardDecision(StrEnum):
+    """Outcome of `FlashWriteGuard.check` for a requested write."""
+
+    ALLOWED = "allowed"
+    SUPPRESSED = "suppressed"  # equal to the current value (within tolerance)
+    BLOCKED = "blocked"  # hourly write budget of the path exhausted
+
+
+class FlashWriteGuard:
+    """Protect flash-persisted ``settings/`` paths from needless writes.
+
+    Writes equal to the current value (within SETTINGS_WRITE_TOLERANCES) are
+    suppressed; with a budget, at most ``budget_per_hour`` writes per path are
+    allowed in any sliding hour. Other paths are never guarded.
+    """
+
+    def __init__(self, budget_per_hour: int = 0) -> None:
+        self._budget = budget_per_hour
+        self._recent: dict[str, deque[float]] = {}
+        self._counts: dict[str, dict[str, int]] = {}
+
+    @staticmethod
+    def applies(path: str) -> bool:
+        return path.startswith("settings/")
+
+    def check(self, path: str, value: Any, current: Any) -> GuardDecision:
+        """Decide whether `value` may be written to `path` (and count the decision)."""
+        counts = self._counts.setdefault(path, {d.value: 0 for d in GuardDecision})
+        decision = self._decide(path, value, current)
+        counts[decision.value] += 1
+        return decision
+
+    def _decide(self, path: str, value: Any, current: Any) -> GuardDecision:
+        if _within_tolerance(path, value, current):
+            return GuardDecision.SUPPRESSED
+
+        if self._budget:
+            recent = self._recent.setdefault(path, deque())
+            now = time.monotonic()
+            while recent and now - recent[0] >= _HOUR:
+                recent.popleft()
+            if len(recent) >= self._budget:
+                return GuardDecision.BLOCKED
+            recent.append(now)
+
+        return GuardDecision.ALLOWED
+
+    def stats(self, path: str) -> dict[str, Any]:
+        """Per-path counters (entity attributes)."""
+        counts = self._counts.get(path) or {d.value: 0 for d in GuardDecision}
+        recent = self._recent.get(path)
+        now = time.monotonic()
+        return {
+            "writes_allowed": counts[GuardDecision.ALLOWED],
+            "writes_suppressed": counts[GuardDecision.SUPPRESSED],
+            "writes_blocked": counts[GuardDecision.BLOCKED],
+            "writes_last_hour": sum(1 for t in recent if now - t < _HOUR) if recent else 0,
+            "write_budget_per_hour": self._budget or None,
+        }
+
+    def as_diagnostics(self) -> dict[str, Any]:
+        return {
+            "budget_per_hour": self._budget or None,
+            "paths": {path: self.stats(path) for path in sorted(self._counts)},
+        }
+
+
+def _within_tolerance(path: str, value: Any, current: Any) -> bool:
+    if current is None:
+        return False
+    if not isinstance(value, (int, float)) or not isinstance(current, (int, float)):
+        return value == current
+    tolerance = 0.0
+    for suffix, tol in SETTINGS_WRITE_TOLERANCES:
+        if path.endswith(suffix):
+            tolerance = tol
+            break
+    return abs(float(value) - float(current)) <= tolerance + 1e-9
+
+
+# Precision of the written value per route kind (what the number entities write).
+_WRITE_ROUNDING: dict[RouteKind, Callable[[float], float | int]] = {
+    RouteKind.AC_IN_LIMIT: lambda v: round(v, 1),
+    RouteKind.DVCC_MAX_CHARGE_VOLTAGE: lambda v: round(v, 2),
+    RouteKind.DVCC_MAX_CHARGE_CURRENT: lambda v: int(round(v)),
+}
+
+
+def normalize_write(kind: RouteKind, value: float | int, payload: dict[str, Any] | None = None) -> float | int:
+    """Value to publish for a requested `value` of a writable route kind.
+
+    Numbers are rounded to the precision the entity writes and checked
+    against the min/max the GX publishes with the current value (`payload`,
+    if known); a VE.Bus mode must be one of the known mode codes.
+    Raises ValueError for values that must not be written.
+    """
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError(f"not a number: {value!r}")
+    if kind is RouteKind.VEBUS_MODE:
+        if value not in VE_BUS_MODE_MAP:
+            raise ValueError(f"unknown VE.Bus mode {value!r}")
+        return int(value)
+    rounding = _WRITE_ROUNDING.get(kind)
+    if rounding is None:
+        raise ValueError(f"{kind} is not writable")
+    value = rounding(float(value))
+    if payload is not None:
+        low = parse_numeric(payload, "min")
+        high = parse_numeric(payload, "max")
+        if (low is not None and value < low) or (high is not None and value > high):
+            raise ValueError(f"{value} is outside {low}..{high}")
+    return value
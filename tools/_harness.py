@@ -0,0 +1,121 @@
+"""Shared setup for the dev tools: a bare HomeAssistant with one entry's runtime.
+
+Wires the real ingest pipeline and all four platforms the way
+`async_setup_entry` does, without MQTT: messages are fed straight into
+`VictronIngest.handle_message`. Requires Home Assistant in the environment.
+"""
+
+from __future__ import annotations
+
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from homeassistant.core import HomeAssistant  # noqa: E402
+from homeassistant.helpers import device_registry as dr  # noqa: E402
+from homeassistant.helpers import entity_registry as er  # noqa: E402
+
+from custom_components.victron_gx_mqtt import number, select, sensor, switch  # noqa: E402
+from custom_components.victron_gx_mqtt.const import DOMAIN  # noqa: E402
+from custom_components.victron_gx_mqtt.datastore import EntryDataStore  # noqa: E402
+from custom_components.victron_gx_mqtt.ingest import VictronIngest  # noqa: E402
+from custom_components.victron_gx_mqtt.loadshed import LoopLagMonitor  # noqa: E402
+from custom_components.victron_gx_mqtt.snapshot import ValueSnapshot  # noqa: E402
+from custom_components.victron_gx_mqtt.startup import StartupTimings  # noqa: E402
+from custom_components.victron_gx_mqtt.topology import Topology  # noqa: E402
+from custom_components.victron_gx_mqtt.watchdog import StalenessWatchdog  # noqa: E402
+from custom_components.victron_gx_mqtt.writes import FlashWriteGuard, PendingWriteTracker  # noqa: E402
+
+PORTAL = "c0619ab00000"
+PLATFORMS = (sensor, select, switch, number)
+
+
+def synthetic_paths(instances: int, phases: int = 3, unconsumed: bool = True) -> list[str]:
+    """N/ paths a GX publishes for `instances` VE.Bus devices (plus DVCC settings)."""
+    paths = ["settings/0/Settings/SystemSetup/MaxChargeVoltage", "settings/0/Settings/SystemSetup/MaxChargeCurrent"]
+    for n in range(instances):
+        base = f"vebus/{276 + n}"
+        paths += [f"{base}/{p}" for p in ("Mode", "State", "CustomName", "Soc", "Dc/0/Power", "Dc/0/Voltage")]
+        paths += [f"{base}/Dc/0/Current", f"{base}/Ac/ActiveIn/CurrentLimit", f"{base}/Ac/Out/P", f"{base}/Ac/ActiveIn/P"]
+        for phase in ("L1", "L2", "L3")[:phases]:
+            for metric in ("P", "I", "V", "F"):
+                paths += [f"{base}/Ac/Out/{phase}/{metric}", f"{base}/Ac/ActiveIn/{phase}/{metric}"]
+        if unconsumed:
+            # Paths the integration does not consume (bridge mode sees the whole tree).
+            paths += [f"{base}/Leds/Mains", f"{base}/Devices/0/Version", f"{base}/Hub4/L1/AcPowerSetpoint"]
+    return paths
+
+
+@dataclass
+class Runtime:
+    hass: HomeAssistant
+    entry: Any
+    ingest: VictronIngest
+    data: dict[str, Any]
+    added: list[Any]
+
+    def feed(self, paths: list[str], value: Any = 1.0) -> None:
+        payload = '{"value": %s}' % value
+        for path in paths:
+            self.ingest.handle_message(f"N/{PORTAL}/{path}", path, payload)
+
+    def shutdown(self) -> None:
+        self.ingest.async_shutdown()
+        self.data["writes"].async_shutdown()
+
+
+async def async_setup_runtime(
+    config_dir: str, entry_id: str = "bench", known_paths: list[str] | None = None
+) -> Runtime:
+    """Set up one entry (live phase: the initial load is already finished).
+
+    `known_paths` seeds the topology, as if stored by a previous run: the
+    platforms then create those entities during setup.
+    """
+    hass = HomeAssistant(config_dir)
+    await dr.async_load(hass)
+    await er.async_load(hass)
+
+    entry = SimpleNamespace(
+        entry_id=entry_id,
+        title=entry_id,
+        data={"name": entry_id, "topic_prefix": "venus-home", "portal_id": PORTAL},
+        options={},
+        async_on_unload=lambda _unsub: None,
+    )
+
+    async def _publish(path: str, payload: str) -> None:
+        return None
+
+    data = hass.data.setdefault(DOMAIN, {}).setdefault(entry_id, {})
+    data["startup"] = StartupTimings()
+    data["disabled_groups"] = frozenset()
+    data["hidden_groups"] = frozenset()
+    data["topology"] = Topology(hass, entry_id)
+    for path in known_paths or ():
+        data["topology"].add(path)
+    data["snapshot"] = ValueSnapshot(hass, entry_id)
+    data["watchdog"] = StalenessWatchdog(hass)
+    data["store"] = EntryDataStore()
+    data["writes"] = PendingWriteTracker(hass, _publish, current=data["store"].value)
+    data["wear_guard"] = FlashWriteGuard()
+    data["load"] = LoopLagMonitor(hass)
+    data["signal"] = signal = f"victron_gx_mqtt_{entry_id}"
+    data["signal_batch"] = signal_batch = f"{signal}_batch"
+    data["ingest"] = ingest = VictronIngest(
+        hass, signal, signal_batch, data["watchdog"], data["writes"], data["snapshot"], data["store"]
+    )
+
+    added: list[Any] = []
+    for platform in PLATFORMS:
+        await platform.async_setup_entry(hass, entry, lambda entities, *_: added.extend(entities))
+    ingest.async_platforms_ready()
+    ingest._finish_initial_load("tools")
+
+    return Runtime(hass=hass, entry=entry, ingest=ingest, data=data, added=added)
@@ -0,0 +1,128 @@
+#!/usr/bin/env python3
+"""Allocation check for the steady-state ingestion path.
+
+Replays a message trace through one config entry's real pipeline (see
+_harness.py) under tracemalloc and fails (exit code 1) when the memory
+retained per message exceeds ``--max-bytes``. After warm-up every path has
+its route, entities and store slot, so replaying the trace again must not
+grow anything: a route cache that creates new Route objects, a list that
+keeps every message or a per-message dict that is never dropped all show up
+here.
+
+The default trace is synthetic (``--instances`` VE.Bus devices, a mix of
+new values and unchanged republishes); ``--trace`` replays a recorded one,
+one JSON object per line::
+
+    {"path": "vebus/276/Ac/Out/L1/P", "payload": "{\\"value\\": 230.4}"}
+
+Requires Home Assistant in the Python environment. Run from the repository
+root::
+
+    python tools/alloc_check.py [--rounds 20] [--max-bytes 1.0]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from _harness import PORTAL, async_setup_runtime, synthetic_paths
+
+WARMUP_ROUNDS = 3
+
+
+def _synthetic_trace(instances: int) -> list[tuple[str, str]]:
+    """One round: every path changed, republished unchanged, changed again."""
+    trace: list[tuple[str, str]] = []
+    for i, path in enumerate(synthetic_paths(instances)):
+        trace += [(path, '{"value": %d}' % i), (path, '{"value": %d}' % i), (path, '{"value": %d.5}' % i)]
+    return trace
+
+
+def _load_trace(path: Path) -> list[tuple[str, str]]:
+    trace: list[tuple[str, str]] = []
+    for line in path.read_text().splitlines():
+        if line.strip():
+            item = json.loads(line)
+            trace.append((item["path"], item["payload"]))
+    return trace
+
+
+async def _run(trace: list[tuple[str, str]], rounds: int) -> dict[str, Any]:
+    messages = [(f"N/{PORTAL}/{path}", path, payload) for path, payload in trace]
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        rt = await async_setup_runtime(config_dir)
+        ingest = rt.ingest
+
+        async def replay(n: int) -> None:
+            for _ in range(n):
+                for topic, path, payload in messages:
+                    ingest.handle_message(topic, path, payload)
+                # Let micro-batches, dispatcher jobs and timers run.
+                await asyncio.sleep(0)
+                await asyncio.sleep(0)
+
+        # Entities, routes, store slots and snapshot entries are created here.
+        await replay(WARMUP_ROUNDS)
+
+        # One traced round first: the store then holds payloads allocated under
+        # tracemalloc, so replacing them later is not counted as growth.
+        tracemalloc.start()
+        await replay(1)
+        gc.collect()
+        base, _ = tracemalloc.get_traced_memory()
+        before = tracemalloc.take_snapshot()
+        await replay(rounds)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        count = rounds * len(messages)
+        blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+        top = [str(stat) for stat in after.compare_to(before, "lineno")[:5] if stat.size_diff > 0]
+        rt.shutdown()
+
+    return {
+        "messages": count,
+        "retained_bytes": retained - base,
+        "bytes_per_message": (retained - base) / count,
+        "blocks_per_message": blocks / count,
+        "peak_bytes": peak - base,
+        "top": top,
+    }
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="victron_gx_mqtt ingestion allocation check")
+    parser.add_argument("--trace", type=Path, help="JSON lines trace (default: synthetic)")
+    parser.add_argument("--instances", type=int, default=2, help="VE.Bus instances of the synthetic trace")
+    parser.add_argument("--rounds", type=int, default=20, help="replays of the trace that are measured")
+    parser.add_argument("--max-bytes", type=float, default=1.0, help="allowed retained bytes per message")
+    args = parser.parse_args()
+
+    trace = _load_trace(args.trace) if args.trace else _synthetic_trace(args.instances)
+    r = asyncio.run(_run(trace, args.rounds))
+
+    print(f"messages           {r['messages']}")
+    print(f"retained           {r['retained_bytes']} B ({r['bytes_per_message']:.3f} B/message)")
+    print(f"net blocks         {r['blocks_per_message']:.3f} /message")
+    print(f"peak               {r['peak_bytes'] / 1024:.1f} KiB")
+    failed = r["bytes_per_message"] > args.max_bytes
+    if failed:
+        print(f"FAIL: more than {args.max_bytes} B retained per message; largest growth:")
+        for line in r["top"]:
+            print(f"  {line}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
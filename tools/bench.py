@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Performance budget for the victron_gx_mqtt hot paths.
+
+Measures (ns per operation, best of several repeats):
+
+- route_cold / route_cached: path parsing (`routes._parse`) / `routes.resolve` (LRU cache)
+- parse_numeric / parse_code: `datastore.parse_numeric` / `datastore.parse_code`
+  (run once per received payload, for all consumers)
+- entity_creation: constructing AC Out sensor entities
+- fanout: `VictronIngest.handle_message` -> dispatcher -> all four platform
+  handlers (entities created, not added: no state write)
+- state_write: entity `handle_update` including `async_write_ha_state`
+
+Results are compared with a baseline file; any benchmark slower than
+baseline * (1 + tolerance) fails the run (exit code 1), as does a missing
+baseline file or a benchmark without a baseline entry. Record or refresh
+the baseline on the reference machine with ``--update`` and commit it.
+
+Requires Home Assistant in the Python environment (same as the integration).
+Run from the repository root::
+
+    python tools/bench.py [--update] [--tolerance 0.25]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any
+
+from _harness import PORTAL, async_setup_runtime, synthetic_paths
+
+from custom_components.victron_gx_mqtt import sensor
+from custom_components.victron_gx_mqtt.datastore import PathValue, parse_code, parse_numeric
+from custom_components.victron_gx_mqtt.routes import _parse, resolve
+
+BASELINE = Path(__file__).with_name("bench_baseline.json")
+REPEATS = 20
+
+
+def _bench(fn: Callable[[], Any], ops: int) -> float:
+    """ns per operation, where one call of `fn` performs `ops` operations."""
+    best = float("inf")
+    for _ in range(REPEATS):
+        start = time.perf_counter_ns()
+        fn()
+        best = min(best, (time.perf_counter_ns() - start) / ops)
+    return best
+
+
+async def _run() -> dict[str, float]:
+    results: dict[str, float] = {}
+    paths = synthetic_paths(2)
+
+    # -- routing --------------------------------------------------------------
+    def route_cold() -> None:
+        for path in paths:
+            _parse(path)
+
+    def route_cached() -> None:
+        for path in paths:
+            resolve(path)
+
+    results["route_cold"] = _bench(route_cold, len(paths))
+    results["route_cached"] = _bench(route_cached, len(paths))
+
+    # -- payload parsing --------------------------------------------------------
+    payloads = [{"value": 230.4}, {"value": 12}, {"value": "49,98"}, {"value": None}, {"value": True}] * 40
+    results["parse_numeric"] = _bench(lambda: [parse_numeric(p) for p in payloads], len(payloads))
+    results["parse_code"] = _bench(lambda: [parse_code(p) for p in payloads], len(payloads))
+
+    # -- integration runtime ----------------------------------------------------
+    with tempfile.TemporaryDirectory() as config_dir:
+        rt = await async_setup_runtime(config_dir)
+        hass, entry, ingest, added = rt.hass, rt.entry, rt.ingest, rt.added
+
+        raw = [(f"N/{PORTAL}/{path}", path, json.dumps({"value": i * 1.5})) for i, path in enumerate(paths)]
+
+        def fanout() -> None:
+            for topic, path, payload in raw:
+                ingest.handle_message(topic, path, payload)
+
+        fanout()  # create all entities first
+        results["fanout"] = _bench(fanout, len(raw))
+
+        # -- entity creation ------------------------------------------------------
+        sdef = sensor._AC_OUT_DEFS["ac_out_l1_power"]
+
+        def create() -> None:
+            for i in range(200):
+                sensor.VictronVeBusAcOutSensor(
+                    hass=hass,
+                    entry=entry,
+                    cfg_name="bench",
+                    cfg_slug="bench",
+                    portal_id=PORTAL,
+                    vebus_instance=str(i),
+                    sdef=sdef,
+                    path=f"vebus/{i}/Ac/Out/L1/P",
+                )
+
+        results["entity_creation"] = _bench(create, 200)
+
+        # -- state write ------------------------------------------------------------
+        entities = [e for e in added if isinstance(e, sensor.VictronVeBusAcOutSensor)][:20]
+        for i, ent in enumerate(entities):
+            ent.hass = hass
+            ent.entity_id = f"sensor.bench_{i}"
+        counter = iter(range(10**9))
+
+        def state_write() -> None:
+            for ent in entities:
+                value = float(next(counter))
+                ent.handle_update(PathValue(value, {"value": value}, None, None, 0))
+
+        results["state_write"] = _bench(state_write, len(entities))
+
+        rt.shutdown()
+
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="victron_gx_mqtt hot path performance budget")
+    parser.add_argument("--update", action="store_true", help="write the results as the new baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown (0.25 = +25%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    args = parser.parse_args()
+
+    results = asyncio.run(_run())
+
+    if args.update:
+        args.baseline.write_text(json.dumps({k: round(v, 1) for k, v in results.items()}, indent=2) + "\n")
+        print(f"baseline written to {args.baseline}")
+        return 0
+
+    if not args.baseline.exists():
+        print(f"no baseline at {args.baseline}; record one with --update")
+        return 1
+    baseline: dict[str, float] = json.loads(args.baseline.read_text())
+    failed = False
+    for name, ns in results.items():
+        base = baseline.get(name)
+        if base is None:
+            failed = True
+            print(f"{name:16s} {ns:10.1f} ns/op   NO BASELINE (record it with --update)")
+            continue
+        ratio = ns / base
+        over = ratio > 1.0 + args.tolerance
+        failed |= over
+        print(f"{name:16s} {ns:10.1f} ns/op   baseline {base:10.1f}   x{ratio:.2f}{'  REGRESSION' if over else ''}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
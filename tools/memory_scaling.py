@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""Retained memory of one config entry at 100 / 1,000 / 5,000 entities.
+
+Drives the real ingest pipeline and platforms (see _harness.py) with
+synthetic VE.Bus instances until the target entity count is reached and
+reports, per size:
+
+- bytes retained by discovery (tracemalloc, after gc) in total and per entity
+- the container size of every runtime map (e.g. `_Runtime.ac_out_entities`,
+  `runtime_number["entities"]`) and of the data store / topology / snapshot maps
+- how many distinct `DeviceInfo` objects the entities hold (1 = shared)
+
+Output is a Markdown table (``--json`` for machine-readable results);
+``--output`` writes it, with the versions it was measured on, to a file
+such as tools/memory_scaling_results.md, which is committed for sizing HA
+hosts.
+Requires Home Assistant in the Python environment.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import platform
+import sys
+import tempfile
+import tracemalloc
+from pathlib import Path
+from typing import Any
+
+from _harness import async_setup_runtime, synthetic_paths
+
+from custom_components.victron_gx_mqtt import routes
+
+SIZES = (100, 1_000, 5_000)
+PHASES = 3
+
+
+def _container_bytes(obj: Any) -> int:
+    """Shallow size of a dict/set/list including its keys (values are counted elsewhere)."""
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(sys.getsizeof(k) for k in obj)
+    return size
+
+
+def _runtime_maps(data: dict[str, Any]) -> dict[str, int]:
+    maps: dict[str, Any] = {}
+    sensor_rt = data.get("sensor_runtime")
+    if sensor_rt is not None:
+        for name in ("state_entities", "ac_out_entities", "ac_in_entities", "battery_entities"):
+            maps[f"sensor._Runtime.{name}"] = getattr(sensor_rt, name)
+    select_rt = data.get("select_runtime")
+    if select_rt is not None:
+        maps["select._Runtime.mode_entities"] = select_rt.mode_entities
+    switch_rt = data.get("switch_runtime")
+    if switch_rt is not None:
+        maps["switch._Runtime.emergency"] = switch_rt.emergency
+        maps["switch._Runtime.grid"] = switch_rt.grid
+    number_rt = data.get("runtime_number")
+    if number_rt is not None:
+        maps['number runtime["entities"]'] = number_rt["entities"]
+    maps["topology.paths"] = data["topology"].paths
+    maps["snapshot.values"] = data["snapshot"].values
+    maps["store.values"] = data["store"].values
+    return {name: _container_bytes(obj) for name, obj in maps.items()}
+
+
+async def _measure(target: int, entities_per_instance: int) -> dict[str, Any]:
+    instances = max(1, math.ceil(target / entities_per_instance))
+    paths = synthetic_paths(instances, PHASES)
+    # Routes are measured per run: start without cached or interned routes.
+    routes.resolve.cache_clear()
+    routes._ROUTES.clear()
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        rt = await async_setup_runtime(config_dir)
+
+        # Only what the entry accumulates while discovering entities is measured
+        # (HA core and platform setup are the same for every size).
+        gc.collect()
+        tracemalloc.start()
+        base, _ = tracemalloc.get_traced_memory()
+        rt.feed(paths)
+        gc.collect()
+        retained, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        entities = len(rt.added)
+        result = {
+            "target": target,
+            "vebus_instances": instances,
+            "entities": entities,
+            "paths": len(paths),
+            "retained_bytes": retained - base,
+            "bytes_per_entity": round((retained - base) / entities) if entities else None,
+            "peak_bytes": peak - base,
+            "device_info_objects": len({id(e.device_info) for e in rt.added}),
+            "runtime_maps": _runtime_maps(rt.data),
+        }
+        rt.shutdown()
+        return result
+
+
+async def _run(sizes: tuple[int, ...]) -> list[dict[str, Any]]:
+    # Entities per VE.Bus instance (sensors, select, switches, number) from a one-instance run.
+    with tempfile.TemporaryDirectory() as config_dir:
+        rt = await async_setup_runtime(config_dir, "probe")
+        rt.feed(synthetic_paths(1, PHASES))
+        # DVCC numbers exist once per entry, not per instance.
+        per_instance = len(rt.added) - 2
+        rt.shutdown()
+    return [await _measure(size, per_instance) for size in sizes]
+
+
+def _markdown(results: list[dict[str, Any]]) -> str:
+    lines = [
+        "| entities | VE.Bus instances | retained | per entity | peak | DeviceInfo objects |",
+        "|---:|---:|---:|---:|---:|---:|",
+    ]
+    for r in results:
+        lines.append(
+            f"| {r['entities']} | {r['vebus_instances']} | {r['retained_bytes'] / 1024:.0f} KiB"
+            f" | {r['bytes_per_entity']} B | {r['peak_bytes'] / 1024:.0f} KiB | {r['device_info_objects']} |"
+        )
+    lines += ["", "| runtime map | " + " | ".join(str(r["entities"]) for r in results) + " |"]
+    lines.append("|---|" + "---:|" * len(results))
+    for name in results[0]["runtime_maps"]:
+        row = " | ".join(f"{r['runtime_maps'][name] / 1024:.1f} KiB" for r in results)
+        lines.append(f"| `{name}` | {row} |")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="victron_gx_mqtt memory scaling per config entry")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES), help="target entity counts")
+    parser.add_argument("--json", action="store_true", help="print JSON instead of Markdown")
+    parser.add_argument("--output", type=Path, help="also write the Markdown results to this file")
+    args = parser.parse_args()
+
+    results = asyncio.run(_run(tuple(args.sizes)))
+    print(json.dumps(results, indent=2) if args.json else _markdown(results))
+    if args.output:
+        from homeassistant.const import __version__ as ha_version
+
+        header = (
+            "# Memory scaling per config entry\n\n"
+            f"Measured with `tools/memory_scaling.py` on Home Assistant {ha_version}, "
+            f"Python {platform.python_version()} ({platform.machine()}).\n\n"
+        )
+        args.output.write_text(header + _markdown(results) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""What one victron_gx_mqtt config entry adds to Home Assistant boot time.
+
+Reports (ms, best of several runs):
+
+- import: the integration package and each platform module, imported in a
+  fresh interpreter after the HA modules they use (`HA_MODULES`, loaded by
+  HA anyway). This is the only place the package import time is measured;
+  the integration itself does not time its own import
+- setup: per-platform setup and snapshot replay for an empty topology (first
+  start) and for topologies of 1 and 10 VE.Bus instances (restart with
+  known entities), see `StartupTimings`
+
+The entity_id migrations run after EVENT_HOMEASSISTANT_STARTED and are not
+part of boot time; their duration on a real system is in the diagnostics
+(`startup.deferred_ms`). Requires Home Assistant in the Python environment::
+
+    python tools/startup_bench.py [--json]
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any
+
+from _harness import ROOT, async_setup_runtime, synthetic_paths
+
+REPEATS = 5
+INSTANCES = (0, 1, 10)
+MODULES = (
+    "custom_components.victron_gx_mqtt",
+    "custom_components.victron_gx_mqtt.sensor",
+    "custom_components.victron_gx_mqtt.select",
+    "custom_components.victron_gx_mqtt.switch",
+    "custom_components.victron_gx_mqtt.number",
+)
+
+# Loaded by Home Assistant (or its MQTT integration) anyway; imported before
+# the measurement so only the package's own modules are timed.
+HA_MODULES = (
+    "homeassistant.core",
+    "homeassistant.components.diagnostics",
+    "homeassistant.components.mqtt",
+    "homeassistant.components.websocket_api",
+    "homeassistant.helpers.entity_platform",
+    "paho.mqtt.client",
+)
+
+_IMPORT_PROBE = """
+import importlib, json, sys, time
+sys.path.insert(0, {root!r})
+for name in {ha_modules!r}:
+    importlib.import_module(name)
+out = {{}}
+for name in {modules!r}:
+    started = time.perf_counter()
+    importlib.import_module(name)
+    out[name] = (time.perf_counter() - started) * 1000.0
+print(json.dumps(out))
+"""
+
+
+def _import_times() -> dict[str, float]:
+    code = _IMPORT_PROBE.format(root=str(ROOT), ha_modules=HA_MODULES, modules=MODULES)
+    best: dict[str, float] = {}
+    for _ in range(REPEATS):
+        run = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        for name, ms in json.loads(run.stdout).items():
+            best[name] = min(ms, best.get(name, float("inf")))
+    return best
+
+
+async def _setup_times(instances: int) -> dict[str, float]:
+    known = synthetic_paths(instances, unconsumed=False) if instances else []
+    best: dict[str, float] = {}
+    for _ in range(REPEATS):
+        with tempfile.TemporaryDirectory() as config_dir:
+            started = time.perf_counter()
+            rt = await async_setup_runtime(config_dir, known_paths=known)
+            total = (time.perf_counter() - started) * 1000.0
+            phases = dict(rt.data["startup"].phases, total=total, entities=len(rt.added))
+            rt.shutdown()
+        for name, ms in phases.items():
+            best[name] = min(ms, best.get(name, float("inf")))
+    return best
+
+
+async def _run() -> dict[str, Any]:
+    return {
+        "import_ms": _import_times(),
+        "setup_ms": {str(n): await _setup_times(n) for n in INSTANCES},
+    }
+
+
+def _print(results: dict[str, Any]) -> None:
+    print("import (ms)")
+    for name, ms in results["import_ms"].items():
+        print(f"  {name:45s} {ms:8.2f}")
+    for instances, phases in results["setup_ms"].items():
+        print(f"setup, {instances} VE.Bus instance(s), {phases.pop('entities'):.0f} entities (ms)")
+        for name, ms in phases.items():
+            print(f"  {name:45s} {ms:8.2f}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="victron_gx_mqtt startup cost per config entry")
+    parser.add_argument("--json", action="store_true", help="print JSON")
+    args = parser.parse_args()
+
+    results = asyncio.run(_run())
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        _print(results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,476 @@
+#!/usr/bin/env python3
+"""Deterministic Venus OS (GX) stand-in for offline testing of victron_gx_mqtt.
+
+Runs a minimal MQTT 3.1.1 broker that behaves like the broker on a Cerbo GX:
+
+- ``R/<portal>/keepalive`` triggers a full republish of all paths followed by
+  ``N/<portal>/full_publish_completed``; without keepalive the GX stops
+  publishing after KEEPALIVE_TIMEOUT simulated seconds.
+- ``R/<portal>/<path>`` republishes that single path.
+- ``W/<portal>/<path>`` applies the write (clamped to min/max where the GX
+  does so) and echoes the resulting value on ``N/``.
+- VE.Bus Mode/State transitions, a scripted grid outage and AC/DC
+  measurements are simulated on a fixed time step from a seeded RNG, so two
+  runs with the same arguments and the same writes publish the same values.
+
+Point the integration's direct mode at it (GX broker host ``127.0.0.1``,
+port ``--port``) or use it in-process::
+
+    sim = VenusSimulator(portal="c0619ab00000", speed=60.0)
+    await sim.async_start("127.0.0.1", 0)
+    ...
+    await sim.async_stop()
+
+Only the Python standard library is used.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import math
+import random
+import struct
+from dataclasses import dataclass, field
+from typing import Any
+
+# MQTT 3.1.1 control packet types (upper nibble of the fixed header).
+_CONNECT = 0x10
+_CONNACK = 0x20
+_PUBLISH = 0x30
+_PUBACK = 0x40
+_PUBREC = 0x50
+_PUBREL = 0x60
+_PUBCOMP = 0x70
+_SUBSCRIBE = 0x80
+_SUBACK = 0x90
+_UNSUBSCRIBE = 0xA0
+_UNSUBACK = 0xB0
+_PINGREQ = 0xC0
+_PINGRESP = 0xD0
+_DISCONNECT = 0xE0
+
+KEEPALIVE_TIMEOUT = 60.0  # simulated seconds without R/ keepalive until publishing stops
+
+# VE.Bus Mode: 1=Charger Only, 2=Inverter Only, 3=On, 4=Off
+MODE_CHARGER_ONLY, MODE_INVERTER_ONLY, MODE_ON, MODE_OFF = 1, 2, 3, 4
+# VE.Bus State (subset): 0=Off, 3=Bulk, 4=Absorption, 5=Float, 9=Inverting
+STATE_OFF, STATE_BULK, STATE_ABSORPTION, STATE_FLOAT, STATE_INVERTING = 0, 3, 4, 5, 9
+
+
+def _encode_str(value: str) -> bytes:
+    raw = value.encode("utf-8")
+    return struct.pack("!H", len(raw)) + raw
+
+
+def _packet(header: int, body: bytes) -> bytes:
+    out = bytearray([header])
+    length = len(body)
+    while True:
+        byte = length % 128
+        length //= 128
+        out.append(byte | 0x80 if length else byte)
+        if not length:
+            break
+    return bytes(out) + body
+
+
+def topic_matches(topic_filter: str, topic: str) -> bool:
+    """MQTT wildcard match (``+`` one level, ``#`` the rest)."""
+    f_parts = topic_filter.split("/")
+    t_parts = topic.split("/")
+    for i, part in enumerate(f_parts):
+        if part == "#":
+            return True
+        if i >= len(t_parts):
+            return False
+        if part != "+" and part != t_parts[i]:
+            return False
+    return len(f_parts) == len(t_parts)
+
+
+@dataclass
+class _Value:
+    value: Any
+    min: float | None = None
+    max: float | None = None
+
+    def payload(self) -> str:
+        data: dict[str, Any] = {"value": self.value}
+        if self.min is not None:
+            data["min"] = self.min
+        if self.max is not None:
+            data["max"] = self.max
+        return json.dumps(data)
+
+
+@dataclass
+class GridOutage:
+    start: float  # simulated seconds
+    duration: float
+
+
+@dataclass
+class VenusModel:
+    """The GX state: one path -> value table evolved on a fixed time step."""
+
+    vebus_instances: tuple[str, ...] = ("276",)
+    phases: int = 1
+    seed: int = 1
+    outages: list[GridOutage] = field(default_factory=lambda: [GridOutage(600.0, 120.0)])
+
+    def __post_init__(self) -> None:
+        self.rng = random.Random(self.seed)
+        self.now = 0.0
+        self.values: dict[str, _Value] = {}
+        self.soc: dict[str, float] = {}
+        self._changed: set[str] = set()
+
+        self._set("settings/0/Settings/SystemSetup/MaxChargeVoltage", 55.2)
+        self._set("settings/0/Settings/SystemSetup/MaxChargeCurrent", 80)
+        for inst in self.vebus_instances:
+            base = f"vebus/{inst}"
+            self.soc[inst] = 60.0
+            self._set(f"{base}/CustomName", f"MultiPlus-II {inst}")
+            self._set(f"{base}/Mode", MODE_ON)
+            self._set(f"{base}/Ac/NumberOfPhases", self.phases)
+            self._set(f"{base}/Ac/ActiveIn/CurrentLimit", 16.0, 0.0, 50.0)
+            self._set(f"{base}/Alarms/GridLost", 0)
+        self.step(0.0)
+        self._changed.clear()
+
+    # -- helpers --------------------------------------------------------------
+
+    def _set(self, path: str, value: Any, mn: float | None = None, mx: float | None = None) -> None:
+        current = self.values.get(path)
+        if current is None:
+            self.values[path] = _Value(value, mn, mx)
+            self._changed.add(path)
+        elif current.value != value:
+            current.value = value
+            self._changed.add(path)
+
+    def get(self, path: str) -> Any:
+        v = self.values.get(path)
+        return v.value if v is not None else None
+
+    def grid_available(self) -> bool:
+        return not any(o.start <= self.now < o.start + o.duration for o in self.outages)
+
+    def pop_changed(self) -> list[str]:
+        changed = sorted(self._changed)
+        self._changed.clear()
+        return changed
+
+    # -- simulation -------------------------------------------------------------
+
+    def step(self, dt: float) -> None:
+        """Advance the simulation by `dt` simulated seconds."""
+        self.now += dt
+        grid = self.grid_available()
+        for inst in self.vebus_instances:
+            self._step_vebus(inst, dt, grid)
+
+    def _step_vebus(self, inst: str, dt: float, grid: bool) -> None:
+        base = f"vebus/{inst}"
+        mode = self.get(f"{base}/Mode")
+        limit = float(self.get(f"{base}/Ac/ActiveIn/CurrentLimit"))
+        rng = self.rng
+
+        # Daily-ish load profile (period 1 h simulated) plus seeded noise.
+        load = 600.0 + 400.0 * math.sin(self.now / 3600.0 * 2 * math.pi) + rng.uniform(-50.0, 50.0)
+        inverting = mode in (MODE_ON, MODE_INVERTER_ONLY) and (not grid or mode == MODE_INVERTER_ONLY)
+        passthru = grid and mode in (MODE_ON, MODE_CHARGER_ONLY)
+        out_load = load if (inverting or passthru) else 0.0
+
+        soc = self.soc[inst]
+        charge_w = 0.0
+        if passthru and soc < 100.0:
+            charge_w = min(2000.0, max(0.0, limit * 230.0 * self.phases - out_load))
+        discharge_w = out_load if inverting else 0.0
+        soc = min(100.0, max(0.0, soc + (charge_w - discharge_w) * dt / (10_000.0 * 36.0)))
+        self.soc[inst] = soc
+
+        if mode == MODE_OFF or (not inverting and not passthru):
+            state = STATE_OFF
+        elif inverting:
+            state = STATE_INVERTING
+        elif soc < 85.0:
+            state = STATE_BULK
+        elif soc < 95.0:
+            state = STATE_ABSORPTION
+        else:
+            state = STATE_FLOAT
+
+        battery_w = charge_w - discharge_w
+        voltage = round(51.0 + soc * 0.04 + rng.uniform(-0.02, 0.02), 2)
+        self._set(f"{base}/State", state)
+        self._set(f"{base}/Alarms/GridLost", 0 if grid or mode == MODE_OFF else 2)
+        self._set(f"{base}/Soc", round(soc, 1))
+        self._set(f"{base}/Dc/0/Voltage", voltage)
+        self._set(f"{base}/Dc/0/Current", round(battery_w / voltage, 1))
+        self._set(f"{base}/Dc/0/Power", round(battery_w))
+
+        in_total = (out_load + charge_w) if passthru else 0.0
+        for n in range(1, self.phases + 1):
+            out_v = round(230.0 + rng.uniform(-1.5, 1.5), 1) if out_load or inverting else 0.0
+            out_p = round(out_load / self.phases)
+            self._set(f"{base}/Ac/Out/L{n}/V", out_v)
+            self._set(f"{base}/Ac/Out/L{n}/P", out_p)
+            self._set(f"{base}/Ac/Out/L{n}/I", round(out_p / out_v, 1) if out_v else 0.0)
+            self._set(f"{base}/Ac/Out/L{n}/F", round(50.0 + rng.uniform(-0.02, 0.02), 2) if out_v else 0.0)
+
+            in_v = round(231.0 + rng.uniform(-2.0, 2.0), 1) if grid else 0.0
+            in_p = round(in_total / self.phases)
+            self._set(f"{base}/Ac/ActiveIn/L{n}/V", in_v)
+            self._set(f"{base}/Ac/ActiveIn/L{n}/P", in_p)
+            self._set(f"{base}/Ac/ActiveIn/L{n}/I", round(in_p / in_v, 1) if in_v else 0.0)
+            self._set(f"{base}/Ac/ActiveIn/L{n}/F", round(50.0 + rng.uniform(-0.02, 0.02), 2) if grid else 0.0)
+        self._set(f"{base}/Ac/Out/P", round(out_load))
+        self._set(f"{base}/Ac/ActiveIn/P", round(in_total))
+
+    def write(self, path: str, value: Any) -> bool:
+        """Apply a W/ write like the GX does (clamped to min/max). False: path not writable."""
+        current = self.values.get(path)
+        writable = path.endswith(("/Mode", "/CurrentLimit", "/MaxChargeVoltage", "/MaxChargeCurrent"))
+        if current is None or not writable:
+            return False
+        if path.endswith("/Mode") and value not in (MODE_CHARGER_ONLY, MODE_INVERTER_ONLY, MODE_ON, MODE_OFF):
+            self._changed.add(path)  # the GX echoes the unchanged value
+            return True
+        if isinstance(value, (int, float)) and current.min is not None and current.max is not None:
+            value = min(current.max, max(current.min, value))
+        self._set(path, value)
+        self._changed.add(path)
+        # Mode/limit changes take effect on the next step; apply now so State follows immediately.
+        self.step(0.0)
+        return True
+
+
+class _Client:
+    def __init__(self, writer: asyncio.StreamWriter) -> None:
+        self.writer = writer
+        self.filters: list[str] = []
+
+    def send(self, topic: str, payload: str) -> None:
+        if any(topic_matches(f, topic) for f in self.filters):
+            self.writer.write(_packet(_PUBLISH, _encode_str(topic) + payload.encode("utf-8")))
+
+
+class VenusSimulator:
+    """Fake GX broker around a VenusModel.
+
+    `speed` is simulated seconds per real second; `step` the simulated time
+    step. With a large speed the simulation runs as fast as the loop allows.
+    """
+
+    def __init__(
+        self,
+        portal: str = "c0619ab00000",
+        model: VenusModel | None = None,
+        speed: float = 1.0,
+        step: float = 1.0,
+    ) -> None:
+        self.portal = portal
+        self.model = model or VenusModel()
+        self.speed = speed
+        self.step_size = step
+        self._clients: list[_Client] = []
+        self._handlers: set[asyncio.Task[None]] = set()
+        self._server: asyncio.AbstractServer | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._keepalive_until: float | None = None
+
+        self.published = 0
+        self.writes = 0
+        self.keepalives = 0
+
+    @property
+    def port(self) -> int:
+        assert self._server is not None
+        return self._server.sockets[0].getsockname()[1]
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 1883) -> None:
+        self._server = await asyncio.start_server(self._handle_client, host, port)
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def async_stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        if self._server is not None:
+            self._server.close()
+        for client in self._clients:
+            client.writer.close()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+
+    # -- publishing -------------------------------------------------------------
+
+    def _publishing(self) -> bool:
+        return self._keepalive_until is not None and self.model.now < self._keepalive_until
+
+    def _publish(self, path: str) -> None:
+        value = self.model.values.get(path)
+        if value is None:
+            return
+        topic = f"N/{self.portal}/{path}"
+        payload = value.payload()
+        for client in self._clients:
+            client.send(topic, payload)
+        self.published += 1
+
+    def _full_publish(self) -> None:
+        for path in sorted(self.model.values):
+            self._publish(path)
+        for client in self._clients:
+            client.send(f"N/{self.portal}/full_publish_completed", json.dumps({"value": int(self.model.now)}))
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.step_size / self.speed)
+            self.model.step(self.step_size)
+            changed = self.model.pop_changed()
+            if self._publishing():
+                for path in changed:
+                    self._publish(path)
+
+    # -- incoming ---------------------------------------------------------------
+
+    def _handle_publish(self, topic: str, payload: bytes) -> None:
+        parts = topic.split("/", 2)
+        if len(parts) != 3 or parts[1] != self.portal:
+            return
+        kind, path = parts[0], parts[2]
+
+        if kind == "R":
+            if path == "keepalive":
+                self.keepalives += 1
+                first = not self._publishing()
+                self._keepalive_until = self.model.now + KEEPALIVE_TIMEOUT
+                if first or payload.strip() in (b"", b"{}"):
+                    self._full_publish()
+                self.model.pop_changed()
+            else:
+                self._publish(path)
+            return
+
+        if kind == "W":
+            try:
+                value = json.loads(payload)["value"]
+            except (ValueError, KeyError, TypeError):
+                return
+            if self.model.write(path, value):
+                self.writes += 1
+                # Echo the write and everything it changed (State, ...), like the GX.
+                for changed in self.model.pop_changed():
+                    self._publish(changed)
+
+    async def _handle_client(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        client = _Client(writer)
+        task = asyncio.current_task()
+        assert task is not None
+        self._handlers.add(task)
+        try:
+            header, data = await _read_packet(reader)
+            if header & 0xF0 != _CONNECT:
+                return
+            writer.write(_packet(_CONNACK, b"\x00\x00"))
+            self._clients.append(client)
+            while True:
+                header, data = await _read_packet(reader)
+                ptype = header & 0xF0
+                if ptype == _PUBLISH:
+                    qos = (header >> 1) & 0x03
+                    (tlen,) = struct.unpack_from("!H", data, 0)
+                    pos = 2 + tlen
+                    topic = data[2:pos].decode("utf-8", errors="replace")
+                    if qos:
+                        packet_id = data[pos : pos + 2]
+                        pos += 2
+                        writer.write(_packet(_PUBACK if qos == 1 else _PUBREC, packet_id))
+                    self._handle_publish(topic, data[pos:])
+                elif ptype == _PUBREL:
+                    writer.write(_packet(_PUBCOMP, data[:2]))
+                elif ptype == _SUBSCRIBE:
+                    packet_id, pos, granted = data[:2], 2, bytearray()
+                    while pos < len(data):
+                        (flen,) = struct.unpack_from("!H", data, pos)
+                        client.filters.append(data[pos + 2 : pos + 2 + flen].decode("utf-8"))
+                        pos += 2 + flen + 1
+                        granted.append(0)
+                    writer.write(_packet(_SUBACK, packet_id + bytes(granted)))
+                elif ptype == _UNSUBSCRIBE:
+                    writer.write(_packet(_UNSUBACK, data[:2]))
+                elif ptype == _PINGREQ:
+                    writer.write(_packet(_PINGRESP, b""))
+                elif ptype == _DISCONNECT:
+                    return
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            if client in self._clients:
+                self._clients.remove(client)
+            self._handlers.discard(task)
+            writer.close()
+
+
+async def _read_packet(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    header = (await reader.readexactly(1))[0]
+    length = 0
+    shift = 0
+    while True:
+        byte = (await reader.readexactly(1))[0]
+        length |= (byte & 0x7F) << shift
+        if not byte & 0x80:
+            break
+        shift += 7
+    data = await reader.readexactly(length) if length else b""
+    return header, data
+
+
+async def _main(args: argparse.Namespace) -> None:
+    model = VenusModel(
+        vebus_instances=tuple(args.vebus),
+        phases=args.phases,
+        seed=args.seed,
+        outages=[GridOutage(args.outage_at, args.outage_for)] if args.outage_for > 0 else [],
+    )
+    sim = VenusSimulator(args.portal, model, speed=args.speed, step=args.step)
+    await sim.async_start(args.host, args.port)
+    print(f"Venus OS simulator for portal {args.portal} on {args.host}:{sim.port} (speed x{args.speed:g})")
+    try:
+        if args.duration:
+            await asyncio.sleep(args.duration / args.speed)
+        else:
+            await asyncio.Event().wait()
+    finally:
+        await sim.async_stop()
+        print(f"simulated {model.now:.0f} s, published {sim.published}, writes {sim.writes}, keepalives {sim.keepalives}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=1883)
+    parser.add_argument("--portal", default="c0619ab00000", help="VRM portal id")
+    parser.add_argument("--vebus", nargs="+", default=["276"], help="VE.Bus instances")
+    parser.add_argument("--phases", type=int, choices=(1, 2, 3), default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--speed", type=float, default=1.0, help="simulated seconds per real second")
+    parser.add_argument("--step", type=float, default=1.0, help="simulated time step (s)")
+    parser.add_argument("--outage-at", type=float, default=600.0, help="grid outage start (simulated s)")
+    parser.add_argument("--outage-for", type=float, default=120.0, help="grid outage length (s, 0 = none)")
+    parser.add_argument("--duration", type=float, default=0.0, help="stop after this many simulated s")
+    try:
+        asyncio.run(_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()